@@ -1,10 +1,19 @@
 from abc import ABC, abstractmethod
+from typing import List, NamedTuple, Optional
 
 from src.department.models import Department
 from src.specialization.models import Specialization
 from src.users.models import UserInDB
 
 
+class SpecializationRecords(NamedTuple):
+    """A specialization with its departments and doctors, everything a roster is built from"""
+
+    specialization: Specialization
+    departments: List[Department]
+    users: List[UserInDB]
+
+
 class BaseDatabase(ABC):
     @abstractmethod
     async def get_client(self):
@@ -59,3 +68,14 @@ class BaseDatabase(ABC):
     @abstractmethod
     async def update_department(self, department: Department):
         pass
+
+    @abstractmethod
+    async def get_specialization_records(
+        self, specialization_ids: Optional[List[str]] = None
+    ) -> List[SpecializationRecords]:
+        """Read the specializations with their departments and doctors in one bulk read.
+
+        Args:
+            specialization_ids (List[str], optional): specializations to read, all of them if missing
+        """
+        pass
@@ -1,7 +1,9 @@
 import json
 import os
+from collections import defaultdict
+from typing import List, Optional
 
-from src.database.base import BaseDatabase
+from src.database.base import BaseDatabase, SpecializationRecords
 from src.department.models import Department
 from src.specialization.models import Specialization
 from src.users.models import UserInDB
@@ -143,3 +145,34 @@ class JsonDatabase(BaseDatabase):
             with open(self._department_collection, "w") as f:
                 json.dump(new_db, f)
         return
+
+    async def get_specialization_records(
+        self, specialization_ids: Optional[List[str]] = None
+    ) -> List[SpecializationRecords]:
+        # The collections are read once by get_client, group them by id in one pass
+        departments = {
+            department["id"]: department for department in self.department_client
+        }
+        users = defaultdict(list)
+        for user in self.user_client:
+            users[user.get("specialization")].append(user)
+
+        records = []
+        for specialization in self.specialization_client:
+            if (
+                specialization_ids is not None
+                and specialization["id"] not in specialization_ids
+            ):
+                continue
+            records.append(
+                SpecializationRecords(
+                    specialization=Specialization(**specialization),
+                    departments=[
+                        Department(**departments[department_id])
+                        for department_id in specialization["departments"]
+                        if department_id in departments
+                    ],
+                    users=[UserInDB(**user) for user in users[specialization["id"]]],
+                )
+            )
+        return records
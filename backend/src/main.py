@@ -8,6 +8,9 @@ from src.auth.router import router as auth_router
 from src.users.router import router as users_router
 from src.specialization.router import router as specialization_router
 from src.department.router import router as departments_router
+from src.optimization.router import router as optimization_router
+from src.optimization.service import OptimizationService
+from src.settings import app_settings
 
 # from azure.monitor.opentelemetry import configure_azure_monitor
 from logging import Logger
@@ -57,7 +60,18 @@ async def lifespan(app: FastAPI):
         logger.debug("Logging setup complete and ready for debugging")
         logger.warning(f"Failed to configure Azure Monitor: {e}")
     app.state.logger = logger
+    app.state.optimization_service = OptimizationService(
+        app_settings.OPTIMIZATION_WORKERS,
+        live_memory_budget=app_settings.OPTIMIZATION_LIVE_MEMORY_MB * 1024**2,
+        live_max_idle=app_settings.OPTIMIZATION_LIVE_MAX_IDLE_SECONDS,
+        cache_size=app_settings.OPTIMIZATION_CACHE_SIZE,
+        cache_dir=app_settings.OPTIMIZATION_CACHE_DIR,
+        job_ttl=app_settings.OPTIMIZATION_JOB_TTL_SECONDS,
+        max_finished_jobs=app_settings.OPTIMIZATION_MAX_FINISHED_JOBS,
+        max_live_edits=app_settings.OPTIMIZATION_MAX_LIVE_EDITS,
+    )
     yield
+    app.state.optimization_service.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -65,6 +79,7 @@ app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(specialization_router)
 app.include_router(departments_router)
+app.include_router(optimization_router)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Your frontend URL
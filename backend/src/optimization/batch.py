@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+from typing import Optional
+
+from src.database.factory import get_session
+from src.optimization.loader import load_roster_instances
+from src.optimization.schemas import BatchReport
+from src.optimization.service import OptimizationService
+from src.settings import app_settings
+
+
+def format_batch_report(report: BatchReport) -> str:
+    """One line per specialization with its status, objective and solver time"""
+    lines = [
+        f"{'specialization':<30} {'status':>10} {'solver':>12} "
+        f"{'objective':>10} {'gap':>8} {'runtime':>9}"
+    ]
+    for job in report.jobs:
+        objective = "-" if job.objective is None else f"{job.objective:.3f}"
+        gap = "-" if job.gap is None else f"{job.gap:.2%}"
+        runtime = "-" if job.runtime is None else f"{job.runtime:.2f}s"
+        lines.append(
+            f"{job.specialization_id:<30} {job.status:>10} "
+            f"{job.solver_status or '-':>12} {objective:>10} {gap:>8} {runtime:>9}"
+        )
+        if job.error:
+            lines.append(f"    {job.error}")
+    elapsed = "-" if report.elapsed is None else f"{report.elapsed:.2f}s"
+    lines.append(
+        f"{len(report.jobs)} specializations of {report.month} in {elapsed}, "
+        f"{report.threads} threads per job"
+    )
+    return "\n".join(lines)
+
+
+async def run_batch(
+    month: str, workers: int, threads: Optional[int] = None, **request_fields
+) -> BatchReport:
+    """Solve every specialization of the month from the database and wait for the last job"""
+    database = await get_session()
+    loaded, skipped = await load_roster_instances(database, month, **request_fields)
+    service = OptimizationService(
+        workers,
+        cache_size=app_settings.OPTIMIZATION_CACHE_SIZE,
+        cache_dir=app_settings.OPTIMIZATION_CACHE_DIR,
+    )
+    try:
+        batch = service.submit_batch(month, loaded, skipped, threads=threads)
+        await service.wait_batch(batch)
+        return service.batch_report(batch)
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Plan a month for every specialization of the database at once"
+    )
+    parser.add_argument("month", help="month to plan in the format YYYY-MM")
+    parser.add_argument("--specializations", nargs="*", default=None)
+    parser.add_argument(
+        "--workers", type=int, default=app_settings.OPTIMIZATION_WORKERS
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="solver threads of each job, the cores divided by the workers if missing",
+    )
+    parser.add_argument("--backend", default="gurobi")
+    parser.add_argument("--time-limit", type=float, default=None)
+    parser.add_argument("--mip-gap", type=float, default=None)
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        run_batch(
+            args.month,
+            args.workers,
+            args.threads,
+            specialization_ids=args.specializations,
+            backend=args.backend,
+            time_limit=args.time_limit,
+            mip_gap=args.mip_gap,
+        )
+    )
+    print(format_batch_report(report))
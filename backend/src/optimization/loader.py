@@ -0,0 +1,62 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.database.base import BaseDatabase, SpecializationRecords
+from src.optimization.schemas import RosterRequest
+from src.optimization.service import RosterInstance, build_roster_instance
+
+
+class LoadedRoster(NamedTuple):
+    """Solver input of a specialization built from the database"""
+
+    request: RosterRequest
+    instance: RosterInstance
+    shift_names: List[str]
+
+
+def build_loaded_roster(
+    request: RosterRequest, records: SpecializationRecords
+) -> LoadedRoster:
+    """Solver input of the records of a specialization
+
+    Raises:
+        ValueError: if a department constraint or calendar rule is invalid, or no doctor belongs to a department
+    """
+    instance = build_roster_instance(
+        request, records.specialization, records.departments, records.users
+    )
+    if not instance.doctors:
+        raise ValueError("No doctors assigned to the specialization departments")
+    return LoadedRoster(request, instance, list(records.specialization.shifts))
+
+
+async def load_roster_instances(
+    database: BaseDatabase,
+    month: str,
+    specialization_ids: Optional[List[str]] = None,
+    **request_fields,
+) -> Tuple[List[LoadedRoster], Dict[str, str]]:
+    """Build the solver input of every specialization from one bulk read of the database
+
+    Args:
+        database (BaseDatabase): database client
+        month (str): month to plan in the format YYYY-MM
+        specialization_ids (List[str], optional): specializations to load, all of them if missing
+        **request_fields: other RosterRequest fields, the same for every specialization
+
+    Returns:
+        Tuple[List[LoadedRoster], Dict[str, str]]: the loaded rosters and specialization id -> why it was skipped
+    """
+    loaded, skipped = [], {}
+    for records in await database.get_specialization_records(specialization_ids):
+        request = RosterRequest(
+            specialization_id=records.specialization.id, month=month, **request_fields
+        )
+        try:
+            loaded.append(build_loaded_roster(request, records))
+        except ValueError as e:
+            skipped[records.specialization.id] = str(e)
+    found = {roster.request.specialization_id for roster in loaded} | set(skipped)
+    for specialization_id in specialization_ids or []:
+        if specialization_id not in found:
+            skipped[specialization_id] = "Specialization not found"
+    return loaded, skipped
@@ -0,0 +1,129 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel, Field
+
+
+class Assignment(BaseModel):
+    user_id: str
+    date: str = Field(..., title="Date", example="2025-03-01")
+    shift: str = Field(..., title="Shift", example="morning")
+
+
+class WarmStartReport(BaseModel):
+    source: str = Field(
+        ...,
+        title="Source",
+        description="Where the prior roster comes from",
+        examples=["previous_solution", "previous_month", "greedy"],
+    )
+    reference_job_id: Optional[str] = None
+    baseline_first_feasible_time: Optional[float] = Field(
+        None,
+        title="Baseline first feasible time",
+        description="Seconds to the first feasible roster of the reference job",
+    )
+    first_feasible_time: Optional[float] = None
+    improvement: Optional[float] = Field(
+        None,
+        title="Improvement",
+        description="Seconds saved to the first feasible roster",
+    )
+
+
+class IncumbentReport(BaseModel):
+    objective: float
+    bound: Optional[float] = Field(
+        None, title="Bound", description="Best proven bound, None before the first one"
+    )
+    gap: Optional[float] = None
+    elapsed: float = Field(
+        ..., title="Elapsed", description="Seconds since the solve started"
+    )
+
+
+class PooledRoster(BaseModel):
+    rank: int = Field(
+        ..., title="Rank", description="Position in the pool, 0 is the best"
+    )
+    objective: float
+    assignment: List[Assignment] = []
+
+
+class OptimizationJob(BaseModel):
+    id: str = Field(
+        default_factory=lambda: str(uuid4()),
+        title="ID",
+        description="Optimization job ID",
+    )
+    specialization_id: str
+    month: str
+    status: str = Field(
+        "pending",
+        title="Status",
+        description="Job status",
+        examples=["pending", "running", "completed", "failed"],
+    )
+    solver_status: Optional[str] = Field(
+        None,
+        title="Solver status",
+        description="Status of the solver",
+        examples=["optimal", "time_limit", "infeasible"],
+    )
+    objective: Optional[float] = None
+    gap: Optional[float] = None
+    runtime: Optional[float] = None
+    first_feasible_time: Optional[float] = None
+    warm_start: Optional[WarmStartReport] = None
+    cached: bool = Field(
+        False,
+        title="Cached",
+        description="The result comes from an earlier solve of the same instance",
+    )
+    incumbents: List[IncumbentReport] = Field(
+        [],
+        title="Incumbents",
+        description="Every improved roster found while solving",
+    )
+    assignment: List[Assignment] = []
+    pool: List[PooledRoster] = Field(
+        [],
+        title="Pool",
+        description="Distinct rosters found by the solve, best first",
+    )
+    conflicts: List[str] = Field(
+        [],
+        title="Conflicts",
+        description="Why the roster is infeasible, from the solver IIS",
+    )
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+class OptimizationBatch(BaseModel):
+    id: str = Field(
+        default_factory=lambda: str(uuid4()),
+        title="ID",
+        description="Optimization batch ID",
+    )
+    month: str
+    status: str = Field(
+        "running",
+        title="Status",
+        description="Batch status, completed once every job ended",
+        examples=["running", "completed"],
+    )
+    threads: int = Field(..., title="Threads", description="Solver threads of each job")
+    job_ids: Dict[str, str] = Field(
+        {},
+        title="Jobs",
+        description="Specialization id -> optimization job ID",
+    )
+    skipped: Dict[str, str] = Field(
+        {},
+        title="Skipped",
+        description="Specialization id -> why it was not solved",
+    )
+    elapsed: Optional[float] = None
+    created_at: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,385 @@
+import io
+from typing import Annotated, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from src.auth.utils import get_current_user
+from src.database.factory import get_session
+from src.database.nosql.json_db import JsonDatabase
+from src.optimization.loader import build_loaded_roster, load_roster_instances
+from src.optimization.models import OptimizationJob, PooledRoster
+from src.optimization.schemas import (
+    BatchReport,
+    BatchRequest,
+    JobStatus,
+    JobSubmitted,
+    RosterEdits,
+    RosterPreview,
+    RosterRepair,
+    RosterRequest,
+    RosterSettings,
+    Unavailability,
+)
+from src.optimization.service import (
+    WEEKDAY_NAME_TO_ID,
+    OptimizationService,
+    RosterInstance,
+    check_capacity,
+    month_day,
+    shift_hours,
+)
+from src.specialization.models import Specialization
+from src.users.models import UserInDB
+
+router = APIRouter(prefix="/optimization", tags=["Optimization"])
+db_client = Annotated[JsonDatabase, Depends(get_session)]
+
+
+def get_optimization_service(request: Request) -> OptimizationService:
+    return request.app.state.optimization_service
+
+
+optimization_service = Annotated[OptimizationService, Depends(get_optimization_service)]
+
+
+def get_user_job(
+    job_id: str, service: OptimizationService, user: UserInDB
+) -> OptimizationJob:
+    job = service.get_job(job_id)
+    # The admins see the jobs of every specialization, e.g. those of a batch
+    if not job or (
+        job.specialization_id != user.specialization and "admin" not in user.roles
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return job
+
+
+async def load_roster_instance(
+    roster_request: RosterRequest, database: JsonDatabase, user: UserInDB
+) -> Tuple[RosterInstance, Specialization]:
+    records = await database.get_specialization_records(
+        [roster_request.specialization_id]
+    )
+    if not records:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    specialization = records[0].specialization
+    if user.id not in specialization.admins:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        loaded = build_loaded_roster(roster_request, records[0])
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return loaded.instance, specialization
+
+
+def check_unavailabilities(
+    items: List[Unavailability],
+    instance: RosterInstance,
+    month: str,
+    shift_names: List[str],
+) -> None:
+    for item in items:
+        try:
+            month_day(item.date, month)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid unavailability {item}: {e}",
+            )
+        if item.user_id not in instance.doctors or item.shift not in shift_names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid unavailability {item}",
+            )
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED, response_model=JobSubmitted)
+async def submit_job(
+    roster_request: RosterRequest,
+    database: db_client,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    instance, specialization = await load_roster_instance(
+        roster_request, database, user
+    )
+    issues = check_capacity(instance)
+    if issues:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "The roster is infeasible", "issues": issues},
+        )
+    job = service.submit(roster_request, instance, list(specialization.shifts))
+    return JobSubmitted(job_id=job.id, status=job.status)
+
+
+@router.post("/batch", status_code=status.HTTP_202_ACCEPTED, response_model=BatchReport)
+async def submit_batch(
+    batch_request: BatchRequest,
+    database: db_client,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    """
+    Plan a month for every specialization (or those listed) at once. Each one
+    is a job of the process pool with a bounded number of solver threads; the
+    specializations that cannot be planned are reported as skipped.
+    """
+    if "admin" not in user.roles:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    loaded, skipped = await load_roster_instances(
+        database,
+        batch_request.month,
+        batch_request.specialization_ids,
+        **batch_request.model_dump(include=set(RosterSettings.model_fields)),
+    )
+    batch = service.submit_batch(
+        batch_request.month, loaded, skipped, threads=batch_request.threads
+    )
+    return service.batch_report(batch)
+
+
+@router.get("/batch/{batch_id}", response_model=BatchReport)
+async def get_batch_report(
+    batch_id: str,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    """
+    Status, objective and solver time of every job of a batch.
+    """
+    if "admin" not in user.roles:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    batch = service.batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return service.batch_report(batch)
+
+
+@router.post("/preview", response_model=RosterPreview)
+async def preview_roster(
+    roster_request: RosterRequest,
+    database: db_client,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    """
+    Roster built by a greedy heuristic in milliseconds to a few seconds, not
+    optimized, to show while the solver runs. Its status is violated, with the
+    broken rules as conflicts, if the heuristic did not find a feasible roster.
+    """
+    instance, specialization = await load_roster_instance(
+        roster_request, database, user
+    )
+    return await service.preview(
+        instance, roster_request.month, list(specialization.shifts)
+    )
+
+
+@router.post("/live", status_code=status.HTTP_202_ACCEPTED, response_model=JobSubmitted)
+async def submit_edits(
+    edits: RosterEdits,
+    database: db_client,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    """
+    Apply edits to the cached model of the specialization month and re-optimize it in place.
+    """
+    instance, specialization = await load_roster_instance(edits, database, user)
+    shift_names = list(specialization.shifts)
+    check_unavailabilities(
+        edits.add_unavailabilities + edits.remove_unavailabilities,
+        instance,
+        edits.month,
+        shift_names,
+    )
+    for item in edits.add_forbidden_slots + edits.remove_forbidden_slots:
+        if item.day.lower() not in WEEKDAY_NAME_TO_ID or item.shift not in shift_names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid forbidden slot {item}",
+            )
+    for item in edits.doctor_max_shifts:
+        if item.user_id not in instance.doctors:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown doctor {item.user_id}",
+            )
+
+    job = service.submit_edits(edits, instance, shift_names)
+    return JobSubmitted(job_id=job.id, status=job.status)
+
+
+@router.post(
+    "/jobs/{job_id}/repair",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=JobSubmitted,
+)
+async def repair_job(
+    job_id: str,
+    repair: RosterRepair,
+    database: db_client,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    """
+    Adjust the roster of a completed job to new unavailabilities (e.g. a sick
+    call) with the fewest changes. A local search moves and swaps shifts, the
+    solver only runs if it fails. The repaired roster is a new job.
+    """
+    job = get_user_job(job_id, service, user)
+    if job.status != "completed" or job.id not in service.rosters:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Job has no roster"
+        )
+    if repair.specialization_id != job.specialization_id or repair.month != job.month:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The repair must target the specialization and month of the job",
+        )
+    instance, specialization = await load_roster_instance(repair, database, user)
+    shift_names = list(specialization.shifts)
+    check_unavailabilities(repair.unavailabilities, instance, repair.month, shift_names)
+
+    repaired = service.submit_repair(job, repair, instance, shift_names)
+    return JobSubmitted(job_id=repaired.id, status=repaired.status)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job_status(
+    job_id: str,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    job = get_user_job(job_id, service, user)
+    return JobStatus(**job.model_dump())
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    """
+    Server-Sent Events of a job: an "incumbent" event with the objective, bound,
+    gap and elapsed seconds of every improved roster, then a "done" event with
+    the job status once the solve ends.
+    """
+    job = get_user_job(job_id, service, user)
+
+    async def events():
+        async for event, payload in service.stream(job):
+            if event == "done":
+                payload = JobStatus(**payload.model_dump())
+            yield f"event: {event}\ndata: {payload.model_dump_json()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.post(
+    "/jobs/{job_id}/stop",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=JobStatus,
+)
+async def stop_job(
+    job_id: str,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    """
+    Accept the best roster found so far: the solver stops and the job completes
+    with solver status "interrupted".
+    """
+    job = get_user_job(job_id, service, user)
+    if not service.stop(job.id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}"
+        )
+    return JobStatus(**job.model_dump())
+
+
+@router.get("/jobs/{job_id}/result", response_model=OptimizationJob)
+async def get_job_result(
+    job_id: str,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    job = get_user_job(job_id, service, user)
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}"
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}/pool/{rank}", response_model=PooledRoster)
+async def get_pooled_roster(
+    job_id: str,
+    rank: int,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+):
+    """
+    Roster of the solution pool of a completed job, 0 is the best one.
+    """
+    job = get_user_job(job_id, service, user)
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}"
+        )
+    if not 0 <= rank < len(job.pool):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return job.pool[rank]
+
+
+ROSTER_MEDIA_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv",
+    "ics": "text/calendar",
+}
+
+
+@router.get("/jobs/{job_id}/roster.{export_format}")
+async def export_job_roster(
+    job_id: str,
+    export_format: str,
+    database: db_client,
+    service: optimization_service,
+    user: Annotated[UserInDB, Depends(get_current_user)],
+    doctor: Optional[str] = None,
+):
+    """
+    Roster of a completed job as columnar JSON, CSV or iCalendar (ics).
+    The ics events start and end at the hours of the specialization shifts,
+    the export can be restricted to one doctor.
+    """
+    if export_format not in ROSTER_MEDIA_TYPES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    job = get_user_job(job_id, service, user)
+    roster = service.rosters.get(job.id)
+    if job.status != "completed" or roster is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Job has no roster"
+        )
+    if doctor is not None and doctor not in roster.doctor_names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown doctor {doctor}"
+        )
+
+    if export_format == "json":
+        content = roster.to_json()
+    elif export_format == "csv":
+        buffer = io.StringIO()
+        roster.to_csv(buffer)
+        content = buffer.getvalue()
+    else:
+        specialization = await database.get_specialization(job.specialization_id)
+        hours = None
+        if specialization is not None and roster.shift_names is not None:
+            hours = shift_hours(specialization.shifts, roster.shift_names)
+        content = roster.to_ical(shift_hours=hours, doctor=doctor)
+    return Response(content=content, media_type=ROSTER_MEDIA_TYPES[export_format])
@@ -0,0 +1,276 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from src.optimization.models import Assignment, IncumbentReport, WarmStartReport
+
+
+class ShiftRule(BaseModel):
+    department_id: Optional[str] = Field(
+        None,
+        title="Department",
+        description="Department the rule applies to, every department if missing",
+    )
+    shifts: Optional[List[str]] = Field(
+        None, title="Shifts", description="Shifts matched, all if missing"
+    )
+    days: Optional[List[str]] = Field(
+        None,
+        title="Days",
+        description="Days of the week matched, 'holiday' matches the public holidays",
+        examples=[["sunday", "holiday"]],
+    )
+    dates: Optional[List[str]] = Field(
+        None,
+        title="Dates",
+        description="Dates of the month matched",
+        examples=[["2025-03-08"]],
+    )
+    forbidden: bool = Field(
+        False,
+        title="Forbidden",
+        description="Nobody of the department can work the matched shifts",
+    )
+    min_doctors: Optional[int] = Field(
+        None,
+        ge=0,
+        title="Min doctors",
+        description="Minimum number of doctors on the matched shifts, instead of min_doctors_per_shift, only in rules without department",
+    )
+    max_doctors: Optional[int] = Field(
+        None,
+        ge=0,
+        title="Max doctors",
+        description="Maximum number of doctors on the matched shifts, instead of max_doctors_per_shift, only in rules without department",
+    )
+
+
+class RosterSettings(BaseModel):
+    consecutive_limit: int = Field(
+        10,
+        ge=0,
+        title="Consecutive limit",
+        description="Number of shifts after a worked one that must be free",
+    )
+    relaxation: int = Field(
+        3,
+        ge=0,
+        title="Relaxation",
+        description="Extra shifts allowed above the fair share of each doctor",
+    )
+    max_shifts: int = Field(
+        6,
+        ge=1,
+        title="Max shifts",
+        description="Maximum number of shifts of each doctor",
+    )
+    min_doctors_per_shift: int = Field(1, ge=0)
+    max_doctors_per_shift: int = Field(1, ge=1)
+    calendar_rules: List[ShiftRule] = Field(
+        [],
+        title="Calendar rules",
+        description="Date specific forbidden shifts and coverage, on top of the department constraints",
+    )
+    symmetry_breaking: bool = Field(
+        False,
+        title="Symmetry breaking",
+        description="Order the workloads of interchangeable doctors of the same department",
+    )
+    time_limit: Optional[float] = Field(
+        None,
+        gt=0,
+        title="Time limit",
+        description="Solver time limit in seconds",
+        example=60,
+    )
+    mip_gap: Optional[float] = Field(
+        None,
+        ge=0,
+        title="MIP gap",
+        description="Relative gap at which the solver stops with a good enough roster",
+        example=0.05,
+    )
+    backend: str = Field(
+        "gurobi",
+        title="Backend",
+        description="Solver backend, gurobi_lazy adds the consecutive windows lazily",
+        pattern=r"^(gurobi|gurobi_lazy|highs|cpsat|decomposition)$",
+        examples=["gurobi", "highs", "cpsat", "decomposition"],
+    )
+    pool_size: int = Field(
+        1,
+        ge=1,
+        le=50,
+        title="Pool size",
+        description="Number of distinct rosters returned by the same solve (gurobi backend only)",
+    )
+    pool_min_distance: int = Field(
+        1,
+        ge=1,
+        title="Pool minimum distance",
+        description="Minimum number of shifts that differ between two rosters of the pool",
+    )
+    pool_gap: Optional[float] = Field(
+        None,
+        ge=0,
+        title="Pool gap",
+        description="Relative objective gap to the best roster allowed in the pool, 0 keeps only equally fair rosters",
+    )
+    warm_start: Optional[str] = Field(
+        None,
+        title="Warm start",
+        description="Prior roster fed to the solver as MIP start, greedy builds one with a constructive heuristic",
+        pattern=r"^(previous_solution|previous_month|greedy)$",
+        examples=["previous_solution", "previous_month", "greedy"],
+    )
+
+
+class RosterRequest(RosterSettings):
+    specialization_id: str = Field(
+        ...,
+        title="Specialization",
+        description="Specialization id",
+        example="ID_ginecology",
+    )
+    month: str = Field(
+        ...,
+        title="Month",
+        description="Month to plan in the format YYYY-MM",
+        pattern=r"^\d{4}-(0[1-9]|1[0-2])$",
+        example="2025-03",
+    )
+
+
+class BatchRequest(RosterSettings):
+    month: str = Field(
+        ...,
+        title="Month",
+        description="Month to plan in the format YYYY-MM",
+        pattern=r"^\d{4}-(0[1-9]|1[0-2])$",
+        example="2025-03",
+    )
+    specialization_ids: Optional[List[str]] = Field(
+        None,
+        title="Specializations",
+        description="Specializations to plan, all of them if missing",
+    )
+    threads: Optional[int] = Field(
+        None,
+        ge=1,
+        title="Threads",
+        description="Solver threads of each job, the cores shared among the solver processes if missing",
+    )
+
+
+class Unavailability(BaseModel):
+    user_id: str
+    date: str = Field(
+        ...,
+        title="Date",
+        description="Date of the month in the format YYYY-MM-DD",
+        example="2025-03-01",
+    )
+    shift: str = Field(..., title="Shift", example="morning")
+
+
+class ForbiddenSlot(BaseModel):
+    department_id: str
+    day: str = Field(..., title="Day", example="monday")
+    shift: str = Field(..., title="Shift", example="night")
+
+
+class DoctorCap(BaseModel):
+    user_id: str
+    max_shifts: int
+
+
+class RosterEdits(RosterRequest):
+    add_unavailabilities: List[Unavailability] = []
+    remove_unavailabilities: List[Unavailability] = []
+    add_forbidden_slots: List[ForbiddenSlot] = []
+    remove_forbidden_slots: List[ForbiddenSlot] = []
+    doctor_max_shifts: List[DoctorCap] = Field(
+        [],
+        title="Max shifts",
+        description="Per doctor caps replacing max_shifts",
+    )
+
+
+class RosterRepair(RosterRequest):
+    unavailabilities: List[Unavailability] = Field(
+        ...,
+        title="Unavailabilities",
+        description="Shifts the doctors cannot work anymore, e.g. after a sick call",
+    )
+    search_time_limit: float = Field(
+        5,
+        gt=0,
+        title="Search time limit",
+        description="Seconds of local search before falling back to the solver (time_limit)",
+    )
+
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: str
+
+
+class RosterPreview(BaseModel):
+    status: str = Field(
+        ...,
+        title="Status",
+        description="feasible, or violated if some rules do not hold",
+    )
+    objective: float
+    runtime: float
+    conflicts: List[str] = Field(
+        [], title="Conflicts", description="Rules the roster violates"
+    )
+    assignment: List[Assignment] = []
+
+
+class JobStatus(BaseModel):
+    id: str
+    status: str
+    solver_status: Optional[str] = None
+    objective: Optional[float] = None
+    gap: Optional[float] = None
+    runtime: Optional[float] = None
+    first_feasible_time: Optional[float] = None
+    warm_start: Optional[WarmStartReport] = None
+    cached: bool = False
+    incumbents: List[IncumbentReport] = []
+    conflicts: List[str] = []
+    error: Optional[str] = None
+
+
+class BatchJobSummary(BaseModel):
+    specialization_id: str
+    job_id: Optional[str] = None
+    status: str = Field(
+        ...,
+        title="Status",
+        description="Job status, skipped if the specialization could not be planned, expired if the job was dropped",
+        examples=["pending", "running", "completed", "failed", "skipped", "expired"],
+    )
+    solver_status: Optional[str] = None
+    objective: Optional[float] = None
+    gap: Optional[float] = None
+    runtime: Optional[float] = None
+    cached: bool = False
+    error: Optional[str] = Field(
+        None,
+        title="Error",
+        description="Why the job failed or the specialization was skipped",
+    )
+
+
+class BatchReport(BaseModel):
+    id: str
+    month: str
+    status: str
+    threads: int = Field(..., title="Threads", description="Solver threads of each job")
+    elapsed: Optional[float] = Field(
+        None,
+        title="Elapsed",
+        description="Seconds from the submission to the end of the last job",
+    )
+    jobs: List[BatchJobSummary] = []
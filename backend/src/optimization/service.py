@@ -0,0 +1,920 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import replace
+from datetime import date, datetime
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+from src.department.models import Department
+from src.optimization.models import (
+    Assignment,
+    IncumbentReport,
+    OptimizationBatch,
+    OptimizationJob,
+    PooledRoster,
+    WarmStartReport,
+)
+from src.optimization.schemas import (
+    BatchJobSummary,
+    BatchReport,
+    RosterEdits,
+    RosterPreview,
+    RosterRepair,
+    RosterRequest,
+    ShiftRule,
+)
+from src.specialization.models import Specialization
+from src.specialization.schemas import Shift
+from src.users.models import UserInDB
+
+# The optimizer lives in the top level gurobipy folder as plain modules
+sys.path.append(
+    os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..", "..", "gurobipy")
+    )
+)
+
+from backends import solve_with_backend  # noqa: E402
+from calendar_rules import HOLIDAY  # noqa: E402
+from departments_data import ID_TO_WEEKDAY_NAME  # noqa: E402
+from feasibility import check_capacity  # noqa: E402
+from greedy import construct_roster, solve_with_greedy_start  # noqa: E402
+from gurobipy import Env  # noqa: E402
+from instance import CalendarRule, RosterInstance  # noqa: E402
+from live_model import LiveEdits, LiveRosterModel, ModelCache  # noqa: E402
+from repair import repair_roster  # noqa: E402
+from roster import Roster, default_shift_hours  # noqa: E402
+from solve_cache import SolveCache, instance_key  # noqa: E402
+from solve_result import RosterResult, SolveMonitor  # noqa: E402
+from warm_start import shift_assignment_by_weekday  # noqa: E402
+
+logger = logging.getLogger("custom_logger")
+# Seconds between two reads of the incumbent queues of the running jobs
+INCUMBENT_POLL_INTERVAL = 0.1
+WEEKDAY_NAME_TO_ID = {name.lower(): idx for idx, name in ID_TO_WEEKDAY_NAME.items()}
+# Department constraints and calendar rules on "holiday" match the public holidays
+WEEKDAY_NAME_TO_ID["holiday"] = HOLIDAY
+
+
+def month_day(value: str, month: str) -> int:
+    """Day index in the month of a 'YYYY-MM-DD' date
+
+    Raises:
+        ValueError: if the date is malformed or not in the month
+    """
+    try:
+        parsed = datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        parsed = None
+    # strptime also takes unpadded days like 2025-03-8
+    if parsed is None or parsed.isoformat() != value:
+        raise ValueError(f"Invalid date {value}")
+    if not value.startswith(f"{month}-"):
+        raise ValueError(f"Date {value} not in {month}")
+    return parsed.day - 1
+
+
+def shift_hours(
+    shifts: Dict[str, Shift], shift_names: List[str]
+) -> Dict[int, Tuple[float, float]]:
+    """Shift index -> (start hour, duration in hours) of the specialization shifts, for the iCal export
+
+    A shift ending at or before its start ends the next day. The shifts missing
+    from the specialization, or with a time not in the format H:MM, keep
+    default_shift_hours.
+    """
+    hours = default_shift_hours(len(shift_names))
+    for idx, name in enumerate(shift_names):
+        if name not in shifts:
+            continue
+        try:
+            start, end = (
+                datetime.strptime(value, "%H:%M")
+                for value in (shifts[name].start, shifts[name].end)
+            )
+        except ValueError:
+            continue
+        start_hour = start.hour + start.minute / 60
+        end_hour = end.hour + end.minute / 60
+        hours[idx] = (start_hour, (end_hour - start_hour) % 24 or 24)
+    return hours
+
+
+def build_calendar_rule(
+    rule: ShiftRule, month: str, shift_ids: Dict[str, int], department_ids: List[str]
+) -> CalendarRule:
+    """Translate a calendar rule of the request into day and shift indices of the month
+
+    Raises:
+        ValueError: if the rule refers to an unknown department, day or shift or to a date of another month, or sets the coverage of a single department
+    """
+    if rule.department_id is not None and rule.department_id not in department_ids:
+        raise ValueError(f"Unknown department {rule.department_id} in calendar rule")
+    if rule.department_id is not None and (
+        rule.min_doctors is not None or rule.max_doctors is not None
+    ):
+        raise ValueError("Coverage rules apply to every department")
+    for shift in rule.shifts or []:
+        if shift not in shift_ids:
+            raise ValueError(f"Unknown shift {shift} in calendar rule")
+    for day in rule.days or []:
+        if day.lower() not in WEEKDAY_NAME_TO_ID:
+            raise ValueError(f"Unknown day {day} in calendar rule")
+    days = [month_day(rule_date, month) for rule_date in rule.dates or []]
+    return CalendarRule(
+        department=rule.department_id,
+        shifts=(
+            [shift_ids[shift] for shift in rule.shifts]
+            if rule.shifts is not None
+            else None
+        ),
+        days_of_week=(
+            [WEEKDAY_NAME_TO_ID[day.lower()] for day in rule.days]
+            if rule.days is not None
+            else None
+        ),
+        days=days if rule.dates is not None else None,
+        forbidden=rule.forbidden,
+        min_doctors=rule.min_doctors,
+        max_doctors=rule.max_doctors,
+    )
+
+
+def build_roster_instance(
+    request: RosterRequest,
+    specialization: Specialization,
+    departments: List[Department],
+    users: List[UserInDB],
+) -> RosterInstance:
+    """Translate the database records of a specialization into the solver input
+
+    Args:
+        request (RosterRequest): roster request with the month and the solver limits
+        specialization (Specialization): specialization to plan
+        departments (List[Department]): departments of the specialization
+        users (List[UserInDB]): doctors of the specialization
+
+    Raises:
+        ValueError: if a department constraint or a calendar rule refers to an unknown day or shift
+    """
+    shift_ids = {shift: idx for idx, shift in enumerate(specialization.shifts)}
+    departments_constraint = {}
+    low_working_departments, high_working_departments = [], []
+    for department in departments:
+        forbidden = []
+        for day, shift in department.constraints:
+            if day.lower() not in WEEKDAY_NAME_TO_ID:
+                raise ValueError(f"Unknown day {day} in department {department.name}")
+            if shift not in shift_ids:
+                raise ValueError(
+                    f"Unknown shift {shift} in department {department.name}"
+                )
+            forbidden.append((WEEKDAY_NAME_TO_ID[day.lower()], shift_ids[shift]))
+        departments_constraint[department.id] = forbidden
+        if (
+            department.type == "low"
+            or department.id in specialization.low_workload_departments
+        ):
+            low_working_departments.append(department.id)
+        elif department.type == "high":
+            high_working_departments.append(department.id)
+
+    doctors = {
+        user.id: user.department
+        for user in users
+        if user.department in departments_constraint
+    }
+    return RosterInstance.from_month(
+        f"{request.month}-01",
+        doctors,
+        departments_constraint=departments_constraint,
+        low_working_departments=low_working_departments,
+        high_working_departments=high_working_departments,
+        num_shifts=len(shift_ids),
+        consecutive_limit=request.consecutive_limit,
+        relaxation=request.relaxation,
+        max_shifts=request.max_shifts,
+        min_doctors_per_shift=request.min_doctors_per_shift,
+        max_doctors_per_shift=request.max_doctors_per_shift,
+        symmetry_breaking=request.symmetry_breaking,
+        calendar_rules=[
+            build_calendar_rule(
+                rule, request.month, shift_ids, list(departments_constraint)
+            )
+            for rule in request.calendar_rules
+        ],
+    )
+
+
+def previous_month(month: str) -> str:
+    """'2025-01' -> '2024-12'"""
+    year, month_number = map(int, month.split("-"))
+    if month_number == 1:
+        return f"{year - 1}-12"
+    return f"{year}-{month_number - 1:02d}"
+
+
+class OptimizationService:
+    """Runs the roster solves in a process pool so the event loop never blocks on a MILP"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        live_memory_budget: int = 512 * 1024**2,
+        live_max_idle: Optional[float] = None,
+        cache_size: int = 256,
+        cache_dir: Optional[str] = None,
+        preview_workers: int = 1,
+        job_ttl: Optional[float] = None,
+        max_finished_jobs: Optional[int] = None,
+        max_live_edits: int = 256,
+    ) -> None:
+        """
+        Args:
+            max_workers (int, optional): processes of the solver pool, the cores if missing
+            live_memory_budget (int): bytes of the live models kept in memory
+            live_max_idle (float, optional): seconds a live model is kept without edits
+            cache_size (int): results of the solve cache
+            cache_dir (str, optional): directory the solve cache persists to
+            preview_workers (int): processes of the preview pool
+            job_ttl (float, optional): seconds a finished job or batch is kept, forever if missing
+            max_finished_jobs (int, optional): finished jobs and batches kept, the oldest are dropped first
+            max_live_edits (int): rosters whose live edits are kept, the least recently edited are dropped with their model
+        """
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # The previews take a second at most, they must not queue behind the solves
+        self._preview_pool = ProcessPoolExecutor(
+            max_workers=preview_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # Live models are not picklable, they stay in this process and a single
+        # thread applies the edits (Gurobi releases the GIL while optimizing)
+        self._live_executor = ThreadPoolExecutor(max_workers=1)
+        self._live_models = ModelCache(live_memory_budget, live_max_idle)
+        self._live_env: Optional[Env] = None
+        # The edits outlive the models, an evicted or outdated model is rebuilt with them
+        self._live_edits: "OrderedDict[Tuple[str, str], LiveEdits]" = OrderedDict()
+        self._max_live_edits = max_live_edits
+        # Optimal and infeasible results of past solves, by canonical instance hash
+        self._cache = SolveCache(cache_size, cache_dir)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.jobs: Dict[str, OptimizationJob] = {}
+        # Roster of every completed job, for the exports
+        self.rosters: Dict[str, Roster] = {}
+        self.batches: Dict[str, OptimizationBatch] = {}
+        # Finished job and batch ids by end time, oldest first, to expire them
+        self._job_ttl = job_ttl
+        self._max_finished_jobs = max_finished_jobs
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._batch_tasks: Dict[str, asyncio.Task] = {}
+        # Incumbents and stop requests cross the process pool through a manager
+        self._manager = None
+        # Incumbent queue and solve future of every running job, drained by a
+        # single poller on its own thread (a manager queue read is a blocking IPC call)
+        self._incumbent_queues: Dict[str, Tuple[OptimizationJob, Any, Future]] = {}
+        self._incumbent_executor = ThreadPoolExecutor(max_workers=1)
+        self._incumbent_poller: Optional[asyncio.Task] = None
+        self._stop_events: Dict[str, Any] = {}
+        self._updates: Dict[str, asyncio.Condition] = {}
+
+    def _monitor(self, job: OptimizationJob, shared: bool) -> Tuple[SolveMonitor, Any]:
+        """Monitor of the solve of a job and the queue its incumbents are put in
+
+        Args:
+            job (OptimizationJob): job being solved
+            shared (bool): the solve runs in another process, use manager proxies
+        """
+        if shared:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            incumbents, stop = self._manager.Queue(), self._manager.Event()
+        else:
+            incumbents, stop = queue.Queue(), threading.Event()
+        self._stop_events[job.id] = stop
+        self._updates[job.id] = asyncio.Condition()
+        return (
+            SolveMonitor(on_incumbent=incumbents.put, should_stop=stop.is_set),
+            incumbents,
+        )
+
+    def submit(
+        self,
+        request: RosterRequest,
+        instance: RosterInstance,
+        shift_names: List[str],
+        threads: Optional[int] = None,
+    ) -> OptimizationJob:
+        """Register a job and schedule its solve, returns immediately
+
+        Args:
+            request (RosterRequest): roster request
+            instance (RosterInstance): solver input built from the database
+            shift_names (List[str]): name of each shift index
+            threads (int, optional): solver threads, threads_per_job if missing
+        """
+        job = OptimizationJob(
+            specialization_id=request.specialization_id, month=request.month
+        )
+        warm_start = None
+        if request.warm_start == "greedy":
+            # Built in the worker process, right before the solve
+            job.warm_start = WarmStartReport(source=request.warm_start)
+        elif request.warm_start:
+            warm_start, job.warm_start = self._prior_assignment(
+                request, instance, shift_names
+            )
+        self._register(job)
+        cache_key = instance_key(
+            instance,
+            mip_gap=request.mip_gap,
+            pool_size=request.pool_size,
+            pool_min_distance=request.pool_min_distance,
+            pool_gap=request.pool_gap,
+        )
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            job.cached = True
+            self._complete(job, cached, shift_names)
+            logger.debug(f"Optimization job {job.id} served from the cache")
+            return job
+
+        monitor, incumbents = self._monitor(job, shared=True)
+        if threads is None:
+            # The other processes of the pool may be solving too
+            threads = self.threads_per_job
+        options = dict(
+            # The router already rejected the instances failing the pre-check
+            precheck=False,
+            time_limit=request.time_limit,
+            mip_gap=request.mip_gap,
+            threads=threads,
+            pool_size=request.pool_size,
+            pool_min_distance=request.pool_min_distance,
+            pool_gap=request.pool_gap,
+            monitor=monitor,
+        )
+        if request.warm_start == "greedy":
+            solve = partial(
+                solve_with_greedy_start, request.backend, instance, **options
+            )
+        else:
+            solve = partial(
+                solve_with_backend,
+                request.backend,
+                instance,
+                warm_start=warm_start,
+                **options,
+            )
+        self._tasks[job.id] = asyncio.create_task(
+            self._run(job, self._pool, solve, shift_names, incumbents, cache_key)
+        )
+        return job
+
+    @property
+    def threads_per_job(self) -> int:
+        """Solver threads of every job, the cores shared among the processes of the pool"""
+        return max((os.cpu_count() or 1) // self._max_workers, 1)
+
+    def submit_batch(
+        self,
+        month: str,
+        loaded: List[Tuple[RosterRequest, RosterInstance, List[str]]],
+        skipped: Optional[Dict[str, str]] = None,
+        threads: Optional[int] = None,
+    ) -> OptimizationBatch:
+        """Submit a job per specialization of the month, returns immediately
+
+        The jobs share the process pool, so at most max_workers of them solve at
+        once and the others wait for a free process. Each solve gets threads
+        threads, by default the cores divided by the processes, so the busy pool
+        never runs more solver threads than there are cores.
+
+        Args:
+            month (str): month to plan in the format YYYY-MM
+            loaded (List[Tuple[RosterRequest, RosterInstance, List[str]]]): request, solver input and shift names of each specialization (loader.LoadedRoster)
+            skipped (Dict[str, str], optional): specialization id -> why it could not be loaded
+            threads (int, optional): solver threads of each job
+        """
+        self._expire()
+        batch = OptimizationBatch(
+            month=month,
+            threads=threads or self.threads_per_job,
+            skipped=dict(skipped or {}),
+        )
+        tasks = []
+        for request, instance, shift_names in loaded:
+            issues = check_capacity(instance)
+            if issues:
+                batch.skipped[request.specialization_id] = "; ".join(issues)
+                continue
+            job = self.submit(request, instance, shift_names, threads=batch.threads)
+            batch.job_ids[request.specialization_id] = job.id
+            if job.id in self._tasks:
+                tasks.append(self._tasks[job.id])
+        self.batches[batch.id] = batch
+        self._batch_tasks[batch.id] = asyncio.create_task(
+            self._watch_batch(batch, tasks)
+        )
+        logger.debug(
+            f"Optimization batch {batch.id}: {len(batch.job_ids)} jobs, "
+            f"{len(batch.skipped)} skipped, {batch.threads} threads per job"
+        )
+        return batch
+
+    async def _watch_batch(
+        self, batch: OptimizationBatch, tasks: List[asyncio.Task]
+    ) -> None:
+        # The jobs record their own failures, only the end of the last one matters
+        await asyncio.gather(*tasks, return_exceptions=True)
+        batch.elapsed = (datetime.now() - batch.created_at).total_seconds()
+        batch.status = "completed"
+        self._finish(batch.id)
+        self._batch_tasks.pop(batch.id, None)
+        logger.debug(f"Optimization batch {batch.id} completed in {batch.elapsed}s")
+
+    async def wait_batch(self, batch: OptimizationBatch) -> None:
+        """Return once every job of the batch ended"""
+        task = self._batch_tasks.get(batch.id)
+        if task is not None:
+            await task
+
+    def batch_report(self, batch: OptimizationBatch) -> BatchReport:
+        """Status, objective and solver time of every job of the batch, skipped specializations included"""
+        summaries = []
+        for specialization_id, job_id in batch.job_ids.items():
+            job = self.jobs.get(job_id)
+            if job is None:
+                summaries.append(
+                    BatchJobSummary(
+                        specialization_id=specialization_id,
+                        job_id=job_id,
+                        status="expired",
+                    )
+                )
+                continue
+            summaries.append(
+                BatchJobSummary(
+                    specialization_id=specialization_id,
+                    job_id=job.id,
+                    status=job.status,
+                    solver_status=job.solver_status,
+                    objective=job.objective,
+                    gap=job.gap,
+                    runtime=job.runtime,
+                    cached=job.cached,
+                    error=job.error,
+                )
+            )
+        summaries.extend(
+            BatchJobSummary(
+                specialization_id=specialization_id, status="skipped", error=reason
+            )
+            for specialization_id, reason in batch.skipped.items()
+        )
+        return BatchReport(
+            id=batch.id,
+            month=batch.month,
+            status=batch.status,
+            threads=batch.threads,
+            elapsed=batch.elapsed,
+            jobs=summaries,
+        )
+
+    async def preview(
+        self, instance: RosterInstance, month: str, shift_names: List[str]
+    ) -> RosterPreview:
+        """Roster of the constructive heuristic, computed in the preview pool without a job"""
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self._preview_pool, construct_roster, instance
+        )
+        roster = self._dated(result.roster, month, shift_names)
+        return RosterPreview(
+            status=result.status,
+            objective=result.objective,
+            runtime=result.runtime,
+            conflicts=result.conflicts,
+            assignment=self._assignments(roster),
+        )
+
+    def _register(self, job: OptimizationJob) -> None:
+        self._expire()
+        self.jobs[job.id] = job
+
+    def _finish(self, item_id: str) -> None:
+        """Start the time to live of a job or batch that ended"""
+        self._finished[item_id] = time.monotonic()
+        self._finished.move_to_end(item_id)
+        self._expire()
+
+    def _expire(self) -> None:
+        """Drop the finished jobs (with their rosters) and batches past their time to live or the size bound"""
+        now = time.monotonic()
+        while self._finished:
+            item_id, finished_at = next(iter(self._finished.items()))
+            expired = self._job_ttl is not None and now - finished_at > self._job_ttl
+            too_many = (
+                self._max_finished_jobs is not None
+                and len(self._finished) > self._max_finished_jobs
+            )
+            if not expired and not too_many:
+                return
+            del self._finished[item_id]
+            self.jobs.pop(item_id, None)
+            self.rosters.pop(item_id, None)
+            self.batches.pop(item_id, None)
+
+    def get_job(self, job_id: str) -> Optional[OptimizationJob]:
+        return self.jobs.get(job_id)
+
+    def stop(self, job_id: str) -> bool:
+        """Ask a running solve to end with its best roster, False if it is not running"""
+        stop = self._stop_events.get(job_id)
+        if stop is None:
+            return False
+        stop.set()
+        return True
+
+    async def stream(
+        self, job: OptimizationJob
+    ) -> AsyncIterator[Tuple[str, Union[OptimizationJob, IncumbentReport]]]:
+        """Yield ("incumbent", report) for every incumbent, past and future, then ("done", job)"""
+        sent = 0
+        while True:
+            for incumbent in job.incumbents[sent:]:
+                yield "incumbent", incumbent
+            sent = len(job.incumbents)
+            condition = self._updates.get(job.id)
+            if condition is None or job.status in ("completed", "failed"):
+                yield "done", job
+                return
+            async with condition:
+                await condition.wait_for(
+                    lambda: len(job.incumbents) > sent
+                    or job.status in ("completed", "failed")
+                )
+
+    async def _notify(self, job: OptimizationJob) -> None:
+        condition = self._updates.get(job.id)
+        if condition is not None:
+            async with condition:
+                condition.notify_all()
+
+    @staticmethod
+    def _drain(queues: List[Any]) -> List[List[Any]]:
+        """Every incumbent waiting in each queue, runs on the incumbent thread"""
+        drained = []
+        for incumbent_queue in queues:
+            items = []
+            try:
+                while True:
+                    items.append(incumbent_queue.get_nowait())
+            except queue.Empty:
+                pass
+            drained.append(items)
+        return drained
+
+    async def _collect_incumbents(
+        self, jobs: List[Tuple[OptimizationJob, Any]]
+    ) -> None:
+        """Move the incumbents put by the solvers of the jobs into the jobs"""
+        loop = asyncio.get_running_loop()
+        drained = await loop.run_in_executor(
+            self._incumbent_executor,
+            self._drain,
+            [incumbent_queue for _, incumbent_queue in jobs],
+        )
+        for (job, _), items in zip(jobs, drained):
+            job.incumbents.extend(
+                IncumbentReport(
+                    objective=incumbent.objective,
+                    bound=incumbent.bound,
+                    gap=incumbent.gap,
+                    elapsed=incumbent.elapsed,
+                )
+                for incumbent in items
+            )
+            if items:
+                await self._notify(job)
+
+    async def _poll_incumbents(self) -> None:
+        """Collect the incumbents of the running jobs, one read of all the queues per tick
+
+        The queues of the jobs still waiting for a pool process are skipped, the
+        poller stops once no job is left.
+        """
+        while self._incumbent_queues:
+            running = [
+                (job, incumbents)
+                for job, incumbents, future in list(self._incumbent_queues.values())
+                if future.running()
+            ]
+            if running:
+                await self._collect_incumbents(running)
+            await asyncio.sleep(INCUMBENT_POLL_INTERVAL)
+        self._incumbent_poller = None
+
+    def latest_completed_job(
+        self, specialization_id: str, month: str
+    ) -> Optional[OptimizationJob]:
+        for job in reversed(self.jobs.values()):
+            if (
+                job.specialization_id == specialization_id
+                and job.month == month
+                and job.status == "completed"
+                and job.assignment
+            ):
+                return job
+        return None
+
+    def _prior_assignment(
+        self,
+        request: RosterRequest,
+        instance: RosterInstance,
+        shift_names: List[str],
+    ) -> Tuple[Optional[List[Tuple[str, int, int]]], Optional[WarmStartReport]]:
+        """Last roster of the same month, or of the previous month shifted by weekday"""
+        month = request.month
+        if request.warm_start == "previous_month":
+            month = previous_month(request.month)
+        reference = self.latest_completed_job(request.specialization_id, month)
+        if not reference:
+            return None, None
+
+        assignment = [
+            (item.user_id, int(item.date[-2:]) - 1, shift_names.index(item.shift))
+            for item in reference.assignment
+            if item.shift in shift_names
+        ]
+        if request.warm_start == "previous_month":
+            previous_day_of_week = RosterInstance.from_month(
+                f"{month}-01", {}
+            ).day_of_week
+            assignment = shift_assignment_by_weekday(
+                assignment, previous_day_of_week, instance.day_of_week
+            )
+        report = WarmStartReport(
+            source=request.warm_start,
+            reference_job_id=reference.id,
+            baseline_first_feasible_time=reference.first_feasible_time,
+        )
+        return assignment, report
+
+    def submit_edits(
+        self,
+        edits: RosterEdits,
+        instance: RosterInstance,
+        shift_names: List[str],
+    ) -> OptimizationJob:
+        """Apply edits to the live model of (specialization, month) and re-optimize in place
+
+        Args:
+            edits (RosterEdits): roster request with the edits to apply
+            instance (RosterInstance): solver input built from the database, used to (re)build the live model
+            shift_names (List[str]): name of each shift index
+        """
+        job = OptimizationJob(
+            specialization_id=edits.specialization_id, month=edits.month
+        )
+        self._register(job)
+        monitor, incumbents = self._monitor(job, shared=False)
+        solve = partial(self._solve_live, edits, instance, shift_names, monitor)
+        self._tasks[job.id] = asyncio.create_task(
+            self._run(job, self._live_executor, solve, shift_names, incumbents)
+        )
+        return job
+
+    def submit_repair(
+        self,
+        base_job: OptimizationJob,
+        repair: RosterRepair,
+        instance: RosterInstance,
+        shift_names: List[str],
+    ) -> OptimizationJob:
+        """Repair the roster of a completed job for new unavailabilities, in a new job
+
+        Args:
+            base_job (OptimizationJob): completed job with a roster
+            repair (RosterRepair): roster request with the unavailabilities
+            instance (RosterInstance): solver input built from the database
+            shift_names (List[str]): name of each shift index
+
+        Raises:
+            ValueError: if an unavailability date is malformed or not in the month
+        """
+        shift_ids = {shift: idx for idx, shift in enumerate(shift_names)}
+        unavailable = [
+            (item.user_id, month_day(item.date, repair.month), shift_ids[item.shift])
+            for item in repair.unavailabilities
+        ]
+        job = OptimizationJob(
+            specialization_id=repair.specialization_id, month=repair.month
+        )
+        self._register(job)
+        monitor, incumbents = self._monitor(job, shared=True)
+        solve = partial(
+            repair_roster,
+            instance,
+            self.rosters[base_job.id],
+            unavailable,
+            time_limit=repair.search_time_limit,
+            fallback_time_limit=repair.time_limit,
+            threads=self.threads_per_job,
+            monitor=monitor,
+        )
+        self._tasks[job.id] = asyncio.create_task(
+            self._run(job, self._pool, solve, shift_names, incumbents)
+        )
+        return job
+
+    def _solve_live(
+        self,
+        edits: RosterEdits,
+        instance: RosterInstance,
+        shift_names: List[str],
+        monitor: SolveMonitor,
+    ) -> RosterResult:
+        """Runs on the single live thread, the only one touching the live models"""
+        if self._live_env is None:
+            self._live_env = Env(params={"OutputFlag": 0})
+        key = (edits.specialization_id, edits.month)
+        live_model = self._live_models.get(key)
+        if live_model is None or live_model.base_instance != instance:
+            live_model = LiveRosterModel(
+                instance, env=self._live_env, edits=self._live_edits.get(key)
+            )
+            self._live_models.put(key, live_model)
+        self._live_edits[key] = live_model.edits
+        self._live_edits.move_to_end(key)
+        while len(self._live_edits) > self._max_live_edits:
+            evicted, _ = self._live_edits.popitem(last=False)
+            self._live_models.discard(evicted)
+
+        # Every edit is translated (and checked) before any is applied, a bad
+        # one must not leave the model half edited
+        shift_ids = {shift: idx for idx, shift in enumerate(shift_names)}
+
+        def day_slots(items):
+            return [
+                (item.user_id, month_day(item.date, edits.month), shift_ids[item.shift])
+                for item in items
+            ]
+
+        added = day_slots(edits.add_unavailabilities)
+        removed = day_slots(edits.remove_unavailabilities)
+        forbidden_slots = [
+            (
+                item.department_id,
+                WEEKDAY_NAME_TO_ID[item.day.lower()],
+                shift_ids[item.shift],
+                forbidden,
+            )
+            for items, forbidden in (
+                (edits.add_forbidden_slots, True),
+                (edits.remove_forbidden_slots, False),
+            )
+            for item in items
+        ]
+        for doctor, day, shift in added + removed:
+            live_model.check_slot(doctor, day, shift)
+
+        for doctor, day, shift in added:
+            live_model.add_unavailability(doctor, day, shift)
+        for doctor, day, shift in removed:
+            live_model.remove_unavailability(doctor, day, shift)
+        for department, day_of_week, shift, forbidden in forbidden_slots:
+            live_model.set_forbidden_slot(department, day_of_week, shift, forbidden)
+        for item in edits.doctor_max_shifts:
+            live_model.set_max_shifts(item.user_id, item.max_shifts)
+        live_model.model.Params.TimeLimit = (
+            edits.time_limit if edits.time_limit is not None else float("inf")
+        )
+        live_model.model.Params.MIPGap = (
+            edits.mip_gap if edits.mip_gap is not None else 1e-4
+        )
+        return live_model.optimize(monitor)
+
+    async def _run(
+        self,
+        job: OptimizationJob,
+        executor: Executor,
+        solve: Callable[[], RosterResult],
+        shift_names: List[str],
+        incumbents: Any,
+        cache_key: Optional[str] = None,
+    ) -> None:
+        """Solve in the executor and fill the job, the result is cached under cache_key if given"""
+        job.status = "running"
+        future = executor.submit(solve)
+        self._incumbent_queues[job.id] = (job, incumbents, future)
+        if self._incumbent_poller is None:
+            self._incumbent_poller = asyncio.create_task(self._poll_incumbents())
+        try:
+            result: RosterResult = await asyncio.wrap_future(future)
+        except Exception as e:
+            logger.exception(f"Optimization job {job.id} failed")
+            job.status = "failed"
+            job.error = str(e)
+            self._finish(job.id)
+            return
+        finally:
+            self._tasks.pop(job.id, None)
+            self._stop_events.pop(job.id, None)
+            self._incumbent_queues.pop(job.id, None)
+            # The solver put its last incumbent before returning, a job cancelled
+            # by the shutdown is left as it is
+            if future.done():
+                await self._collect_incumbents([(job, incumbents)])
+            if job.status == "failed":
+                await self._notify(job)
+                self._updates.pop(job.id, None)
+
+        if cache_key is not None:
+            self._cache.put(cache_key, result)
+        self._complete(job, result, shift_names)
+        await self._notify(job)
+        self._updates.pop(job.id, None)
+        logger.debug(f"Optimization job {job.id} completed: {result.status}")
+
+    def _complete(
+        self, job: OptimizationJob, result: RosterResult, shift_names: List[str]
+    ) -> None:
+        job.solver_status = result.status
+        job.objective = result.objective
+        job.gap = result.gap
+        job.runtime = result.runtime
+        job.first_feasible_time = result.first_feasible_time
+        job.conflicts = result.conflicts
+        if job.warm_start:
+            job.warm_start.first_feasible_time = result.first_feasible_time
+            if (
+                job.warm_start.baseline_first_feasible_time is not None
+                and result.first_feasible_time is not None
+            ):
+                job.warm_start.improvement = (
+                    job.warm_start.baseline_first_feasible_time
+                    - result.first_feasible_time
+                )
+        if result.roster is not None:
+            roster = self._dated(result.roster, job.month, shift_names)
+            self.rosters[job.id] = roster
+            job.assignment = self._assignments(roster)
+        job.pool = [
+            PooledRoster(
+                rank=rank,
+                objective=pooled.objective,
+                assignment=self._assignments(
+                    self._dated(pooled.roster, job.month, shift_names)
+                ),
+            )
+            for rank, pooled in enumerate(result.pool)
+        ]
+        job.status = "completed"
+        self._finish(job.id)
+
+    @staticmethod
+    def _dated(roster: Roster, month: str, shift_names: List[str]) -> Roster:
+        return replace(
+            roster,
+            start=date.fromisoformat(f"{month}-01"),
+            shift_names=shift_names,
+        )
+
+    @staticmethod
+    def _assignments(roster: Roster) -> List[Assignment]:
+        return [
+            Assignment(
+                user_id=record["doctor"], date=record["date"], shift=record["shift"]
+            )
+            for record in roster.to_records()
+        ]
+
+    def shutdown(self) -> None:
+        for task in list(self._tasks.values()) + list(self._batch_tasks.values()):
+            task.cancel()
+        if self._incumbent_poller is not None:
+            self._incumbent_poller.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._preview_pool.shutdown(wait=False, cancel_futures=True)
+        self._live_executor.submit(self._live_models.clear)
+        self._live_executor.shutdown(wait=True)
+        self._incumbent_executor.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import os
@@ -21,6 +23,15 @@ class Settings(BaseSettings):
 
     GOOGLE_CLIENT_ID: str
 
+    OPTIMIZATION_WORKERS: int = 2
+    OPTIMIZATION_LIVE_MEMORY_MB: int = 512
+    OPTIMIZATION_LIVE_MAX_IDLE_SECONDS: float = 3600
+    OPTIMIZATION_MAX_LIVE_EDITS: int = 256
+    OPTIMIZATION_CACHE_SIZE: int = 256
+    OPTIMIZATION_CACHE_DIR: Optional[str] = None
+    OPTIMIZATION_JOB_TTL_SECONDS: Optional[float] = 7 * 24 * 3600
+    OPTIMIZATION_MAX_FINISHED_JOBS: Optional[int] = 10000
+
     class Config:
         env_file = ".env"
 
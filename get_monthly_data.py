@@ -1,7 +1,102 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from collections import defaultdict
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
 import calendar
 
+import numpy as np
+
+# Italian national holidays on a fixed date, as (month, day)
+FIXED_HOLIDAYS = [
+    (1, 1),  # Capodanno
+    (1, 6),  # Epifania
+    (4, 25),  # Festa della Liberazione
+    (5, 1),  # Festa dei Lavoratori
+    (6, 2),  # Festa della Repubblica
+    (8, 15),  # Ferragosto
+    (11, 1),  # Ognissanti
+    (12, 8),  # Immacolata Concezione
+    (12, 25),  # Natale
+    (12, 26),  # Santo Stefano
+]
+
+
+class MonthCalendar(NamedTuple):
+    """Calendar of a month (or of a range of days), days are indices from first_day
+
+    The calendars of whole months are cached and shared, their arrays are read only.
+
+    Attributes:
+        first_day (date): first day of the calendar
+        day_of_week (np.ndarray): day of the week (0-6) of every day
+        weekday_days (Tuple[np.ndarray, ...]): weekday_days[dow] are the days with that day of the week
+        holidays (np.ndarray): holidays[day] is True if the day is a holiday
+    """
+
+    first_day: date
+    day_of_week: np.ndarray
+    weekday_days: Tuple[np.ndarray, ...]
+    holidays: np.ndarray
+
+    @property
+    def num_days(self) -> int:
+        return self.day_of_week.size
+
+
+def easter(year: int) -> date:
+    """Easter Sunday of the Gregorian calendar (anonymous Gregorian algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d = (19 * a + b - b // 4 - (b - (b + 8) // 25 + 1) // 3 + 15) % 30
+    e = (32 + 2 * (b % 4) + 2 * (c // 4) - d - c % 4) % 7
+    f = d + e - 7 * ((a + 11 * d + 22 * e) // 451) + 114
+    return date(year, f // 31, f % 31 + 1)
+
+
+@lru_cache(maxsize=None)
+def month_calendar(year: int, month: int) -> MonthCalendar:
+    """Cached calendar of a month, the day of the week of the first day is the only date computation"""
+    first_dow, num_days = calendar.monthrange(year, month)
+    day_of_week = (first_dow + np.arange(num_days)) % 7
+    holidays = np.zeros(num_days, dtype=bool)
+    holidays[[day - 1 for m, day in FIXED_HOLIDAYS if m == month]] = True
+    easter_monday = easter(year) + timedelta(days=1)
+    if easter_monday.month == month:
+        holidays[easter_monday.day - 1] = True
+    weekday_days = tuple(np.flatnonzero(day_of_week == dow) for dow in range(7))
+    for array in (day_of_week, holidays) + weekday_days:
+        array.setflags(write=False)
+    return MonthCalendar(date(year, month, 1), day_of_week, weekday_days, holidays)
+
+
+def months_calendar(year: int, month: int, num_months: int) -> List[MonthCalendar]:
+    """Calendars of num_months consecutive months from year-month"""
+    calendars = []
+    for offset in range(num_months):
+        shifted_year, shifted_month = divmod(month - 1 + offset, 12)
+        calendars.append(month_calendar(year + shifted_year, shifted_month + 1))
+    return calendars
+
+
+def calendar_range(start: str, num_days: int) -> MonthCalendar:
+    """Calendar of num_days days from start, across month boundaries
+
+    Args:
+        start (str): first day in the format 'YYYY-MM-DD'
+        num_days (int): length of the range
+    """
+    first_day = datetime.strptime(start, "%Y-%m-%d").date()
+    last_day = first_day + timedelta(days=num_days - 1)
+    num_months = (
+        (last_day.year - first_day.year) * 12 + last_day.month - first_day.month + 1
+    )
+    months = months_calendar(first_day.year, first_day.month, num_months)
+    begin = first_day.day - 1
+    day_of_week = np.concatenate([m.day_of_week for m in months])
+    day_of_week = day_of_week[begin : begin + num_days]
+    holidays = np.concatenate([m.holidays for m in months])[begin : begin + num_days]
+    weekday_days = tuple(np.flatnonzero(day_of_week == dow) for dow in range(7))
+    return MonthCalendar(first_day, day_of_week, weekday_days, holidays)
+
 
 # Given a month obtain a dict with {idx: day_of_week} and {day_of_week: [idx0, idx1, ...]}
 def get_monthly_data(date: str):
@@ -15,18 +110,14 @@ def get_monthly_data(date: str):
         day_of_week_to_idx (dict): day_of_week -> idx0, idx1, ...
     """
     datetime_data = datetime.strptime(date, "%Y-%m-%d")
-    # Extract
-    num_days = calendar.monthrange(datetime_data.year, datetime_data.month)[1]
-    day_dow_output = {}
+    # The dicts are rebuilt from the cached calendar, callers may modify them
+    month = month_calendar(datetime_data.year, datetime_data.month)
+    day_dow_output = dict(enumerate(month.day_of_week.tolist()))
     dow_days_output = defaultdict(list)
-    for day in range(1, num_days + 1):
-        dow = datetime_data.replace(day=day).weekday()
-        # day_of_week = calendar.day_name[datetime_data.replace(day=day).weekday()]
-        day_dow_output[day - 1] = dow
-        dow_days_output[dow].append(day - 1)
+    for dow in month.day_of_week[:7].tolist():
+        dow_days_output[dow] = month.weekday_days[dow].tolist()
     return day_dow_output, dow_days_output
 
 
 if __name__ == "__main__":
-    date = input("Enter the date: ")
-    print(get_monthly_data(date))
+    print(get_monthly_data(input("Enter the date: ")))
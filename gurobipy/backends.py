@@ -0,0 +1,314 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+import numpy as np
+from cpsat_constraints import build_cpsat_model
+from decomposition import solve_decomposed
+from feasibility import check_capacity
+from instance import RosterInstance
+from matrix_constraints import RosterIndex
+from model_builder import build_roster_blocks, roster_objective, stack_roster_blocks
+from ortools.sat.python import cp_model
+from roster import Roster
+from scipy.optimize import Bounds, LinearConstraint, milp
+from solve_result import STOP_POLL_INTERVAL, RosterResult, SolveMonitor
+from warm_start import warm_start_values
+
+
+class SolverBackend(ABC):
+    """A solver able to build and solve a RosterInstance"""
+
+    name: str
+
+    @abstractmethod
+    def solve(
+        self,
+        instance: RosterInstance,
+        time_limit: Optional[float] = None,
+        mip_gap: Optional[float] = None,
+        threads: Optional[int] = None,
+        warm_start: Optional[List[Tuple[str, int, int]]] = None,
+        pool_size: int = 1,
+        pool_min_distance: int = 1,
+        pool_gap: Optional[float] = None,
+        monitor: Optional[SolveMonitor] = None,
+    ) -> RosterResult:
+        """Solve the roster instance
+
+        Args:
+            instance (RosterInstance): roster data
+            time_limit (float, optional): solver time limit in seconds
+            mip_gap (float, optional): relative MIP gap at which the solver stops
+            threads (int, optional): number of solver threads, ignored if unsupported
+            warm_start (List[Tuple[str, int, int]], optional): prior (doctor_name, day, shift), ignored if unsupported
+            pool_size (int): number of distinct rosters to return in RosterResult.pool, ignored if unsupported
+            pool_min_distance (int): minimum Hamming distance between two rosters of the pool
+            pool_gap (float, optional): relative objective gap to the best roster allowed in the pool
+            monitor (SolveMonitor, optional): incumbent and stop hooks of an anytime solve, ignored if unsupported
+        """
+        pass
+
+
+class GurobiBackend(SolverBackend):
+    name = "gurobi"
+
+    def __init__(self, lazy_consecutive: bool = False) -> None:
+        """
+        Args:
+            lazy_consecutive (bool): keep the consecutive windows out of the LP until they are violated
+        """
+        self.lazy_consecutive = lazy_consecutive
+
+    def solve(
+        self,
+        instance: RosterInstance,
+        time_limit: Optional[float] = None,
+        mip_gap: Optional[float] = None,
+        threads: Optional[int] = None,
+        warm_start: Optional[List[Tuple[str, int, int]]] = None,
+        pool_size: int = 1,
+        pool_min_distance: int = 1,
+        pool_gap: Optional[float] = None,
+        monitor: Optional[SolveMonitor] = None,
+    ) -> RosterResult:
+        # Imported here, the other backends run without Gurobi installed
+        from solver import solve_roster
+
+        return solve_roster(
+            instance,
+            time_limit,
+            mip_gap,
+            threads,
+            warm_start,
+            pool_size,
+            pool_min_distance,
+            pool_gap,
+            monitor=monitor,
+            lazy_consecutive=self.lazy_consecutive,
+        )
+
+
+class HighsBackend(SolverBackend):
+    """Open source HiGHS MILP solver shipped with scipy, fed with the same sparse blocks
+
+    scipy runs HiGHS on a single thread and takes no MIP start, so the threads,
+    the warm start, the pool and the monitor are ignored.
+    """
+
+    name = "highs"
+    STATUS_NAMES = {
+        0: "optimal",
+        1: "time_limit",
+        2: "infeasible",
+        3: "unbounded",
+    }
+
+    def solve(
+        self,
+        instance: RosterInstance,
+        time_limit: Optional[float] = None,
+        mip_gap: Optional[float] = None,
+        threads: Optional[int] = None,
+        warm_start: Optional[List[Tuple[str, int, int]]] = None,
+        pool_size: int = 1,
+        pool_min_distance: int = 1,
+        pool_gap: Optional[float] = None,
+        monitor: Optional[SolveMonitor] = None,
+    ) -> RosterResult:
+        index = RosterIndex(instance, eliminate_forbidden=True)
+        A, lower, upper = stack_roster_blocks(build_roster_blocks(instance, index))
+
+        integrality = np.zeros(index.num_vars)
+        integrality[: index.num_assignments] = 1
+        upper_bounds = np.full(index.num_vars, np.inf)
+        upper_bounds[: index.num_assignments] = 1.0
+
+        options = {"disp": False}
+        if time_limit is not None:
+            options["time_limit"] = time_limit
+        if mip_gap is not None:
+            options["mip_rel_gap"] = mip_gap
+
+        start = time.perf_counter()
+        solution = milp(
+            roster_objective(index),
+            integrality=integrality,
+            bounds=Bounds(np.zeros(index.num_vars), upper_bounds),
+            constraints=LinearConstraint(A, lower, upper),
+            options=options,
+        )
+        result = RosterResult(
+            status=self.STATUS_NAMES.get(solution.status, "error"),
+            runtime=time.perf_counter() - start,
+        )
+        if solution.x is not None:
+            result.objective = solution.fun
+            result.gap = getattr(solution, "mip_gap", None)
+            result.roster = Roster(
+                index.doctor_names, index.assignment_values(solution.x)
+            )
+        return result
+
+
+class _SolutionMonitor(cp_model.CpSolverSolutionCallback):
+    def __init__(self, monitor: Optional[SolveMonitor] = None) -> None:
+        super().__init__()
+        self.monitor = monitor
+        self.first_solution_time: Optional[float] = None
+
+    def on_solution_callback(self) -> None:
+        if self.first_solution_time is None:
+            self.first_solution_time = self.wall_time
+        if self.monitor is not None:
+            self.monitor.incumbent(
+                self.objective_value, self.best_objective_bound, self.wall_time
+            )
+
+
+def _stop_when_requested(
+    solver: cp_model.CpSolver, monitor: SolveMonitor, done: threading.Event
+) -> None:
+    """Poll the monitor until the solve is done, CP-SAT has no periodic callback"""
+    while not done.wait(STOP_POLL_INTERVAL):
+        if monitor.stop_requested():
+            solver.stop_search()
+            return
+
+
+class CpSatBackend(SolverBackend):
+    """OR-Tools CP-SAT, a parallel portfolio of workers on the pure binary model"""
+
+    name = "cpsat"
+    STATUS_NAMES = {
+        cp_model.OPTIMAL: "optimal",
+        cp_model.FEASIBLE: "time_limit",
+        cp_model.INFEASIBLE: "infeasible",
+        cp_model.MODEL_INVALID: "error",
+        cp_model.UNKNOWN: "time_limit",
+    }
+
+    def __init__(self, num_workers: Optional[int] = None) -> None:
+        """
+        Args:
+            num_workers (int, optional): default number of search workers, all the cores if missing
+        """
+        self.num_workers = num_workers
+
+    def solve(
+        self,
+        instance: RosterInstance,
+        time_limit: Optional[float] = None,
+        mip_gap: Optional[float] = None,
+        threads: Optional[int] = None,
+        warm_start: Optional[List[Tuple[str, int, int]]] = None,
+        pool_size: int = 1,
+        pool_min_distance: int = 1,
+        pool_gap: Optional[float] = None,
+        monitor: Optional[SolveMonitor] = None,
+    ) -> RosterResult:
+        model, assignment_vars, index = build_cpsat_model(instance)
+        if warm_start:
+            values = warm_start_values(index, warm_start)
+            for variable, value in zip(assignment_vars[index.allowed], values):
+                model.add_hint(variable, int(value))
+
+        solver = cp_model.CpSolver()
+        num_workers = threads or self.num_workers
+        if num_workers:
+            solver.parameters.num_workers = num_workers
+        if time_limit is not None:
+            solver.parameters.max_time_in_seconds = time_limit
+        if mip_gap is not None:
+            solver.parameters.relative_gap_limit = mip_gap
+
+        callback = _SolutionMonitor(monitor)
+        done = threading.Event()
+        if monitor is not None and monitor.should_stop is not None:
+            threading.Thread(
+                target=_stop_when_requested, args=(solver, monitor, done), daemon=True
+            ).start()
+        try:
+            status = solver.solve(model, callback)
+        finally:
+            done.set()
+        result = RosterResult(
+            status=self.STATUS_NAMES.get(status, "error"),
+            runtime=solver.wall_time,
+            first_feasible_time=callback.first_solution_time,
+        )
+        if (
+            status == cp_model.FEASIBLE
+            and monitor is not None
+            and monitor.stop_requested()
+        ):
+            result.status = "interrupted"
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            result.objective = solver.objective_value
+            bound = solver.best_objective_bound
+            result.gap = abs(result.objective - bound) / max(
+                abs(result.objective), 1e-10
+            )
+            values = np.array(
+                [solver.value(variable) for variable in assignment_vars[index.allowed]]
+            )
+            result.roster = Roster(index.doctor_names, index.assignment_values(values))
+        return result
+
+
+class DecompositionBackend(SolverBackend):
+    """Department subproblems solved in parallel processes with HiGHS, coordinated by an allocation master
+
+    Pays off with many departments, each subproblem is small and independent.
+    The warm start is ignored.
+    """
+
+    name = "decomposition"
+
+    def solve(
+        self,
+        instance: RosterInstance,
+        time_limit: Optional[float] = None,
+        mip_gap: Optional[float] = None,
+        threads: Optional[int] = None,
+        warm_start: Optional[List[Tuple[str, int, int]]] = None,
+        pool_size: int = 1,
+        pool_min_distance: int = 1,
+        pool_gap: Optional[float] = None,
+        monitor: Optional[SolveMonitor] = None,
+    ) -> RosterResult:
+        kwargs = {} if mip_gap is None else {"mip_gap": mip_gap}
+        return solve_decomposed(
+            instance, time_limit, workers=threads, monitor=monitor, **kwargs
+        )
+
+
+def get_backend(name: str) -> SolverBackend:
+    if name == "gurobi":
+        return GurobiBackend()
+    elif name == "gurobi_lazy":
+        return GurobiBackend(lazy_consecutive=True)
+    elif name == "highs":
+        return HighsBackend()
+    elif name == "cpsat":
+        return CpSatBackend()
+    elif name == "decomposition":
+        return DecompositionBackend()
+    else:
+        raise ValueError("Invalid solver backend")
+
+
+def solve_with_backend(
+    backend: str, instance: RosterInstance, precheck: bool = True, **kwargs
+) -> RosterResult:
+    """Picklable entry point to solve an instance with a backend in a worker process
+
+    With precheck an instance failing check_capacity is reported infeasible
+    with its issues as conflicts, without building any model.
+    """
+    if precheck:
+        issues = check_capacity(instance)
+        if issues:
+            return RosterResult(status="infeasible", conflicts=issues)
+    return get_backend(backend).solve(instance, **kwargs)
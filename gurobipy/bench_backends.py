@@ -0,0 +1,35 @@
+import argparse
+import time
+
+from backends import get_backend
+from departments_data import HIGH_WORKING_DEPARTMENTS, LOW_WORKING_DEPARTMENTS, doctors
+from instance import RosterInstance
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Solve time and objective of each solver backend"
+    )
+    parser.add_argument("--date", default="2025-03-01", help="YYYY-MM-DD")
+    parser.add_argument("--backends", nargs="+", default=["gurobi", "highs", "cpsat"])
+    parser.add_argument("--time-limit", type=float, default=300)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    instance = RosterInstance.from_month(
+        args.date,
+        doctors,
+        low_working_departments=LOW_WORKING_DEPARTMENTS,
+        high_working_departments=HIGH_WORKING_DEPARTMENTS,
+    )
+    print(f"{'backend':>10} {'status':>12} {'objective':>10} {'gap':>8} {'time':>9}")
+    for name in args.backends:
+        start = time.perf_counter()
+        result = get_backend(name).solve(
+            instance, time_limit=args.time_limit, threads=args.threads
+        )
+        elapsed = time.perf_counter() - start
+        objective = "-" if result.objective is None else f"{result.objective + 0.0:.3f}"
+        gap = "-" if result.gap is None else f"{result.gap:.2%}"
+        print(
+            f"{name:>10} {result.status:>12} {objective:>10} {gap:>8} {elapsed:>8.2f}s"
+        )
@@ -0,0 +1,103 @@
+import argparse
+import itertools
+import time
+
+from constraints import build_consecutive_shift_constraint
+from gurobipy import Env, GRB, Model, quicksum
+from instance import RosterInstance
+from matrix_constraints import RosterIndex, build_consecutive_shift_block
+
+
+def legacy_consecutive_shift_constraint(
+    model, assignments_vars, doctor_names, month_days, num_shifts, consecutive_limit
+):
+    """Slice based implementation kept as the baseline of the benchmark"""
+    doctor_ordered_vars = {
+        doctor: [
+            ([doctor, day, shift], assignments_vars[doctor, day, shift])
+            for day in range(month_days)
+            for shift in range(num_shifts)
+        ]
+        for doctor in doctor_names
+    }
+    for doctor in doctor_names:
+        for i in range(len(doctor_ordered_vars[doctor]) - consecutive_limit):
+            window = doctor_ordered_vars[doctor][i : i + consecutive_limit + 1]
+            consecutive_vars = [el[1] for el in window]
+            consecutive_names = [el[0] for el in window]
+            model.addConstr(
+                quicksum(consecutive_vars) <= 1,
+                f"no_consecutive_{consecutive_limit}_for_{consecutive_names[0]}_to_{consecutive_names[-1]}",
+            )
+
+
+def time_build(env: Env, num_doctors: int, num_days: int, limit: int, mode: str):
+    """Time the build of the consecutive rows only (variables are created beforehand)"""
+    doctor_names = [f"doctor_{idx}" for idx in range(num_doctors)]
+    model = Model(env=env)
+    if mode == "matrix":
+        instance = RosterInstance(
+            doctors={doctor: "department" for doctor in doctor_names},
+            day_of_week=[day % 7 for day in range(num_days)],
+        )
+        index = RosterIndex(instance)
+        variables = model.addMVar(index.num_vars, vtype=GRB.BINARY, name="x")
+        start = time.perf_counter()
+        block = build_consecutive_shift_block(index, limit)
+        model.addMConstr(block.A, variables, block.sense, block.rhs, name=block.name)
+    else:
+        variables = model.addVars(
+            doctor_names, range(num_days), [0, 1], vtype=GRB.BINARY, name="x"
+        )
+        start = time.perf_counter()
+        if mode == "legacy":
+            legacy_consecutive_shift_constraint(
+                model, variables, doctor_names, num_days, 2, limit
+            )
+        else:
+            build_consecutive_shift_constraint(
+                model,
+                variables,
+                doctor_names,
+                num_days,
+                consecutive_limit=limit,
+                with_names=mode == "rows",
+                sparse=mode == "sparse",
+            )
+    model.update()
+    elapsed = time.perf_counter() - start
+    num_constrs = model.NumConstrs
+    model.dispose()
+    return elapsed, num_constrs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build time of the consecutive shift constraints"
+    )
+    parser.add_argument("--doctors", type=int, nargs="+", default=[10, 50, 150, 300])
+    parser.add_argument("--days", type=int, nargs="+", default=[31, 91])
+    parser.add_argument("--limits", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["legacy", "rows", "rows_no_names", "sparse", "matrix"],
+    )
+    args = parser.parse_args()
+
+    env = Env(params={"OutputFlag": 0})
+    print(
+        f"{'doctors':>8} {'days':>5} {'limit':>6} {'rows':>9} "
+        + " ".join(f"{mode:>14}" for mode in args.modes)
+    )
+    for num_doctors, num_days, limit in itertools.product(
+        args.doctors, args.days, args.limits
+    ):
+        timings = []
+        for mode in args.modes:
+            elapsed, num_constrs = time_build(env, num_doctors, num_days, limit, mode)
+            timings.append(f"{elapsed * 1000:>12.1f}ms")
+        print(
+            f"{num_doctors:>8} {num_days:>5} {limit:>6} {num_constrs:>9} "
+            + " ".join(timings)
+        )
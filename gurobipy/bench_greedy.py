@@ -0,0 +1,61 @@
+import argparse
+
+from backends import solve_with_backend
+from departments_data import doctors
+from greedy import construct_roster, solve_with_greedy_start
+from instance import RosterInstance
+from synthetic import generate_instance
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time to the first feasible roster with and without the greedy warm start"
+    )
+    parser.add_argument("--backend", default="cpsat")
+    parser.add_argument(
+        "--doctors",
+        type=int,
+        nargs="*",
+        default=[60, 120, 240],
+        help="synthetic instances, the real doctors of --date if empty",
+    )
+    parser.add_argument("--departments", type=int, default=10)
+    parser.add_argument("--date", default="2025-03-01", help="YYYY-MM-DD")
+    parser.add_argument("--time-limit", type=float, default=120)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    instances = [
+        (f"{num_doctors} doctors", generate_instance(num_doctors, args.departments))
+        for num_doctors in args.doctors
+    ] or [(args.date, RosterInstance.from_month(args.date, doctors))]
+    print(
+        f"{'instance':>12} {'greedy':>10} {'greedy obj':>10} "
+        f"{'cold first':>10} {'warm first':>10} {'cold obj':>9} {'warm obj':>9}"
+    )
+    for name, instance in instances:
+        start = construct_roster(instance)
+        results = [
+            solve(
+                args.backend,
+                instance,
+                time_limit=args.time_limit,
+                threads=args.threads,
+            )
+            for solve in (solve_with_backend, solve_with_greedy_start)
+        ]
+        first = [
+            (
+                "-"
+                if result.first_feasible_time is None
+                else f"{result.first_feasible_time:.2f}s"
+            )
+            for result in results
+        ]
+        objective = [
+            "-" if result.objective is None else f"{result.objective + 0.0:.3f}"
+            for result in results
+        ]
+        print(
+            f"{name:>12} {start.status:>10} {start.objective + 0.0:>10.3f} "
+            f"{first[0]:>10} {first[1]:>10} {objective[0]:>9} {objective[1]:>9}"
+        )
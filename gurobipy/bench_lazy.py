@@ -0,0 +1,52 @@
+import argparse
+
+from gurobipy import Env
+from model_builder import build_gurobi_model
+from solver import optimize_model
+from synthetic import generate_instance
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Peak memory and solve time with the consecutive windows as rows or lazy constraints"
+    )
+    parser.add_argument("--doctors", type=int, default=30)
+    parser.add_argument("--departments", type=int, default=5)
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--limits", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--time-limit", type=float, default=120)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'limit':>6} {'mode':>6} {'rows':>7} {'window rows':>12} {'memory':>9} "
+        f"{'nodes':>8} {'status':>10} {'objective':>10} {'time':>8}"
+    )
+    for limit in args.limits:
+        instance = generate_instance(
+            args.doctors,
+            args.departments,
+            num_days=args.days,
+            consecutive_limit=limit,
+            seed=args.seed,
+        )
+        for lazy_consecutive in (False, True):
+            # One environment per model, MaxMemUsed is the peak of the environment
+            with Env(params={"OutputFlag": 0}) as env:
+                model, variables, index = build_gurobi_model(
+                    instance, env=env, lazy_consecutive=lazy_consecutive
+                )
+                model.Params.TimeLimit = args.time_limit
+                model.Params.Threads = args.threads
+                result = optimize_model(model, variables, index)
+                windows = model._constraints[f"no_consecutive_{limit}"].shape[0]
+                objective = (
+                    "-" if result.objective is None else f"{result.objective:.3f}"
+                )
+                print(
+                    f"{limit:>6} {'lazy' if lazy_consecutive else 'rows':>6} "
+                    f"{model.NumConstrs:>7} {windows:>12} "
+                    f"{model.MaxMemUsed * 1024:>7.1f}MB {int(model.NodeCount):>8} "
+                    f"{result.status:>10} {objective:>10} {result.runtime:>7.2f}s"
+                )
+                model.dispose()
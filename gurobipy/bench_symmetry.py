@@ -0,0 +1,53 @@
+import argparse
+
+from departments_data import HIGH_WORKING_DEPARTMENTS, LOW_WORKING_DEPARTMENTS, doctors
+from gurobipy import Env
+from instance import RosterInstance
+from model_builder import build_gurobi_model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Nodes explored and time to optimal with and without symmetry breaking"
+    )
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--months", type=int, nargs="+", default=list(range(1, 13)))
+    parser.add_argument("--relaxation", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    env = Env(params={"OutputFlag": 0})
+    totals = {False: [0, 0.0], True: [0, 0.0]}
+    print(
+        f"{'month':>7} {'objective':>10} {'nodes':>8} {'time':>8} "
+        f"{'sym obj':>10} {'sym nodes':>10} {'sym time':>9}"
+    )
+    for month in args.months:
+        row = []
+        for symmetry_breaking in (False, True):
+            instance = RosterInstance.from_month(
+                f"{args.year}-{month:02d}-01",
+                doctors,
+                low_working_departments=LOW_WORKING_DEPARTMENTS,
+                high_working_departments=HIGH_WORKING_DEPARTMENTS,
+                relaxation=args.relaxation,
+                symmetry_breaking=symmetry_breaking,
+            )
+            model, _, _ = build_gurobi_model(instance, env=env)
+            model.Params.TimeLimit = args.time_limit
+            model.Params.Threads = args.threads
+            model.optimize()
+            objective = f"{model.ObjVal + 0.0:.3f}" if model.SolCount else "-"
+            row.append((objective, int(model.NodeCount), model.Runtime))
+            totals[symmetry_breaking][0] += int(model.NodeCount)
+            totals[symmetry_breaking][1] += model.Runtime
+            model.dispose()
+        (objective, nodes, runtime), (sym_objective, sym_nodes, sym_runtime) = row
+        print(
+            f"{args.year}-{month:02d} {objective:>10} {nodes:>8} {runtime:>7.2f}s "
+            f"{sym_objective:>10} {sym_nodes:>10} {sym_runtime:>8.2f}s"
+        )
+    print(
+        f"{'total':>7} {'':>10} {totals[False][0]:>8} {totals[False][1]:>7.2f}s "
+        f"{'':>10} {totals[True][0]:>10} {totals[True][1]:>8.2f}s"
+    )
@@ -0,0 +1,154 @@
+import argparse
+import itertools
+import time
+
+from constraints import (
+    build_cross_department_constraint,
+    build_luck_worker_constraint,
+    build_shifts_range_contraints,
+    build_symmetry_breaking_constraint,
+    workload_expressions,
+)
+from gurobipy import Env, GRB, Model
+from synthetic import generate_instance
+
+
+def legacy_workload_constraints(
+    model, assignments_vars, max_work_vars, min_work_vars, instance, max_shifts
+):
+    """Every builder summing the assignment variables itself, kept as the baseline of the benchmark"""
+    doctor_names = instance.doctor_names
+    departments_doctors = instance.departments_doctors
+    min_shifts = int(instance.num_days / len(doctor_names))
+    for doctor in doctor_names:
+        model.addConstr(assignments_vars.sum(doctor, "*", "*") >= min_shifts)
+        model.addConstr(assignments_vars.sum(doctor, "*", "*") <= min_shifts + 1)
+    for low_department in instance.low_working_departments:
+        for high_department in instance.high_working_departments:
+            low = departments_doctors[low_department]
+            high = departments_doctors[high_department]
+            model.addConstr(
+                sum(assignments_vars.sum(doctor, "*", "*") for doctor in low)
+                <= sum(assignments_vars.sum(doctor, "*", "*") for doctor in high)
+                * len(low)
+                / len(high)
+                - len(low) / len(high)
+            )
+    for doctor in doctor_names:
+        model.addConstr(assignments_vars.sum(doctor, "*", "*") <= max_shifts)
+    for department, doctors in departments_doctors.items():
+        for doctor in doctors:
+            model.addConstr(
+                max_work_vars[department] >= assignments_vars.sum(doctor, "*", "*")
+            )
+            model.addConstr(
+                min_work_vars[department] <= assignments_vars.sum(doctor, "*", "*")
+            )
+        for first, second in zip(doctors[:-1], doctors[1:]):
+            model.addConstr(
+                assignments_vars.sum(first, "*", "*")
+                >= assignments_vars.sum(second, "*", "*")
+            )
+
+
+def shared_workload_constraints(
+    model, assignments_vars, max_work_vars, min_work_vars, instance, max_shifts
+):
+    """The same rows as main.py builds them, on the workloads of workload_expressions"""
+    departments_doctors = instance.departments_doctors
+    build_shifts_range_contraints(
+        model, assignments_vars, instance.doctor_names, instance.num_days
+    )
+    for low_department in instance.low_working_departments:
+        for high_department in instance.high_working_departments:
+            build_cross_department_constraint(
+                model,
+                assignments_vars,
+                (low_department, departments_doctors[low_department]),
+                (high_department, departments_doctors[high_department]),
+            )
+    workload = workload_expressions(model, assignments_vars)
+    for doctor in instance.doctor_names:
+        model.addConstr(workload[doctor] <= max_shifts)
+    for department, doctors in departments_doctors.items():
+        build_luck_worker_constraint(
+            model, assignments_vars, max_work_vars, (department, doctors), "unluckiest"
+        )
+        build_luck_worker_constraint(
+            model, assignments_vars, min_work_vars, (department, doctors), "luckiest"
+        )
+        build_symmetry_breaking_constraint(
+            model, assignments_vars, (department, doctors)
+        )
+
+
+def time_build(env: Env, instance, mode: str):
+    """Time the build of the workload rows only (variables are created beforehand)"""
+    model = Model(env=env)
+    variables = model.addVars(
+        instance.doctor_names,
+        range(instance.num_days),
+        range(instance.num_shifts),
+        vtype=GRB.BINARY,
+        name="x",
+    )
+    departments = list(instance.departments_doctors)
+    max_work_vars = model.addVars(departments, name="max_work_vars")
+    min_work_vars = model.addVars(departments, name="min_work_vars")
+    model.update()
+    start = time.perf_counter()
+    if mode == "legacy":
+        legacy_workload_constraints(
+            model,
+            variables,
+            max_work_vars,
+            min_work_vars,
+            instance,
+            instance.max_shifts,
+        )
+    else:
+        workload_expressions(model, variables, auxiliary=mode == "auxiliary")
+        shared_workload_constraints(
+            model,
+            variables,
+            max_work_vars,
+            min_work_vars,
+            instance,
+            instance.max_shifts,
+        )
+    model.update()
+    elapsed = time.perf_counter() - start
+    num_constrs, num_nonzeros = model.NumConstrs, model.NumNZs
+    model.dispose()
+    return elapsed, num_constrs, num_nonzeros
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build time and nonzeros of the workload rows, summed by every builder or shared"
+    )
+    parser.add_argument("--doctors", type=int, nargs="+", default=[30, 100, 300])
+    parser.add_argument("--departments", type=int, nargs="+", default=[6, 20])
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--modes", nargs="+", default=["legacy", "shared", "auxiliary"])
+    args = parser.parse_args()
+
+    env = Env(params={"OutputFlag": 0})
+    print(
+        f"{'doctors':>8} {'departments':>12} {'mode':>10} {'rows':>7} "
+        f"{'nonzeros':>10} {'build':>10}"
+    )
+    for num_doctors, num_departments in itertools.product(
+        args.doctors, args.departments
+    ):
+        instance = generate_instance(num_doctors, num_departments, num_days=args.days)
+        # Half of the departments work less than the other half, every pair is a row
+        half = num_departments // 2
+        instance.low_working_departments = list(instance.departments_doctors)[:half]
+        instance.high_working_departments = list(instance.departments_doctors)[half:]
+        for mode in args.modes:
+            elapsed, num_constrs, num_nonzeros = time_build(env, instance, mode)
+            print(
+                f"{num_doctors:>8} {num_departments:>12} {mode:>10} {num_constrs:>7} "
+                f"{num_nonzeros:>10} {elapsed * 1000:>8.1f}ms"
+            )
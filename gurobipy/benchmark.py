@@ -0,0 +1,236 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backends import get_backend
+from matrix_constraints import RosterIndex
+from model_builder import build_roster_blocks
+from synthetic import generate_instance
+
+CASE_FIELDS = [
+    "backend",
+    "doctors",
+    "departments",
+    "days",
+    "consecutive_limit",
+    "forbidden_density",
+    "seed",
+]
+RESULT_FIELDS = CASE_FIELDS + [
+    "status",
+    "objective",
+    "gap",
+    "build_time",
+    "solve_time",
+    "first_feasible_time",
+    "num_vars",
+    "num_constraints",
+    "num_nonzeros",
+    "peak_memory_mb",
+    "error",
+]
+# Metric -> smallest increase reported as a regression, below it is noise
+REGRESSION_FLOORS = {"build_time": 0.1, "solve_time": 0.1, "peak_memory_mb": 5.0}
+
+
+def _peak_memory_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(
+    case: Dict, time_limit: Optional[float] = None, threads: Optional[int] = None
+) -> Dict:
+    """Build and solve one synthetic instance, meant to run alone in a fresh process
+
+    The build time is the wall time of the backend call outside the solver, the
+    model size is the one of the matrix model with the forbidden slots eliminated.
+    """
+    instance = generate_instance(
+        case["doctors"],
+        case["departments"],
+        num_days=case["days"],
+        consecutive_limit=case["consecutive_limit"],
+        forbidden_density=case["forbidden_density"],
+        seed=case["seed"],
+    )
+    record = dict(case)
+    start = time.perf_counter()
+    try:
+        result = get_backend(case["backend"]).solve(
+            instance, time_limit=time_limit, threads=threads
+        )
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    else:
+        elapsed = time.perf_counter() - start
+        record.update(
+            status=result.status,
+            objective=result.objective,
+            gap=result.gap,
+            build_time=max(elapsed - result.runtime, 0.0),
+            solve_time=result.runtime,
+            first_feasible_time=result.first_feasible_time,
+        )
+    record["peak_memory_mb"] = _peak_memory_mb()
+
+    index = RosterIndex(instance, eliminate_forbidden=True)
+    blocks = build_roster_blocks(instance, index)
+    record.update(
+        num_vars=index.num_vars,
+        num_constraints=sum(block.A.shape[0] for block in blocks),
+        num_nonzeros=sum(block.A.nnz for block in blocks),
+    )
+    return record
+
+
+def write_records(records: List[Dict], path: Path) -> None:
+    """JSON if the path ends with .json, CSV otherwise"""
+    if path.suffix == ".json":
+        path.write_text(json.dumps(records, indent=2))
+        return
+    with path.open("w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS, restval="")
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def read_records(path: Path) -> List[Dict]:
+    if path.suffix == ".json":
+        return json.loads(path.read_text())
+    with path.open(newline="") as file:
+        return list(csv.DictReader(file))
+
+
+def _number(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+def compare_with_baseline(
+    records: List[Dict], baseline: List[Dict], tolerance: float = 0.2
+) -> List[str]:
+    """Describe every case slower, heavier or worse than in the baseline
+
+    Args:
+        records (List[Dict]): results of this run
+        baseline (List[Dict]): results of a previous run (cases missing from it are skipped)
+        tolerance (float): relative increase allowed on times and memory
+    """
+
+    def case_key(record: Dict) -> tuple:
+        return tuple(str(record[field]) for field in CASE_FIELDS)
+
+    previous = {case_key(record): record for record in baseline}
+    regressions = []
+    for record in records:
+        old = previous.get(case_key(record))
+        if old is None:
+            continue
+        case = ", ".join(f"{field}={record[field]}" for field in CASE_FIELDS)
+        if old["status"] == "optimal" and record["status"] != "optimal":
+            regressions.append(f"{case}: status {old['status']} -> {record['status']}")
+        old_objective = _number(old.get("objective"))
+        new_objective = _number(record.get("objective"))
+        if (
+            old_objective is not None
+            and new_objective is not None
+            and new_objective > old_objective + 1e-6
+        ):
+            regressions.append(
+                f"{case}: objective {old_objective:g} -> {new_objective:g}"
+            )
+        for metric, floor in REGRESSION_FLOORS.items():
+            old_value = _number(old.get(metric))
+            new_value = _number(record.get(metric))
+            if old_value is None or new_value is None:
+                continue
+            if (
+                new_value > old_value * (1 + tolerance)
+                and new_value - old_value > floor
+            ):
+                regressions.append(
+                    f"{case}: {metric} {old_value:.3f} -> {new_value:.3f}"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build and solve a grid of synthetic roster instances"
+    )
+    parser.add_argument("--backends", nargs="+", default=["gurobi"])
+    parser.add_argument("--doctors", type=int, nargs="+", default=[20, 40])
+    parser.add_argument("--departments", type=int, nargs="+", default=[6])
+    parser.add_argument("--days", type=int, nargs="+", default=[31])
+    parser.add_argument("--consecutive-limits", type=int, nargs="+", default=[10])
+    parser.add_argument(
+        "--densities",
+        type=float,
+        nargs="+",
+        default=[0.1, 0.3],
+        help="forbidden-slot density",
+    )
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--time-limit", type=float, default=300)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument(
+        "--output", type=Path, default=Path("benchmark.csv"), help=".csv or .json"
+    )
+    parser.add_argument(
+        "--baseline", type=Path, default=None, help="previous output to compare with"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    cases = [
+        dict(zip(CASE_FIELDS, values))
+        for values in itertools.product(
+            args.backends,
+            args.doctors,
+            args.departments,
+            args.days,
+            args.consecutive_limits,
+            args.densities,
+            args.seeds,
+        )
+    ]
+    records = []
+    # One fresh process per case, so the peak memory is the one of the case alone
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as pool:
+        for case in cases:
+            record = pool.submit(run_case, case, args.time_limit, args.threads).result()
+            records.append(record)
+            print(
+                ", ".join(f"{field}={record[field]}" for field in CASE_FIELDS),
+                f"-> {record['status']}",
+                f"build {record.get('build_time', 0):.3f}s",
+                f"solve {record.get('solve_time', 0):.3f}s",
+                f"{record['peak_memory_mb']:.0f}MB",
+                flush=True,
+            )
+    write_records(records, args.output)
+    print(f"Wrote {len(records)} results to {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(
+            records, read_records(args.baseline), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
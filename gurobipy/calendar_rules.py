@@ -0,0 +1,111 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from instance import CalendarRule, RosterInstance
+
+# Day of the week of departments_constraint standing for every public holiday
+HOLIDAY = 7
+NUM_DAY_TYPES = 8
+
+
+def day_types(day_of_week: Sequence[int], holidays: Sequence[int]) -> np.ndarray:
+    """(days, 8) mask, day_types[day, t] is True if the day is of type t
+
+    Types 0-6 are the days of the week, type HOLIDAY the public holidays, so a
+    holiday has two types (its day of the week and HOLIDAY).
+    """
+    day_of_week = np.asarray(day_of_week, dtype=np.int64)
+    types = np.zeros((day_of_week.size, NUM_DAY_TYPES), dtype=bool)
+    types[np.arange(day_of_week.size), day_of_week] = True
+    types[np.asarray(holidays, dtype=np.int64), HOLIDAY] = True
+    return types
+
+
+def weekday_table(
+    departments_constraint: Dict[str, List[Tuple[int, int]]],
+    department_names: List[str],
+    num_shifts: int,
+) -> np.ndarray:
+    """(departments, 8, shifts) mask of the (day type, shift) forbidden to each department"""
+    table = np.zeros((len(department_names), NUM_DAY_TYPES, num_shifts), dtype=bool)
+    for department_idx, department in enumerate(department_names):
+        slots = departments_constraint.get(department, [])
+        if slots:
+            types, shifts = zip(*slots)
+            table[department_idx, list(types), list(shifts)] = True
+    return table
+
+
+def rule_slots(
+    rule: CalendarRule,
+    day_of_week: Sequence[int],
+    holidays: Sequence[int],
+    num_shifts: int,
+) -> np.ndarray:
+    """(days, shifts) mask of the slots matched by a rule"""
+    num_days = len(day_of_week)
+    days = np.ones(num_days, dtype=bool)
+    if rule.days_of_week is not None:
+        days &= day_types(day_of_week, holidays)[:, rule.days_of_week].any(axis=1)
+    if rule.days is not None:
+        days &= np.isin(np.arange(num_days), rule.days)
+    shifts = np.ones(num_shifts, dtype=bool)
+    if rule.shifts is not None:
+        shifts &= np.isin(np.arange(num_shifts), rule.shifts)
+    return days[:, None] & shifts[None, :]
+
+
+def department_forbidden_slots(
+    department_names: List[str],
+    num_shifts: int,
+    day_of_week: Sequence[int],
+    departments_constraint: Dict[str, List[Tuple[int, int]]],
+    holidays: Sequence[int] = (),
+    rules: Sequence[CalendarRule] = (),
+) -> np.ndarray:
+    """(departments, days, shifts) mask of the slots forbidden to each department
+
+    The weekday table is expanded to the days with one product of the day type
+    mask, the forbidden rules are one mask each, whatever the number of days.
+    """
+    types = day_types(day_of_week, holidays).astype(np.int64)
+    table = weekday_table(departments_constraint, department_names, num_shifts)
+    forbidden = np.matmul(types, table.astype(np.int64)) > 0
+    position = {department: idx for idx, department in enumerate(department_names)}
+    for rule in rules:
+        if not rule.forbidden:
+            continue
+        slots = rule_slots(rule, day_of_week, holidays, num_shifts)
+        if rule.department is None:
+            forbidden |= slots
+        elif rule.department in position:
+            forbidden[position[rule.department]] |= slots
+    return forbidden
+
+
+def coverage_bounds(instance: RosterInstance) -> Tuple[np.ndarray, np.ndarray]:
+    """(days, shifts) minimum and maximum number of doctors of every slot
+
+    min_doctors_per_shift and max_doctors_per_shift everywhere, replaced by the
+    min_doctors and max_doctors of the rules on the slots they match (the last
+    matching rule wins).
+
+    Raises:
+        ValueError: if a coverage rule has a department
+    """
+    shape = (instance.num_days, instance.num_shifts)
+    lower = np.full(shape, instance.min_doctors_per_shift, dtype=np.int64)
+    upper = np.full(shape, instance.max_doctors_per_shift, dtype=np.int64)
+    for rule in instance.calendar_rules:
+        if rule.min_doctors is None and rule.max_doctors is None:
+            continue
+        if rule.department is not None:
+            raise ValueError("Coverage rules apply to every department")
+        slots = rule_slots(
+            rule, instance.day_of_week, instance.holidays, instance.num_shifts
+        )
+        if rule.min_doctors is not None:
+            lower[slots] = rule.min_doctors
+        if rule.max_doctors is not None:
+            upper[slots] = rule.max_doctors
+    return lower, upper
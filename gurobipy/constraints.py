@@ -1,6 +1,81 @@
+from collections import defaultdict
 from typing import Dict, List, Tuple
-from gurobipy import Model, GRB, quicksum, tupledict
-from departments_data import departments_constraint
+
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB, LinExpr, Model, quicksum, tupledict
+from matrix_constraints import consecutive_window_index
+
+
+def build_assignment_vars(
+    model: Model,
+    doctors: Dict[str, str],
+    department_names: List[str],
+    forbidden: np.ndarray,
+) -> tupledict:
+    """Add the binary assignment variables, skipping the slots forbidden to the department of each doctor
+
+    The forbidden slots (weekly department constraints, public holidays and
+    forbidden calendar rules) never become variables, so the model reaching
+    the solver has no rows or columns for them.
+
+    Args:
+        model (Model): Gurobi model
+        doctors (Dict[str, str]): doctor_name -> department
+        department_names (List[str]): departments of the rows of forbidden
+        forbidden (np.ndarray): (departments, days, shifts) mask from calendar_rules.department_forbidden_slots
+
+    Returns:
+        tupledict: like (doctor_name, day, shift) -> binary_var, without the forbidden keys
+    """
+    position = {department: idx for idx, department in enumerate(department_names)}
+    keys = [
+        (doctor, day, shift)
+        for doctor, department in doctors.items()
+        for day, shift in np.argwhere(~forbidden[position[department]]).tolist()
+    ]
+    return model.addVars(keys, vtype=GRB.BINARY, name="x")
+
+
+def workload_expressions(
+    model: Model, assignments_vars: tupledict, auxiliary: bool = False
+) -> Dict[str, LinExpr]:
+    """Workload sum(doctor, "*", "*") of every doctor, built once per model
+
+    The range, max shifts, cross department, luck and symmetry builders all
+    read the workloads from here instead of summing the assignment variables
+    again. The first call decides the form: the sums themselves, or with
+    auxiliary one continuous workload_{doctor} variable per doctor defined by
+    a single row, so every other workload row has one nonzero per doctor
+    instead of one per slot.
+
+    Args:
+        model (Model): Gurobi model, the workloads are kept on it
+        assignments_vars (tupledict): like (doctor_name, day, shift) -> binary_var
+        auxiliary (bool): add the workload variables and their defining rows
+
+    Returns:
+        Dict[str, LinExpr]: doctor_name -> workload
+    """
+    workload = getattr(model, "_workload", None)
+    if workload is not None:
+        return workload
+    doctor_vars = defaultdict(list)
+    for (doctor, _, _), var in assignments_vars.items():
+        doctor_vars[doctor].append(var)
+    # A doctor without variables has an empty workload, like tupledict.sum
+    workload = defaultdict(LinExpr)
+    for doctor, variables in doctor_vars.items():
+        workload[doctor] = LinExpr([1.0] * len(variables), variables)
+    if auxiliary:
+        workload_vars = model.addVars(
+            list(doctor_vars), vtype=GRB.CONTINUOUS, name="workload"
+        )
+        for doctor, expression in list(workload.items()):
+            model.addConstr(workload_vars[doctor] == expression, f"workload_{doctor}")
+            workload[doctor] = LinExpr(workload_vars[doctor])
+    model._workload = workload
+    return workload
 
 
 def build_consecutive_shift_constraint(
@@ -10,35 +85,70 @@ def build_consecutive_shift_constraint(
     month_days: int,
     num_shifts: int = 2,
     consecutive_limit: int = 1,
+    with_names: bool = True,
+    sparse: bool = False,
 ) -> None:
     """Builds and Add the constraint to the model that no one can work two consecutive shifts
 
     Args:
         model (Model): Gurobi model
-        assignments_vars (tupledict): like (doctor_name, day, shift) -> binary_var
+        assignments_vars (tupledict): like (doctor_name, day, shift) -> binary_var, missing keys are eliminated slots
+        with_names (bool): name each constraint, skipping names speeds up large builds
+        sparse (bool): add all the windows as a single sparse block with addMConstr
     """
-    # List of ordered variables per doctor
-    doctor_ordered_vars = {
-        doctor: [
-            ([doctor, day, shift], assignments_vars[doctor, day, shift])
-            for day in range(month_days)
-            for shift in range(num_shifts)
-        ]
-        for doctor in doctor_names
-    }
+    slots = [(day, shift) for day in range(month_days) for shift in range(num_shifts)]
+    # Window i covers the slots i, ..., i + consecutive_limit, shared by all doctors
+    windows = consecutive_window_index(len(slots), consecutive_limit)
+    window_size = windows.shape[1]
+    if sparse:
+        doctor_vars, positions = [], []
+        for doctor in doctor_names:
+            for day, shift in slots:
+                var = assignments_vars.get((doctor, day, shift))
+                positions.append(-1 if var is None else len(doctor_vars))
+                if var is not None:
+                    doctor_vars.append(var)
+        cols = np.asarray(positions).reshape(len(doctor_names), len(slots))[:, windows]
+        cols = cols.reshape(-1, window_size)
+        # A window with at most one variable left can never be violated
+        cols = cols[np.count_nonzero(cols >= 0, axis=1) > 1]
+        num_rows = cols.shape[0]
+        rows = np.repeat(np.arange(num_rows), window_size)
+        kept = cols.reshape(-1) >= 0
+        A = sp.csr_matrix(
+            (np.ones(np.count_nonzero(kept)), (rows[kept], cols.reshape(-1)[kept])),
+            shape=(num_rows, len(doctor_vars)),
+        )
+        model.addMConstr(
+            A,
+            doctor_vars,
+            GRB.LESS_EQUAL,
+            np.ones(num_rows),
+            name=f"no_consecutive_{consecutive_limit}" if with_names else "",
+        )
+        return
+
+    coefficients = [1.0] * window_size
     for doctor in doctor_names:
-        for i in range(len(doctor_ordered_vars[doctor]) - consecutive_limit):
-            consecutive_vars = [
-                el[1]
-                for el in doctor_ordered_vars[doctor][i : i + consecutive_limit + 1]
-            ]
-            consecutive_names = [
-                el[0]
-                for el in doctor_ordered_vars[doctor][i : i + consecutive_limit + 1]
-            ]
-            model.addConstr(
-                quicksum(consecutive_vars) <= 1,
-                f"no_consecutive_{consecutive_limit}_for_{consecutive_names[0]}_to_{consecutive_names[-1]}",
+        doctor_vars = [
+            assignments_vars.get((doctor, day, shift)) for day, shift in slots
+        ]
+        complete = all(var is not None for var in doctor_vars)
+        for window in windows.tolist():
+            first, last = window[0], window[-1]
+            window_vars = doctor_vars[first : last + 1]
+            if not complete:
+                window_vars = [var for var in window_vars if var is not None]
+                if len(window_vars) < 2:
+                    continue
+            name = ""
+            if with_names:
+                name = f"no_consecutive_{consecutive_limit}_for_{[doctor, *slots[first]]}_to_{[doctor, *slots[last]]}"
+            model.addLConstr(
+                LinExpr(coefficients[: len(window_vars)], window_vars),
+                GRB.LESS_EQUAL,
+                1.0,
+                name,
             )
 
     # Iterate over doctors
@@ -81,6 +191,9 @@ def build_custom_constraint(
         day (int): month day (0-31)
         shift (int): 0 for morning, 1 for night
     """
+    if (doctor_name, day, shift) not in assignment_vars:
+        # Slot eliminated by build_assignment_vars, the doctor can never work it
+        return
     model.addConstr(
         assignment_vars[doctor_name, day, shift] == 0,
         name=f"custom_constraint_{doctor_name}_{day}_{shift}",
@@ -91,29 +204,27 @@ def build_custom_constraint(
 def build_doctors_per_shift_constraint(
     model: Model,
     assignments_vars: tupledict,
-    days: int,
-    min_doctors_per_shift: int = 1,
-    max_doctors_per_shift: int = 1,
+    min_doctors: np.ndarray,
+    max_doctors: np.ndarray,
 ) -> None:
-    """Builds and Add the constraint to the model that there must be at least min_doctors_per_shift and at most max_doctors_per_shift
+    """Builds and Add the constraint to the model that there must be at least min_doctors and at most max_doctors on every shift
 
     Args:
         model (Model): Gurobi model
         assignments_vars (tupledict): like (doctor_name, day, shift) -> binary
-        days (int): Number of days in the month
-        min_doctors_per_shift (int): Minimum number of doctors per shift
-        max_doctors_per_shift (int): Maximum number of doctors per shift
+        min_doctors (np.ndarray): (days, shifts) minimum number of doctors, from calendar_rules.coverage_bounds
+        max_doctors (np.ndarray): (days, shifts) maximum number of doctors, from calendar_rules.coverage_bounds
     """
-    for shift in range(2):
-        for day in range(days):
-            model.addConstr(
-                assignments_vars.sum("*", day, shift) >= min_doctors_per_shift,
-                name=f"min_{min_doctors_per_shift}_per_shift_{day}_{shift}",
-            )
-            model.addConstr(
-                assignments_vars.sum("*", day, shift) <= max_doctors_per_shift,
-                name=f"max_{max_doctors_per_shift}_per_shift_{day}_{shift}",
-            )
+    for (day, shift), lower in np.ndenumerate(min_doctors):
+        upper = max_doctors[day, shift]
+        model.addConstr(
+            assignments_vars.sum("*", day, shift) >= lower,
+            name=f"min_{lower}_per_shift_{day}_{shift}",
+        )
+        model.addConstr(
+            assignments_vars.sum("*", day, shift) <= upper,
+            name=f"max_{upper}_per_shift_{day}_{shift}",
+        )
     return
 
 
@@ -138,42 +249,19 @@ def build_shifts_range_contraints(
     """
     min_shifts = int(month_days / len(doctor_names))
     max_shifts = min_shifts + 1 + relaxation
+    workload = workload_expressions(model, assignments_vars)
     for doctor in doctor_names:
         model.addConstr(
-            assignments_vars.sum(doctor, "*", "*") >= min_shifts,
+            workload[doctor] >= min_shifts,
             f"min_shifts_{doctor}_{min_shifts}",
         )
         model.addConstr(
-            assignments_vars.sum(doctor, "*", "*") <= max_shifts,
+            workload[doctor] <= max_shifts,
             f"max_shifts_{doctor}_{max_shifts}",
         )
     return
 
 
-def build_department_constraints(
-    model: Model,
-    assignments_vars: tupledict,
-    department: str,
-    doctor_name: str,
-    # dayidx_to_dow: Dict[int, str],
-    dow_to_dayidx: Dict[str, List[int]],
-) -> None:
-    """Generate the constraints for the doctor based on the department
-
-    Args:
-        model (Model): Gurobi model
-        assignments_vars (tupledict): Ok
-        department (str): name of the department
-        doctor (str): Unique Name of the doctor
-    """
-    constraints = departments_constraint[department]
-    for constraint in constraints:
-        day, shift = constraint
-        for dayidx in dow_to_dayidx[day]:
-            build_custom_constraint(model, assignments_vars, doctor_name, dayidx, shift)
-    return
-
-
 def build_cross_department_constraint(
     model: Model,
     assignments_vars: tupledict,
@@ -189,12 +277,9 @@ def build_cross_department_constraint(
         department_high_doctors (str): the name of the doctors in the department that should work more
     """
     # Relaxed version of the constraint with sum of work done in department_low <= sum of work done in department_high (along all doctors)
-    low_sum = sum(
-        assignments_vars.sum(doctor, "*", "*") for doctor in department_low_doctors[1]
-    )
-    high_sum = sum(
-        assignments_vars.sum(doctor, "*", "*") for doctor in department_high_doctors[1]
-    )
+    workload = workload_expressions(model, assignments_vars)
+    low_sum = quicksum(workload[doctor] for doctor in department_low_doctors[1])
+    high_sum = quicksum(workload[doctor] for doctor in department_high_doctors[1])
     model.addConstr(
         low_sum
         <= high_sum * len(department_low_doctors[1]) / len(department_high_doctors[1])
@@ -220,21 +305,47 @@ def build_luck_worker_constraint(
         department_doctors (Tuple[str, List[str]]): department name and list of doctors in the department
     """
     department, doctors = department_doctors
+    workload = workload_expressions(model, assignment_vars)
     for doctor in doctors:
         if mode == "luckiest":
             model.addConstr(
-                helping_vars[department] <= assignment_vars.sum(doctor, "*", "*"),
+                helping_vars[department] <= workload[doctor],
                 name=f"luckiest_worker_{department}_{doctor}",
             )
         elif mode == "unluckiest":
             model.addConstr(
-                helping_vars[department] >= assignment_vars.sum(doctor, "*", "*"),
+                helping_vars[department] >= workload[doctor],
                 name=f"unlucky_worker_{department}_{doctor}",
             )
 
     return
 
 
+def build_symmetry_breaking_constraint(
+    model: Model,
+    assignments_vars: tupledict,
+    department_doctors: Tuple[str, List[str]],
+) -> None:
+    """Order the workloads of the doctors of a department so that symmetric rosters are cut off
+
+    Only valid when the doctors of the department have the same availability (no
+    custom constraints), otherwise they are not interchangeable.
+
+    Args:
+        model (Model): Gurobi model
+        assignments_vars (tupledict): like (doctor_name, day, shift) -> binary_var
+        department_doctors (Tuple[str, List[str]]): department name and list of doctors in the department
+    """
+    department, doctors = department_doctors
+    workload = workload_expressions(model, assignments_vars)
+    for first, second in zip(doctors[:-1], doctors[1:]):
+        model.addConstr(
+            workload[first] >= workload[second],
+            name=f"symmetry_breaking_{department}_{first}_{second}",
+        )
+    return
+
+
 if __name__ == "__main__":
     model = Model("Shifts-Manager")
     vars = model.addVars(
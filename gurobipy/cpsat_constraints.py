@@ -0,0 +1,210 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from calendar_rules import coverage_bounds
+from instance import RosterInstance
+from matrix_constraints import (
+    RosterIndex,
+    consecutive_window_index,
+    interchangeable_doctor_groups,
+)
+from ortools.sat.python.cp_model import CpModel, IntVar
+
+
+def _present(variables: np.ndarray) -> List[IntVar]:
+    """Drop the None entries of the eliminated slots"""
+    return [variable for variable in variables.reshape(-1) if variable is not None]
+
+
+def build_assignment_vars(model: CpModel, index: RosterIndex) -> np.ndarray:
+    """Create the binary assignments as a (doctors, days, shifts) array, None for the slots eliminated by the index"""
+    assignment_vars = np.full(index.shape, None, dtype=object)
+    for doctor, day, shift in np.argwhere(index.allowed):
+        assignment_vars[doctor, day, shift] = model.new_bool_var(
+            f"x_{doctor}_{day}_{shift}"
+        )
+    return assignment_vars
+
+
+def build_workload_vars(
+    model: CpModel, assignment_vars: np.ndarray, index: RosterIndex
+) -> List[IntVar]:
+    """One integer variable per doctor equal to sum(doctor, "*", "*")"""
+    slots = index.num_days * index.num_shifts
+    workloads = []
+    for doctor in range(index.num_doctors):
+        workload = model.new_int_var(0, slots, f"workload_{doctor}")
+        model.add(workload == sum(_present(assignment_vars[doctor])))
+        workloads.append(workload)
+    return workloads
+
+
+def build_consecutive_shift_constraint(
+    model: CpModel, assignment_vars: np.ndarray, consecutive_limit: int = 1
+) -> None:
+    """At most one worked shift in every window of consecutive_limit + 1 shifts of each doctor"""
+    num_doctors = assignment_vars.shape[0]
+    doctor_slots = assignment_vars.reshape(num_doctors, -1)
+    windows = consecutive_window_index(doctor_slots.shape[1], consecutive_limit)
+    for doctor in range(num_doctors):
+        for window in doctor_slots[doctor][windows]:
+            window = _present(window)
+            if len(window) > 1:
+                model.add_at_most_one(window)
+
+
+def build_doctors_per_shift_constraint(
+    model: CpModel,
+    assignment_vars: np.ndarray,
+    min_doctors_per_shift: int = 1,
+    max_doctors_per_shift: int = 1,
+    coverage: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> None:
+    """Between min_doctors_per_shift and max_doctors_per_shift doctors on every (day, shift)
+
+    coverage, (days, shifts) minimum and maximum of every slot, replaces the two limits if given.
+    """
+    _, num_days, num_shifts = assignment_vars.shape
+    if coverage is None:
+        lower = np.full((num_days, num_shifts), min_doctors_per_shift)
+        upper = np.full((num_days, num_shifts), max_doctors_per_shift)
+    else:
+        lower, upper = coverage
+    for day in range(num_days):
+        for shift in range(num_shifts):
+            model.add_linear_constraint(
+                sum(_present(assignment_vars[:, day, shift])),
+                int(lower[day, shift]),
+                int(upper[day, shift]),
+            )
+
+
+def build_shifts_range_constraints(
+    model: CpModel, workloads: List[IntVar], num_days: int, relaxation: int = 0
+) -> None:
+    """Each doctor works at least floor(N/K) and at most floor(N/K) + 1 + relaxation shifts"""
+    min_shifts = int(num_days / len(workloads))
+    max_shifts = min_shifts + 1 + relaxation
+    for workload in workloads:
+        model.add_linear_constraint(workload, min_shifts, max_shifts)
+
+
+def build_max_shifts_constraint(
+    model: CpModel, workloads: List[IntVar], max_shifts: int
+) -> None:
+    for workload in workloads:
+        model.add(workload <= max_shifts)
+
+
+def build_cross_department_constraint(
+    model: CpModel,
+    workloads: List[IntVar],
+    index: RosterIndex,
+    low_working_department: str,
+    high_working_department: str,
+) -> None:
+    """sum(low) <= sum(high) * |low| / |high| - |low| / |high|, scaled by |high| to stay integer
+
+    The sums include the prior workload of the doctors.
+    """
+    low_doctors = index.department_doctors(low_working_department)
+    high_doctors = index.department_doctors(high_working_department)
+    if low_doctors.size == 0 or high_doctors.size == 0:
+        return
+    low_sum = sum(workloads[doctor] for doctor in low_doctors) + int(
+        index.prior_workload[low_doctors].sum()
+    )
+    high_sum = sum(workloads[doctor] for doctor in high_doctors) + int(
+        index.prior_workload[high_doctors].sum()
+    )
+    model.add(
+        high_doctors.size * low_sum <= low_doctors.size * high_sum - low_doctors.size
+    )
+
+
+def build_luck_worker_constraint(
+    model: CpModel,
+    workloads: List[IntVar],
+    helping_vars: List[IntVar],
+    index: RosterIndex,
+    mode: str = "luckiest",
+) -> None:
+    """Set the helping variable of each department to the min (luckiest) or max (unluckiest) workload, prior workload included"""
+    for department, helping_var in enumerate(helping_vars):
+        department_workloads = [
+            workloads[doctor] + int(index.prior_workload[doctor])
+            for doctor in np.flatnonzero(index.doctor_department == department)
+        ]
+        if mode == "luckiest":
+            model.add_min_equality(helping_var, department_workloads)
+        elif mode == "unluckiest":
+            model.add_max_equality(helping_var, department_workloads)
+        else:
+            raise ValueError(f"Invalid mode {mode}")
+
+
+def build_symmetry_breaking_constraint(
+    model: CpModel, workloads: List[IntVar], groups: List[np.ndarray]
+) -> None:
+    """Order the workloads of each group of interchangeable doctors (see interchangeable_doctor_groups)"""
+    for group in groups:
+        for first, second in zip(group[:-1], group[1:]):
+            model.add(workloads[first] >= workloads[second])
+
+
+def build_cpsat_model(
+    instance: RosterInstance,
+) -> Tuple[CpModel, np.ndarray, RosterIndex]:
+    """Build the roster model (same rules as main.py) with the native CP-SAT constraints
+
+    The department forbidden slots are eliminated, they get no variable.
+
+    Returns:
+        Tuple[CpModel, np.ndarray, RosterIndex]: model, (doctors, days, shifts) assignment variables and the index
+    """
+    index = RosterIndex(instance, eliminate_forbidden=True)
+    model = CpModel()
+    assignment_vars = build_assignment_vars(model, index)
+    workloads = build_workload_vars(model, assignment_vars, index)
+    slots = index.num_days * index.num_shifts + int(index.prior_workload.max(initial=0))
+    max_work_vars = [
+        model.new_int_var(0, slots, f"max_work_{department}")
+        for department in index.department_names
+    ]
+    min_work_vars = [
+        model.new_int_var(0, slots, f"min_work_{department}")
+        for department in index.department_names
+    ]
+
+    build_consecutive_shift_constraint(
+        model, assignment_vars, instance.consecutive_limit
+    )
+    build_doctors_per_shift_constraint(
+        model,
+        assignment_vars,
+        instance.min_doctors_per_shift,
+        instance.max_doctors_per_shift,
+        coverage_bounds(instance),
+    )
+    build_shifts_range_constraints(
+        model, workloads, index.num_days, instance.relaxation
+    )
+    for low_department in instance.low_working_departments:
+        for high_department in instance.high_working_departments:
+            build_cross_department_constraint(
+                model, workloads, index, low_department, high_department
+            )
+    build_max_shifts_constraint(model, workloads, instance.max_shifts)
+    build_luck_worker_constraint(
+        model, workloads, max_work_vars, index, mode="unluckiest"
+    )
+    build_luck_worker_constraint(
+        model, workloads, min_work_vars, index, mode="luckiest"
+    )
+    if instance.symmetry_breaking:
+        build_symmetry_breaking_constraint(
+            model, workloads, interchangeable_doctor_groups(index)
+        )
+
+    model.minimize(sum(max_work_vars) - sum(min_work_vars))
+    return model, assignment_vars, index
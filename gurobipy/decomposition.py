@@ -0,0 +1,498 @@
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from calendar_rules import coverage_bounds
+from instance import RosterInstance
+from matrix_constraints import RosterIndex, consecutive_window_index
+from model_builder import build_roster_blocks, roster_objective, stack_roster_blocks
+from scipy.optimize import Bounds, LinearConstraint, milp
+from roster import Roster
+from solve_result import RosterResult, SolveMonitor
+
+
+class DepartmentProblem(NamedTuple):
+    """Rows and columns of the roster model that touch a single department"""
+
+    columns: np.ndarray  # columns of the full model owned by the department
+    A: sp.csr_matrix  # department rows over the department columns
+    lower: np.ndarray
+    upper: np.ndarray
+    integrality: np.ndarray
+    upper_bounds: np.ndarray
+    objective: np.ndarray
+    coverage: (
+        sp.csr_matrix
+    )  # (day, shift) slot x department columns, doctors on the slot
+
+
+def column_departments(index: RosterIndex) -> np.ndarray:
+    """Department of every column of the index (assignments, max_work, min_work)"""
+    doctors = np.nonzero(index.allowed)[0]
+    departments = np.arange(index.num_departments, dtype=np.int64)
+    return np.concatenate([index.doctor_department[doctors], departments, departments])
+
+
+def split_by_department(
+    index: RosterIndex,
+    A: sp.csr_matrix,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    objective: np.ndarray,
+) -> Tuple[List[DepartmentProblem], np.ndarray]:
+    """Split the rows of lower <= A @ x <= upper into department problems and coupling rows
+
+    A row belongs to a department when all its nonzeros are on the department
+    columns (consecutive, range, caps, luck, ...), the other rows (coverage per
+    shift and cross department) couple the departments.
+
+    Returns:
+        Tuple[List[DepartmentProblem], np.ndarray]: one problem per department and the coupling rows
+    """
+    column_department = column_departments(index)
+    nonzeros = np.diff(A.indptr)
+    row_of_nonzero = np.repeat(np.arange(A.shape[0]), nonzeros)
+    first = np.full(A.shape[0], index.num_departments)
+    last = np.full(A.shape[0], -1)
+    np.minimum.at(first, row_of_nonzero, column_department[A.indices])
+    np.maximum.at(last, row_of_nonzero, column_department[A.indices])
+    coupling = np.flatnonzero((nonzeros > 0) & (first != last))
+
+    integrality = np.zeros(index.num_vars)
+    integrality[: index.num_assignments] = 1
+    upper_bounds = np.full(index.num_vars, np.inf)
+    upper_bounds[: index.num_assignments] = 1.0
+    _, days, shifts = np.nonzero(index.allowed)
+    column_slot = np.full(index.num_vars, -1)
+    column_slot[: index.num_assignments] = days * index.num_shifts + shifts
+    num_slots = index.num_days * index.num_shifts
+    problems = []
+    for department in range(index.num_departments):
+        columns = np.flatnonzero(column_department == department)
+        rows = np.flatnonzero(
+            (nonzeros > 0) & (first == department) & (last == department)
+        )
+        slot = column_slot[columns]
+        assignments = np.flatnonzero(slot >= 0)
+        coverage = sp.csr_matrix(
+            (np.ones(assignments.size), (slot[assignments], assignments)),
+            shape=(num_slots, columns.size),
+        )
+        problems.append(
+            DepartmentProblem(
+                columns,
+                A[rows][:, columns],
+                lower[rows],
+                upper[rows],
+                integrality[columns],
+                upper_bounds[columns],
+                objective[columns],
+                coverage,
+            )
+        )
+    return problems, coupling
+
+
+class MasterSolution(NamedTuple):
+    """Outcome of a master solve"""
+
+    status: str  # "optimal", "infeasible" or "time_limit"
+    u: Optional[np.ndarray]  # allocation, the incumbent if the time ran out
+    bound: float  # proven lower bound of the master, -inf if unknown
+
+
+class AllocationMaster:
+    """How many doctors of each department work every (day, shift)
+
+    Columns are binary levels u[department, slot, level] (the department puts at
+    least level + 1 doctors on the slot), then one integer hi, one integer lo and
+    one continuous theta per department. The rows are a relaxation of the roster
+    aggregated by department: coverage per shift, at most one shift per doctor in
+    every consecutive window (which is exact for the no-rest rule, the shifts of
+    a window overlap pairwise), range of the department workload, cross
+    department rows on the workloads and theta >= ceil(mean) - floor(mean) of the
+    department workload as a bound on its max_work - min_work. Department
+    rosters send back no-good cuts on the levels of their department.
+    """
+
+    def __init__(self, instance: RosterInstance, index: RosterIndex) -> None:
+        num_slots = index.num_days * index.num_shifts
+        K = index.num_departments
+        allowed = index.allowed.reshape(index.num_doctors, num_slots)
+        sizes = np.bincount(index.doctor_department, minlength=K)
+        capacity = np.zeros((K, num_slots), dtype=np.int64)
+        np.add.at(capacity, index.doctor_department, allowed.astype(np.int64))
+        min_coverage, max_coverage = coverage_bounds(instance)
+        capacity = np.minimum(capacity, max_coverage.reshape(-1))
+        levels = np.arange(capacity.max(initial=0))
+        department, slot, level = np.nonzero(capacity[:, :, None] > levels)
+        self.level_department, self.level_slot = department, slot
+        m = department.size
+        self.num_levels = m
+        self.hi_offset, self.lo_offset, self.theta_offset = m, m + K, m + 2 * K
+        self.num_vars = m + 3 * K
+        self.num_departments = K
+        self.num_slots = num_slots
+
+        rows, cols, vals, lower, upper = [], [], [], [], []
+
+        def add_rows(row_cols, row_vals, row_lower, row_upper):
+            for c, v, lo, up in zip(row_cols, row_vals, row_lower, row_upper):
+                rows.append(np.full(len(c), len(lower)))
+                cols.append(np.asarray(c, dtype=np.int64))
+                vals.append(np.asarray(v, dtype=np.float64))
+                lower.append(lo)
+                upper.append(up)
+
+        position = {key: col for col, key in enumerate(zip(department, slot, level))}
+        # Doctors per shift
+        by_slot = [np.flatnonzero(slot == s) for s in range(num_slots)]
+        add_rows(
+            by_slot,
+            [np.ones(c.size) for c in by_slot],
+            min_coverage.reshape(-1),
+            max_coverage.reshape(-1),
+        )
+        # Levels in order, level + 1 needs level
+        ordered = [
+            (position[(k, s, j - 1)], col)
+            for col, (k, s, j) in enumerate(zip(department, slot, level))
+            if j > 0
+        ]
+        add_rows(
+            ordered,
+            [(1.0, -1.0)] * len(ordered),
+            [0.0] * len(ordered),
+            [np.inf] * len(ordered),
+        )
+        # A doctor works at most once per window of consecutive_limit + 1 shifts
+        windows = consecutive_window_index(num_slots, instance.consecutive_limit)
+        window_of_slot = [[] for _ in range(num_slots)]
+        for w, window in enumerate(windows):
+            for s in window:
+                window_of_slot[s].append(w)
+        for k in range(K):
+            members = [[] for _ in windows]
+            for col in np.flatnonzero(department == k):
+                for w in window_of_slot[slot[col]]:
+                    members[w].append(col)
+            members = [c for c in members if len(c) > sizes[k]]
+            add_rows(
+                members,
+                [np.ones(len(c)) for c in members],
+                [-np.inf] * len(members),
+                [sizes[k]] * len(members),
+            )
+
+        # Workload of each department, prior workload included
+        by_department = [np.flatnonzero(department == k) for k in range(K)]
+        prior = np.bincount(index.doctor_department, index.prior_workload, minlength=K)
+        min_shifts = int(index.num_days / index.num_doctors)
+        max_shifts = min(min_shifts + 1 + instance.relaxation, instance.max_shifts)
+        add_rows(
+            by_department,
+            [np.ones(c.size) for c in by_department],
+            sizes * min_shifts,
+            sizes * max_shifts,
+        )
+        add_rows(
+            [np.append(c, self.hi_offset + k) for k, c in enumerate(by_department)],
+            [
+                np.append(np.ones(c.size), -sizes[k])
+                for k, c in enumerate(by_department)
+            ],
+            [-np.inf] * K,
+            -prior,
+        )
+        add_rows(
+            [np.append(c, self.lo_offset + k) for k, c in enumerate(by_department)],
+            [
+                np.append(np.ones(c.size), -sizes[k])
+                for k, c in enumerate(by_department)
+            ],
+            -prior,
+            [np.inf] * K,
+        )
+        add_rows(
+            [
+                (self.theta_offset + k, self.hi_offset + k, self.lo_offset + k)
+                for k in range(K)
+            ],
+            [(1.0, -1.0, 1.0)] * K,
+            [0.0] * K,
+            [np.inf] * K,
+        )
+        for low_department in instance.low_working_departments:
+            for high_department in instance.high_working_departments:
+                if (
+                    low_department not in index.department_names
+                    or high_department not in index.department_names
+                ):
+                    continue
+                low = index.department_names.index(low_department)
+                high = index.department_names.index(high_department)
+                ratio = sizes[low] / sizes[high]
+                add_rows(
+                    [np.concatenate([by_department[low], by_department[high]])],
+                    [
+                        np.concatenate(
+                            [
+                                np.ones(by_department[low].size),
+                                np.full(by_department[high].size, -ratio),
+                            ]
+                        )
+                    ],
+                    [-np.inf],
+                    [-ratio - prior[low] + ratio * prior[high]],
+                )
+
+        self.A = sp.csr_matrix(
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(len(lower), self.num_vars),
+        )
+        self.lower = np.array(lower, dtype=np.float64)
+        self.upper = np.array(upper, dtype=np.float64)
+        self.cuts = []
+        self.objective = np.zeros(self.num_vars)
+        self.objective[self.theta_offset :] = 1.0
+        self.integrality = np.ones(self.num_vars)
+        self.integrality[self.theta_offset :] = 0
+
+    def solve(self, time_limit: Optional[float] = None) -> MasterSolution:
+        """Allocation under the cuts so far, with a bound only as strong as the solve proved
+
+        With the time limit hit the allocation is the incumbent of the master
+        (None without one) and the bound is the dual bound of HiGHS, not its
+        objective.
+        """
+        A, lower, upper = self.A, self.lower, self.upper
+        if self.cuts:
+            A = sp.vstack([A] + [cut[0] for cut in self.cuts], format="csr")
+            lower = np.concatenate([lower, [cut[1] for cut in self.cuts]])
+            upper = np.full(A.shape[0], np.inf)
+            upper[: self.upper.size] = self.upper
+        options = {"disp": False}
+        if time_limit is not None:
+            options["time_limit"] = time_limit
+        solution = milp(
+            self.objective,
+            integrality=self.integrality,
+            bounds=Bounds(
+                np.zeros(self.num_vars),
+                np.where(np.arange(self.num_vars) < self.num_levels, 1.0, np.inf),
+            ),
+            constraints=[LinearConstraint(A, lower, upper)],
+            options=options,
+        )
+        u = None if solution.x is None else np.round(solution.x)
+        if solution.status == 0:
+            return MasterSolution("optimal", u, self.objective @ u)
+        if solution.status == 2:
+            return MasterSolution("infeasible", None, math.inf)
+        dual_bound = getattr(solution, "mip_dual_bound", None)
+        if dual_bound is None or not np.isfinite(dual_bound):
+            dual_bound = -math.inf
+        return MasterSolution("time_limit", u, dual_bound)
+
+    def department_pattern(self, department: int, u: np.ndarray) -> np.ndarray:
+        """Doctors of the department on every (day, shift) slot"""
+        columns = np.flatnonzero(self.level_department == department)
+        pattern = np.zeros(self.num_slots, dtype=np.int64)
+        np.add.at(pattern, self.level_slot[columns], u[columns].astype(np.int64))
+        return pattern
+
+    def add_cut(self, department: int, u: np.ndarray, spread: float) -> None:
+        """theta[department] >= spread unless a level of the department changes
+
+        spread is math.inf when the department cannot be rostered with these
+        levels, the cut then forbids them.
+        """
+        columns = np.flatnonzero(self.level_department == department)
+        ones = u[columns] > 0.5
+        # distance = sum over levels at 1 of (1 - u) + sum over levels at 0 of u
+        coefficients = np.where(ones, -1.0, 1.0)
+        if math.isinf(spread):
+            cols, vals, rhs = columns, coefficients, 1.0 - ones.sum()
+        else:
+            cols = np.append(columns, self.theta_offset + department)
+            vals = np.append(spread * coefficients, 1.0)
+            rhs = spread * (1.0 - ones.sum())
+        row = sp.csr_matrix(
+            (vals, (np.zeros(cols.size, dtype=np.int64), cols)),
+            shape=(1, self.num_vars),
+        )
+        self.cuts.append((row, rhs))
+
+
+# Department problems of a worker process, sent once by the pool initializer
+_problems: List[DepartmentProblem] = []
+
+
+def _init_worker(problems: List[DepartmentProblem]) -> None:
+    global _problems
+    _problems = problems
+
+
+def _solve_department(
+    department: int, pattern: np.ndarray, time_limit: Optional[float] = None
+) -> Tuple[str, Optional[np.ndarray]]:
+    """Roster a department given its doctors on every (day, shift)
+
+    Returns:
+        Tuple[str, Optional[np.ndarray]]: status ("optimal", "infeasible" or "time_limit") and the department columns
+    """
+    problem = _problems[department]
+    options = {"disp": False}
+    if time_limit is not None:
+        options["time_limit"] = max(time_limit, 0.0)
+    constraints = [LinearConstraint(problem.coverage, pattern, pattern)]
+    if problem.A.shape[0] > 0:
+        constraints.append(LinearConstraint(problem.A, problem.lower, problem.upper))
+    solution = milp(
+        problem.objective,
+        integrality=problem.integrality,
+        bounds=Bounds(np.zeros(problem.columns.size), problem.upper_bounds),
+        constraints=constraints,
+        options=options,
+    )
+    if solution.status == 2:
+        return "infeasible", None
+    if solution.x is None:
+        return "time_limit", None
+    values = np.where(problem.integrality > 0, np.round(solution.x), solution.x)
+    return ("optimal" if solution.status == 0 else "time_limit"), values
+
+
+def solve_decomposed(
+    instance: RosterInstance,
+    time_limit: Optional[float] = None,
+    mip_gap: float = 1e-4,
+    max_iterations: int = 1000,
+    workers: Optional[int] = None,
+    monitor: Optional[SolveMonitor] = None,
+) -> RosterResult:
+    """Solve the roster by department, coordinating the departments with an allocation master
+
+    The master (AllocationMaster) decides how many doctors of each department
+    work every (day, shift), which settles the coverage and cross department rows
+    that couple the departments. Each department is then rostered on its own in a
+    process pool, and answers with a cut when its allocation is infeasible or its
+    max_work - min_work is above the estimate of the master (logic based Benders).
+    Only the departments whose allocation changed are solved again. The master
+    objective is the lower bound, the departments rosters the incumbent.
+
+    Args:
+        instance (RosterInstance): roster data
+        time_limit (float, optional): wall time limit in seconds
+        mip_gap (float): relative gap at which the search stops
+        max_iterations (int): maximum number of master solves
+        workers (int, optional): number of worker processes, one per core if missing
+        monitor (SolveMonitor, optional): incumbent and stop hooks, polled once per master solve
+    """
+    start = time.perf_counter()
+    index = RosterIndex(instance, eliminate_forbidden=True)
+    A, lower, upper = stack_roster_blocks(build_roster_blocks(instance, index))
+    empty = np.diff(A.indptr) == 0
+    if ((lower[empty] > 0) | (upper[empty] < 0)).any():
+        # A shift nobody can work
+        return RosterResult(status="infeasible", runtime=time.perf_counter() - start)
+
+    problems, _ = split_by_department(index, A, lower, upper, roster_objective(index))
+    master = AllocationMaster(instance, index)
+    solved: Dict[Tuple[int, bytes], Tuple[str, Optional[np.ndarray]]] = {}
+    best_objective, best_solution, first_feasible_time = math.inf, None, None
+    bound = -math.inf
+    status = "time_limit"
+
+    def remaining() -> Optional[float]:
+        if time_limit is None:
+            return None
+        return time_limit - (time.perf_counter() - start)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(problems,),
+    ) as pool:
+        for _ in range(max_iterations):
+            if remaining() is not None and remaining() <= 0:
+                break
+            if monitor is not None and monitor.stop_requested():
+                status = "interrupted"
+                break
+            master_status, u, master_bound = master.solve(remaining())
+            if master_status == "infeasible":
+                # No allocation left, the incumbent (if any) is optimal
+                status = "infeasible" if best_solution is None else "optimal"
+                break
+            # Only a proven bound counts, the incumbent of a stopped master is not one
+            bound = max(bound, master_bound)
+            if master_status == "time_limit":
+                break
+            patterns = [
+                master.department_pattern(department, u)
+                for department in range(index.num_departments)
+            ]
+            futures = {
+                department: pool.submit(
+                    _solve_department, department, pattern, remaining()
+                )
+                for department, pattern in enumerate(patterns)
+                if (department, pattern.tobytes()) not in solved
+            }
+            for department, future in futures.items():
+                solved[(department, patterns[department].tobytes())] = future.result()
+            answers = [
+                solved[(department, pattern.tobytes())]
+                for department, pattern in enumerate(patterns)
+            ]
+            if any(answer_status == "time_limit" for answer_status, _ in answers):
+                break
+
+            x = np.zeros(index.num_vars)
+            objective = 0.0
+            for department, (problem, (_, values)) in enumerate(zip(problems, answers)):
+                if values is None:
+                    master.add_cut(department, u, math.inf)
+                    objective = math.inf
+                    continue
+                x[problem.columns] = values
+                spread = problem.objective @ values
+                objective += spread
+                if spread > u[master.theta_offset + department] + 1e-6:
+                    master.add_cut(department, u, spread)
+            if objective < best_objective - 1e-9:
+                best_objective, best_solution = objective, x
+                if first_feasible_time is None:
+                    first_feasible_time = time.perf_counter() - start
+                if monitor is not None:
+                    monitor.incumbent(
+                        objective,
+                        math.ceil(bound - 1e-6),
+                        time.perf_counter() - start,
+                    )
+            if best_solution is not None and best_objective - math.ceil(
+                bound - 1e-6
+            ) <= mip_gap * max(abs(best_objective), 1.0):
+                status = "optimal"
+                break
+
+    result = RosterResult(
+        status=status,
+        runtime=time.perf_counter() - start,
+        first_feasible_time=first_feasible_time,
+    )
+    if best_solution is not None:
+        result.objective = best_objective
+        result.gap = max(best_objective - math.ceil(bound - 1e-6), 0.0) / max(
+            abs(best_objective), 1e-10
+        )
+        result.roster = Roster(
+            index.doctor_names, index.assignment_values(best_solution)
+        )
+    return result
@@ -33,3 +33,33 @@ departments_constraint = {
     #
     "sala_operatoria": [],
 }
+
+# Sample roster of the obstetrics and gynecology specialization: doctor -> department
+doctors = {
+    # reparto_ostetricia
+    "alessia_berardi": "reparto_ostetricia",
+    "anna_romano": "reparto_ostetricia",
+    "virginia_magro": "reparto_ostetricia",
+    # ambulatorio_ostetricia
+    "gregorio_volpe": "ambulatorio_ostetricia",
+    "alessia_antonacci": "ambulatorio_ostetricia",
+    # day_hospital_ostetricia
+    "lucrezia_lamorgese": "day_hospital_ostetricia",
+    # reparto_ginecologia
+    "antonio_de_palma": "reparto_ginecologia",
+    "alessandra_ascani": "reparto_ginecologia",
+    # ambulatorio_ginecologia
+    "roberta_arseni": "ambulatorio_ginecologia",
+    "marica_di_viesti": "ambulatorio_ginecologia",
+    "simona_incamicia": "ambulatorio_ginecologia",
+    "flavia_denaro": "ambulatorio_ginecologia",
+    # sala_operatoria
+    "lucia_oliva": "sala_operatoria",
+}
+LOW_WORKING_DEPARTMENTS = ["reparto_ostetricia", "reparto_ginecologia"]
+HIGH_WORKING_DEPARTMENTS = [
+    "ambulatorio_ostetricia",
+    "ambulatorio_ginecologia",
+    "day_hospital_ostetricia",
+    "sala_operatoria",
+]
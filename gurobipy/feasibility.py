@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+from calendar_rules import coverage_bounds
+from instance import RosterInstance
+from matrix_constraints import RosterIndex, consecutive_window_index
+
+# Only explain_infeasibility deals with a Gurobi model, the capacity pre-check
+# runs without Gurobi installed
+if TYPE_CHECKING:
+    from gurobipy import MVar, Model
+
+# Issues of the same kind reported one by one before being summarized
+MAX_DETAILED_ISSUES = 10
+
+
+def _limit(issues: List[str], kind: str) -> List[str]:
+    if len(issues) <= MAX_DETAILED_ISSUES:
+        return issues
+    return issues[:MAX_DETAILED_ISSUES] + [
+        f"... and {len(issues) - MAX_DETAILED_ISSUES} more {kind}"
+    ]
+
+
+def _slot_label(index: RosterIndex, slot: int) -> str:
+    return f"day {slot // index.num_shifts + 1} shift {slot % index.num_shifts}"
+
+
+def max_feasible_shifts(index: RosterIndex, consecutive_limit: int) -> np.ndarray:
+    """Most shifts each doctor can work on its allowed slots with consecutive_limit free shifts after each
+
+    Taking the earliest allowed slot whenever the doctor is rested is optimal
+    for a single doctor, so one pass over the slots vectorized over the doctors
+    gives the exact maximum.
+    """
+    allowed = index.allowed.reshape(index.num_doctors, -1)
+    next_free = np.zeros(index.num_doctors, dtype=np.int64)
+    count = np.zeros(index.num_doctors, dtype=np.int64)
+    for slot in range(allowed.shape[1]):
+        take = allowed[:, slot] & (next_free <= slot)
+        count += take
+        next_free[take] = slot + consecutive_limit + 1
+    return count
+
+
+def check_capacity(instance: RosterInstance) -> List[str]:
+    """Necessary conditions for the roster to be feasible, checked without a solver
+
+    Compares the doctors available on every (day, shift), computed from the
+    department forbidden slots, the calendar and the carried rest, with the
+    required coverage, per shift, per window of consecutive_limit + 1 shifts
+    (a doctor works at most one of them) and over the whole horizon, and the
+    shifts every doctor must work with the most it can work. Days are reported
+    1-based from the first day of the horizon.
+
+    Returns:
+        List[str]: the violated conditions, empty if none is violated (the roster can still be infeasible)
+    """
+    index = RosterIndex(instance, eliminate_forbidden=True)
+    num_slots = index.num_days * index.num_shifts
+    allowed = index.allowed.reshape(index.num_doctors, num_slots)
+    lower, upper = coverage_bounds(instance)
+    required, allowed_most = lower.reshape(-1), upper.reshape(-1)
+    issues = _limit(
+        [
+            f"{_slot_label(index, slot)}: at least {required[slot]} doctors "
+            f"required but at most {allowed_most[slot]} allowed"
+            for slot in np.flatnonzero(required > allowed_most)
+        ],
+        "shifts with contradictory coverage",
+    )
+
+    available = allowed.sum(axis=0)
+    issues += _limit(
+        [
+            f"{_slot_label(index, slot)}: "
+            f"{available[slot]} doctors available, {required[slot]} required"
+            for slot in np.flatnonzero(available < required)
+        ],
+        "shifts without enough doctors",
+    )
+
+    windows = consecutive_window_index(num_slots, instance.consecutive_limit)
+    if windows.size:
+        cumulative = np.concatenate(
+            [np.zeros((index.num_doctors, 1), dtype=np.int64), allowed.cumsum(axis=1)],
+            axis=1,
+        )
+        in_window = cumulative[:, windows[:, -1] + 1] - cumulative[:, windows[:, 0]]
+        window_doctors = np.count_nonzero(in_window, axis=0)
+        window_required = required[windows].sum(axis=1)
+        issues += _limit(
+            [
+                f"{_slot_label(index, first)} to {_slot_label(index, last)}: "
+                f"{window_doctors[window]} doctors available for {windows.shape[1]} "
+                f"consecutive shifts needing {window_required[window]}, each can work only one"
+                for window, (first, last) in enumerate(windows[:, [0, -1]])
+                if window_doctors[window] < window_required[window]
+            ],
+            "windows without enough doctors",
+        )
+
+    min_shifts = int(index.num_days / index.num_doctors) if index.num_doctors else 0
+    max_shifts = min(min_shifts + 1 + instance.relaxation, instance.max_shifts)
+    if min_shifts > instance.max_shifts:
+        issues.append(
+            f"every doctor must work {min_shifts} shifts but max_shifts is "
+            f"{instance.max_shifts}"
+        )
+    most = np.minimum(
+        max_feasible_shifts(index, instance.consecutive_limit), max_shifts
+    )
+    issues += _limit(
+        [
+            f"doctor {index.doctor_names[doctor]} can work at most {most[doctor]} "
+            f"shifts, {min_shifts} required"
+            for doctor in np.flatnonzero(most < min_shifts)
+        ],
+        "doctors below the minimum",
+    )
+    if most.sum() < required.sum():
+        issues.append(
+            f"the doctors can work at most {most.sum()} shifts, "
+            f"{required.sum()} required"
+        )
+    max_coverage = allowed_most.sum()
+    if min_shifts * index.num_doctors > max_coverage:
+        issues.append(
+            f"the doctors must work at least {min_shifts * index.num_doctors} shifts, "
+            f"at most {max_coverage} can be covered"
+        )
+    return issues
+
+
+def _describe_row(
+    index: RosterIndex, cells: Tuple[np.ndarray, ...], columns: np.ndarray
+) -> str:
+    """Doctors, departments and days of the columns of a row
+
+    Args:
+        index (RosterIndex): roster axes
+        cells (Tuple[np.ndarray, ...]): np.nonzero(index.allowed), (doctor, day, shift) of every assignment column
+        columns (np.ndarray): columns of the row
+    """
+    doctors, days, shifts = cells
+    assignments = columns[columns < index.num_assignments]
+    parts = []
+    if assignments.size:
+        row_doctors = np.unique(doctors[assignments])
+        if row_doctors.size == 1:
+            parts.append(f"doctor {index.doctor_names[row_doctors[0]]}")
+        else:
+            departments = np.unique(index.doctor_department[row_doctors])
+            parts.append(
+                f"{row_doctors.size} doctors of "
+                + ", ".join(index.department_names[d] for d in departments)
+            )
+        slots = np.unique(days[assignments] * index.num_shifts + shifts[assignments])
+        first, last = slots[0], slots[-1]
+        if first == last:
+            parts.append(_slot_label(index, first))
+        else:
+            parts.append(f"{_slot_label(index, first)} to {_slot_label(index, last)}")
+    helping = columns[columns >= index.num_assignments] - index.num_assignments
+    if helping.size:
+        departments = np.unique(helping % index.num_departments)
+        parts.append(
+            "workload of " + ", ".join(index.department_names[d] for d in departments)
+        )
+    return ", ".join(parts)
+
+
+def explain_infeasibility(
+    model: Model, variables: MVar, index: RosterIndex
+) -> List[str]:
+    """Irreducible infeasible subset of an infeasible roster model built by build_gurobi_model
+
+    Returns:
+        List[str]: a summary of the constraints in the IIS by block, then one line per constraint with its doctors and days
+    """
+    model.computeIIS()
+    A = model.getA().tocsr()
+    cells = np.nonzero(index.allowed)
+    conflicts, blocks = [], Counter()
+    for constr in model.getConstrs():
+        if not constr.IISConstr:
+            continue
+        blocks[constr.ConstrName.split("[")[0]] += 1
+        columns = A.indices[A.indptr[constr.index] : A.indptr[constr.index + 1]]
+        conflicts.append(
+            f"{constr.ConstrName} ({constr.Sense} {constr.RHS:g}): "
+            + _describe_row(index, cells, columns)
+        )
+    for column in np.flatnonzero(np.asarray(variables.IISUB)):
+        conflicts.append(
+            f"upper bound of {_describe_row(index, cells, np.array([column]))}"
+        )
+    summary = "IIS: " + ", ".join(
+        f"{count} {name}" for name, count in blocks.most_common()
+    )
+    return [summary] + conflicts
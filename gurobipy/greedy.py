@@ -0,0 +1,132 @@
+import time
+
+import numpy as np
+from backends import solve_with_backend
+from calendar_rules import coverage_bounds
+from instance import RosterInstance
+from matrix_constraints import RosterIndex
+from repair import RosterState, local_search, roster_objective_value
+from roster import Roster
+from solve_result import RosterResult
+
+
+def greedy_assignment(
+    instance: RosterInstance, index: RosterIndex, seed: int = 0
+) -> np.ndarray:
+    """Fill the most constrained slot first with the doctor that worked the least
+
+    Like a DSATUR coloring: the next slot is the one with the fewest doctors
+    still available (department, carried rest, consecutive windows and the
+    shift cap of build_shifts_range_blocks and build_max_shifts_block), it
+    gets the available doctor with the lowest workload, then with the fewest
+    options left. A slot nobody can take anymore stays short.
+
+    Args:
+        instance (RosterInstance): roster data
+        index (RosterIndex): roster axes, the allowed slots are the availability matrix
+        seed (int): seed of the last tie breaking
+
+    Returns:
+        np.ndarray: (doctors, days, shifts) worked shifts, coverage, workload and cross department rows can still be violated
+    """
+    rng = np.random.default_rng(seed)
+    num_slots = index.num_days * index.num_shifts
+    limit = instance.consecutive_limit
+    required, _ = coverage_bounds(instance)
+    missing = required.reshape(-1).astype(np.int64)
+    min_shifts = int(index.num_days / index.num_doctors)
+    cap = min(min_shifts + 1 + instance.relaxation, instance.max_shifts)
+    tie = rng.random(index.num_doctors)
+
+    available = index.allowed.reshape(index.num_doctors, num_slots).copy()
+    worked = np.zeros((index.num_doctors, num_slots), dtype=bool)
+    workload = index.prior_workload.copy()
+    num_worked = np.zeros(index.num_doctors, dtype=np.int64)
+    while True:
+        options = available.sum(axis=0)
+        open_slots = np.flatnonzero((missing > 0) & (options > 0))
+        if open_slots.size == 0:
+            break
+        slot = open_slots[np.argmin(options[open_slots])]
+        candidates = np.flatnonzero(available[:, slot])
+        # np.lexsort sorts by the last key first
+        order = np.lexsort(
+            (
+                tie[candidates],
+                available[candidates].sum(axis=1),
+                workload[candidates],
+            )
+        )
+        doctor = candidates[order[0]]
+        worked[doctor, slot] = True
+        workload[doctor] += 1
+        num_worked[doctor] += 1
+        missing[slot] -= 1
+        # Nothing else in the windows of the shift, nor above the cap
+        available[doctor, max(slot - limit, 0) : slot + limit + 1] = False
+        if num_worked[doctor] >= cap:
+            available[doctor] = False
+    return worked.reshape(index.shape)
+
+
+def construct_roster(
+    instance: RosterInstance, time_limit: float = 5.0, seed: int = 0
+) -> RosterResult:
+    """Greedy roster polished by the local search of the repair, in milliseconds
+
+    Good enough for a preview and a MIP start, not optimized: the objective is
+    the fairness of the roster as it comes out of the heuristic.
+
+    Args:
+        instance (RosterInstance): roster data
+        time_limit (float): seconds of local search on the rules the greedy pass violates
+        seed (int): seed of the tie breaking
+
+    Returns:
+        RosterResult: status "feasible", or "violated" with the violated rules as conflicts
+    """
+    begin = time.perf_counter()
+    index = RosterIndex(instance, eliminate_forbidden=True)
+    worked = greedy_assignment(instance, index, seed)
+    state = RosterState.from_instance(instance, index, worked[index.allowed])
+    local_search(
+        index, state, np.zeros(state.x.size, dtype=bool), time_limit, seed=seed
+    )
+    worked = index.assignment_values(state.x.astype(np.float64))
+    runtime = time.perf_counter() - begin
+    feasible = state.violation() <= 1e-9
+    return RosterResult(
+        status="feasible" if feasible else "violated",
+        objective=roster_objective_value(index, worked),
+        runtime=runtime,
+        first_feasible_time=runtime if feasible else None,
+        roster=Roster(index.doctor_names, worked),
+        conflicts=state.violated_rules(),
+    )
+
+
+def solve_with_greedy_start(
+    backend: str,
+    instance: RosterInstance,
+    greedy_time_limit: float = 5.0,
+    **kwargs,
+) -> RosterResult:
+    """solve_with_backend with the constructed roster as warm start
+
+    The heuristic time is part of the runtime and of the first feasible time,
+    and its roster is the result if the solver ends without one (a backend
+    ignoring the warm start, a time limit hit before the first incumbent).
+    """
+    start = construct_roster(instance, greedy_time_limit)
+    result = solve_with_backend(
+        backend, instance, warm_start=start.assignment, **kwargs
+    )
+    result.runtime += start.runtime
+    if start.status == "feasible":
+        result.first_feasible_time = start.runtime
+        if result.roster is None and result.status != "infeasible":
+            result.roster = start.roster
+            result.objective = start.objective
+    elif result.first_feasible_time is not None:
+        result.first_feasible_time += start.runtime
+    return result
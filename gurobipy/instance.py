@@ -0,0 +1,130 @@
+import os
+import sys
+
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+)
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from departments_data import departments_constraint as default_departments_constraint
+from get_monthly_data import calendar_range, month_calendar
+
+
+@dataclass
+class CalendarRule:
+    """Rule on the (day, shift) slots matching all of its filters, a missing filter matches everything
+
+    Attributes:
+        department (str, optional): department the rule applies to, every department if missing
+        shifts (List[int], optional): shifts matched
+        days_of_week (List[int], optional): days of the week (0-6) matched, 7 (calendar_rules.HOLIDAY) matches the public holidays
+        days (List[int], optional): days of the horizon matched
+        forbidden (bool): nobody of the department can work the matched slots
+        min_doctors (int, optional): minimum number of doctors on the matched slots, instead of min_doctors_per_shift
+        max_doctors (int, optional): maximum number of doctors on the matched slots, instead of max_doctors_per_shift
+    """
+
+    department: Optional[str] = None
+    shifts: Optional[List[int]] = None
+    days_of_week: Optional[List[int]] = None
+    days: Optional[List[int]] = None
+    forbidden: bool = False
+    min_doctors: Optional[int] = None
+    max_doctors: Optional[int] = None
+
+
+@dataclass
+class RosterInstance:
+    """All the data needed to build a roster model, independent of the solver.
+
+    Attributes:
+        doctors (Dict[str, str]): doctor_name -> department
+        day_of_week (List[int]): day of the week (0-6) of every day of the horizon
+        departments_constraint (Dict[str, List[Tuple[int, int]]]): department -> forbidden (day_of_week, shift), day_of_week 7 (calendar_rules.HOLIDAY) is every public holiday
+        low_working_departments (List[str]): departments that should work less
+        high_working_departments (List[str]): departments that should work more
+        num_shifts (int): number of shifts per day
+        consecutive_limit (int): number of consecutive shifts after a worked one that must be free
+        relaxation (int): extra shifts allowed above the fair share of each doctor
+        max_shifts (int): hard cap on the shifts of each doctor
+        min_doctors_per_shift (int): minimum number of doctors per shift
+        max_doctors_per_shift (int): maximum number of doctors per shift
+        symmetry_breaking (bool): order the workloads of interchangeable doctors of the same department
+        last_worked (Dict[str, int]): doctor_name -> free slots between the last shift worked before the horizon and its start
+        prior_workload (Dict[str, int]): doctor_name -> shifts already worked before the horizon, counted in the fairness
+        holidays (List[int]): days of the horizon that are public holidays
+        calendar_rules (List[CalendarRule]): date specific forbidden slots and coverage, applied after departments_constraint
+    """
+
+    doctors: Dict[str, str]
+    day_of_week: List[int]
+    departments_constraint: Dict[str, List[Tuple[int, int]]] = field(
+        default_factory=lambda: dict(default_departments_constraint)
+    )
+    low_working_departments: List[str] = field(default_factory=list)
+    high_working_departments: List[str] = field(default_factory=list)
+    num_shifts: int = 2
+    consecutive_limit: int = 10
+    relaxation: int = 3
+    max_shifts: int = 6
+    min_doctors_per_shift: int = 1
+    max_doctors_per_shift: int = 1
+    symmetry_breaking: bool = False
+    last_worked: Dict[str, int] = field(default_factory=dict)
+    prior_workload: Dict[str, int] = field(default_factory=dict)
+    holidays: List[int] = field(default_factory=list)
+    calendar_rules: List[CalendarRule] = field(default_factory=list)
+
+    @classmethod
+    def from_month(cls, date: str, doctors: Dict[str, str], **kwargs):
+        """Build the instance of the month containing date, with its public holidays
+
+        Args:
+            date (str): Date in the format 'YYYY-MM-DD'
+            doctors (Dict[str, str]): doctor_name -> department
+        """
+        year, month = map(int, date.split("-")[:2])
+        month_days = month_calendar(year, month)
+        kwargs.setdefault("holidays", np.flatnonzero(month_days.holidays).tolist())
+        return cls(
+            doctors=doctors, day_of_week=month_days.day_of_week.tolist(), **kwargs
+        )
+
+    @classmethod
+    def from_dates(cls, start: str, num_days: int, doctors: Dict[str, str], **kwargs):
+        """Build the instance of num_days days from start, across month boundaries, with its public holidays
+
+        Args:
+            start (str): first day in the format 'YYYY-MM-DD'
+            num_days (int): length of the horizon
+            doctors (Dict[str, str]): doctor_name -> department
+        """
+        days = calendar_range(start, num_days)
+        kwargs.setdefault("holidays", np.flatnonzero(days.holidays).tolist())
+        return cls(doctors=doctors, day_of_week=days.day_of_week.tolist(), **kwargs)
+
+    @property
+    def num_days(self) -> int:
+        return len(self.day_of_week)
+
+    @property
+    def doctor_names(self) -> List[str]:
+        return list(self.doctors.keys())
+
+    @property
+    def dow_to_dayidx(self) -> Dict[int, List[int]]:
+        dow_days = defaultdict(list)
+        for day, dow in enumerate(self.day_of_week):
+            dow_days[dow].append(day)
+        return dow_days
+
+    @property
+    def departments_doctors(self) -> Dict[str, List[str]]:
+        departments_doctors = defaultdict(list)
+        for doctor, department in self.doctors.items():
+            departments_doctors[department].append(doctor)
+        return departments_doctors
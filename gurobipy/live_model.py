@@ -0,0 +1,248 @@
+import copy
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+import numpy as np
+from calendar_rules import NUM_DAY_TYPES, day_types
+from gurobipy import Env
+from instance import RosterInstance
+from matrix_constraints import carried_rest_mask, department_forbidden_mask
+from model_builder import build_gurobi_model
+from solve_result import RosterResult, SolveMonitor
+from solver import optimize_model
+
+
+@dataclass
+class LiveEdits:
+    """Every edit applied to a live model so far, enough to rebuild it
+
+    Attributes:
+        unavailable (Set[Tuple[str, int, int]]): (doctor_name, day, shift) the doctors cannot work
+        forbidden_slots (Dict[Tuple[str, int, int], bool]): (department, day_of_week, shift) -> forbidden, the last edit of each slot
+        max_shifts (Dict[str, int]): doctor_name -> cap replacing max_shifts
+    """
+
+    unavailable: Set[Tuple[str, int, int]] = field(default_factory=set)
+    forbidden_slots: Dict[Tuple[str, int, int], bool] = field(default_factory=dict)
+    max_shifts: Dict[str, int] = field(default_factory=dict)
+
+
+class LiveRosterModel:
+    """A built roster model kept alive to apply edits and re-optimize in place.
+
+    Department forbidden slots and unavailabilities are upper bounds of the
+    assignment variables and the per doctor caps are the right hand sides of the
+    max_shifts rows, so every edit is a bound or rhs change instead of a rebuild.
+    """
+
+    def __init__(
+        self,
+        instance: RosterInstance,
+        env: Optional[Env] = None,
+        edits: Optional[LiveEdits] = None,
+    ) -> None:
+        """
+        Args:
+            instance (RosterInstance): roster data before any edit
+            env (Env, optional): Gurobi environment
+            edits (LiveEdits, optional): edits of an earlier live model of the same roster to replay, the ones on doctors or departments not in the instance are dropped
+        """
+        # base_instance is the instance the model was built from, instance tracks the edits
+        self.base_instance = copy.deepcopy(instance)
+        self.instance = copy.deepcopy(instance)
+        # Per doctor edits make the doctors of a department distinguishable
+        self.instance.symmetry_breaking = False
+        self.model, self.variables, self.index = build_gurobi_model(
+            self.instance, env=env, forbidden_as_bounds=True
+        )
+        self._doctor_position = {
+            doctor: idx for idx, doctor in enumerate(self.index.doctor_names)
+        }
+        self._assignments = self.variables[: self.index.num_assignments].reshape(
+            self.index.shape
+        )
+        self._forbidden = self._department_forbidden()
+        self._carried_rest = carried_rest_mask(
+            self.index, self.instance.last_worked, self.instance.consecutive_limit
+        )
+        self.edits = LiveEdits()
+        self.last_used = time.monotonic()
+        if edits is not None:
+            self._replay(edits)
+
+    def _replay(self, edits: LiveEdits) -> None:
+        departments = set(self.index.department_names)
+        for (
+            department,
+            day_of_week,
+            shift,
+        ), forbidden in edits.forbidden_slots.items():
+            if department in departments:
+                self.set_forbidden_slot(department, day_of_week, shift, forbidden)
+        for doctor, day, shift in edits.unavailable:
+            if doctor in self._doctor_position:
+                self.add_unavailability(doctor, day, shift)
+        for doctor, max_shifts in edits.max_shifts.items():
+            if doctor in self._doctor_position:
+                self.set_max_shifts(doctor, max_shifts)
+
+    def _department_forbidden(self) -> np.ndarray:
+        return department_forbidden_mask(
+            self.index,
+            self.instance.day_of_week,
+            self.instance.departments_constraint,
+            self.instance.holidays,
+            self.instance.calendar_rules,
+        )
+
+    def _set_upper_bound(self, doctor_idx: int, days: np.ndarray, shift: int) -> None:
+        for day in days:
+            allowed = (
+                not self._forbidden[doctor_idx, day, shift]
+                and not self._carried_rest[doctor_idx, day, shift]
+                and (self.index.doctor_names[doctor_idx], int(day), shift)
+                not in self.edits.unavailable
+            )
+            self._assignments[doctor_idx, day, shift].UB = 1.0 if allowed else 0.0
+
+    def check_slot(self, doctor_name: str, day: int, shift: int) -> int:
+        """Position of the doctor of a (doctor_name, day, shift) slot
+
+        Raises:
+            ValueError: if the doctor is unknown or the slot is out of the horizon
+        """
+        if doctor_name not in self._doctor_position:
+            raise ValueError(f"Unknown doctor {doctor_name}")
+        if not (0 <= day < self.index.num_days and 0 <= shift < self.index.num_shifts):
+            raise ValueError(f"Slot ({day}, {shift}) out of the horizon")
+        return self._doctor_position[doctor_name]
+
+    def add_unavailability(self, doctor_name: str, day: int, shift: int) -> None:
+        """The doctor cannot work the shift of the day"""
+        doctor_idx = self.check_slot(doctor_name, day, shift)
+        self.edits.unavailable.add((doctor_name, day, shift))
+        self._set_upper_bound(doctor_idx, [day], shift)
+
+    def remove_unavailability(self, doctor_name: str, day: int, shift: int) -> None:
+        doctor_idx = self.check_slot(doctor_name, day, shift)
+        self.edits.unavailable.discard((doctor_name, day, shift))
+        self._set_upper_bound(doctor_idx, [day], shift)
+
+    def set_max_shifts(self, doctor_name: str, max_shifts: int) -> None:
+        """Change the cap on the shifts of one doctor (MAX_SHIFTS in main.py)"""
+        constraints = self.model._constraints["max_shifts"]
+        constraints[self._doctor_position[doctor_name]].RHS = max_shifts
+        self.edits.max_shifts[doctor_name] = max_shifts
+
+    def set_forbidden_slot(
+        self, department: str, day_of_week: int, shift: int, forbidden: bool = True
+    ) -> None:
+        """Forbid (or allow again) a (day_of_week, shift) slot to all the doctors of a department
+
+        Raises:
+            ValueError: if the day of the week or the shift is out of range
+        """
+        if not (
+            0 <= day_of_week < NUM_DAY_TYPES and 0 <= shift < self.index.num_shifts
+        ):
+            raise ValueError(f"Slot ({day_of_week}, {shift}) out of the week")
+        self.edits.forbidden_slots[(department, day_of_week, shift)] = forbidden
+        slots = self.instance.departments_constraint.setdefault(department, [])
+        if forbidden and (day_of_week, shift) not in slots:
+            slots.append((day_of_week, shift))
+        elif not forbidden and (day_of_week, shift) in slots:
+            slots.remove((day_of_week, shift))
+
+        # A slot allowed again can still be forbidden by a calendar rule
+        self._forbidden = self._department_forbidden()
+        days = np.flatnonzero(
+            day_types(self.instance.day_of_week, self.instance.holidays)[:, day_of_week]
+        )
+        for doctor_idx in self.index.department_doctors(department):
+            self._set_upper_bound(doctor_idx, days, shift)
+
+    def optimize(self, monitor: Optional[SolveMonitor] = None) -> RosterResult:
+        """Re-optimize starting from the last roster, Gurobi repairs it if an edit broke it
+
+        Args:
+            monitor (SolveMonitor, optional): incumbent and stop hooks of an anytime solve
+        """
+        self.last_used = time.monotonic()
+        if self.model.SolCount > 0:
+            self.variables.Start = self.variables.X
+        return optimize_model(self.model, self.variables, self.index, monitor=monitor)
+
+    def memory_bytes(self) -> int:
+        """Rough estimate of the memory held by the Gurobi model"""
+        self.model.update()
+        return 16 * self.model.NumNZs + 128 * (
+            self.model.NumVars + self.model.NumConstrs
+        )
+
+    def dispose(self) -> None:
+        self.model.dispose()
+
+
+class ModelCache:
+    """Live roster models by key (e.g. (specialization, month)) evicted by memory budget.
+
+    When the estimated memory of the cached models exceeds the budget the least
+    recently used models are disposed first, models idle for more than max_idle
+    seconds are always disposed.
+    """
+
+    def __init__(
+        self, memory_budget: int = 512 * 1024**2, max_idle: Optional[float] = None
+    ) -> None:
+        self.memory_budget = memory_budget
+        self.max_idle = max_idle
+        self._models: "OrderedDict[Hashable, LiveRosterModel]" = OrderedDict()
+        self._memory = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    @property
+    def memory_usage(self) -> int:
+        return sum(self._memory.values())
+
+    def get(self, key: Hashable) -> Optional[LiveRosterModel]:
+        live_model = self._models.get(key)
+        if live_model is not None:
+            self._models.move_to_end(key)
+            live_model.last_used = time.monotonic()
+        return live_model
+
+    def put(self, key: Hashable, live_model: LiveRosterModel) -> None:
+        self.discard(key)
+        self._models[key] = live_model
+        self._memory[key] = live_model.memory_bytes()
+        self.evict(keep=key)
+
+    def discard(self, key: Hashable) -> None:
+        live_model = self._models.pop(key, None)
+        self._memory.pop(key, None)
+        if live_model is not None:
+            live_model.dispose()
+
+    def evict(self, keep: Optional[Hashable] = None) -> None:
+        """Dispose idle models, then the least recently used until the budget is met"""
+        if self.max_idle is not None:
+            now = time.monotonic()
+            for key, live_model in list(self._models.items()):
+                if key != keep and now - live_model.last_used > self.max_idle:
+                    self.discard(key)
+        for key in list(self._models):
+            if self.memory_usage <= self.memory_budget:
+                break
+            if key != keep:
+                self.discard(key)
+
+    def clear(self) -> None:
+        for key in list(self._models):
+            self.discard(key)
@@ -5,50 +5,50 @@ sys.path.append(
     os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
 )
 
+import datetime
 from collections import defaultdict
 
+from calendar_rules import coverage_bounds, department_forbidden_slots
 from constraints import *
-from departments_data import ID_TO_WEEKDAY_NAME, SHIFT_NAMES
+from departments_data import (
+    HIGH_WORKING_DEPARTMENTS,
+    LOW_WORKING_DEPARTMENTS,
+    SHIFT_NAMES,
+    doctors,
+)
 
-from get_monthly_data import get_monthly_data
+from feasibility import check_capacity
 from gurobipy import GRB, Model
+from instance import RosterInstance
+from roster import Roster
 
 date = input("Enter the date: ")
 month = int(date.split("-")[1])
 year = int(date.split("-")[0])
 MAX_SHIFTS = 6
-LOW_WORKING_DEPARTMENTS = ["reparto_ostetricia", "reparto_ginecologia"]
-HIGH_WORKING_DEPARTMENTS = [
-    "ambulatorio_ostetricia",
-    "ambulatorio_ginecologia",
-    "day_hospital_ostetricia",
-    "sala_operatoria",
-]
-
-idx_dow, dow_idxs = get_monthly_data(date)
-num_days = len(idx_dow)
-doctors = {
-    # reparto_ostetricia
-    "alessia_berardi": "reparto_ostetricia",
-    "anna_romano": "reparto_ostetricia",
-    "virginia_magro": "reparto_ostetricia",
-    # ambulatorio_ostetricia
-    "gregorio_volpe": "ambulatorio_ostetricia",
-    "alessia_antonacci": "ambulatorio_ostetricia",
-    # day_hospital_ostetricia
-    "lucrezia_lamorgese": "day_hospital_ostetricia",
-    # reparto_ginecologia
-    "antonio_de_palma": "reparto_ginecologia",
-    "alessandra_ascani": "reparto_ginecologia",
-    # ambulatorio_ginecologia
-    "roberta_arseni": "ambulatorio_ginecologia",
-    "marica_di_viesti": "ambulatorio_ginecologia",
-    "simona_incamicia": "ambulatorio_ginecologia",
-    "flavia_denaro": "ambulatorio_ginecologia",
-    # sala_operatoria
-    "lucia_oliva": "sala_operatoria",
-}
+SYMMETRY_BREAKING = False
+# One workload variable per doctor instead of the full sum in every workload row
+AUXILIARY_WORKLOAD = False
+
+# The month with its public holidays, calendar_rules adds date specific rules
+instance = RosterInstance.from_month(
+    date,
+    doctors,
+    low_working_departments=LOW_WORKING_DEPARTMENTS,
+    high_working_departments=HIGH_WORKING_DEPARTMENTS,
+    consecutive_limit=10,
+    relaxation=3,
+    max_shifts=MAX_SHIFTS,
+)
+
+# Reject the impossible requests before building anything
+issues = check_capacity(instance)
+if issues:
+    print("The roster is infeasible:")
+    print("\n".join(issues))
+    sys.exit(1)
 
+num_days = instance.num_days
 dperartments_doctors = defaultdict(list)
 for doctor, dep in doctors.items():
     dperartments_doctors[dep].append(doctor)
@@ -56,9 +56,17 @@ for doctor, dep in doctors.items():
 
 # Start Building constraints
 model = Model("Shifts-Manager")
-variables = model.addVars(
-    list(doctors.keys()), list(range(num_days)), [0, 1], vtype=GRB.BINARY, name="x"
+# Department forbidden slots (weekly, holidays and calendar rules) get no variable
+forbidden = department_forbidden_slots(
+    list(dperartments_doctors),
+    instance.num_shifts,
+    instance.day_of_week,
+    instance.departments_constraint,
+    instance.holidays,
+    instance.calendar_rules,
 )
+variables = build_assignment_vars(model, doctors, list(dperartments_doctors), forbidden)
+doctor_names = list(doctors.keys())
 max_work_vars = model.addVars(
     list(dperartments_doctors.keys()), vtype=GRB.CONTINUOUS, name="max_work_vars"
 )
@@ -66,20 +74,24 @@ min_work_vars = model.addVars(
     list(dperartments_doctors.keys()), vtype=GRB.CONTINUOUS, name="min_work_vars"
 )
 # max_worker_vars =
+# Shared by every builder below, summed once per doctor
+workload = workload_expressions(model, variables, auxiliary=AUXILIARY_WORKLOAD)
 
 # Consecutive days constraint
 build_consecutive_shift_constraint(
-    model, variables, list(doctors.keys()), num_days, num_shifts=2, consecutive_limit=10
+    model,
+    variables,
+    list(doctors.keys()),
+    num_days,
+    num_shifts=instance.num_shifts,
+    consecutive_limit=10,
 )
 
 # Custom constraints None for now
 
 # Min and Max shifts per doctor
-build_doctors_per_shift_constraint(model, variables, num_days)
-
-# Department constraints
-for doctor, department in doctors.items():
-    build_department_constraints(model, variables, department, doctor, dow_idxs)
+min_doctors, max_doctors = coverage_bounds(instance)
+build_doctors_per_shift_constraint(model, variables, min_doctors, max_doctors)
 
 # STRATEGY 1 contraints
 build_shifts_range_contraints(
@@ -96,9 +108,7 @@ for low_dep in LOW_WORKING_DEPARTMENTS:
         )
 
 for doctor in doctors:
-    model.addConstr(
-        variables.sum(doctor, "*", "*") <= MAX_SHIFTS, f"{doctor}_max_shifts"
-    )
+    model.addConstr(workload[doctor] <= MAX_SHIFTS, f"{doctor}_max_shifts")
 
 for dep, doctors in dperartments_doctors.items():
     build_luck_worker_constraint(
@@ -107,6 +117,8 @@ for dep, doctors in dperartments_doctors.items():
     build_luck_worker_constraint(
         model, variables, min_work_vars, (dep, doctors), mode="luckiest"
     )
+    if SYMMETRY_BREAKING:
+        build_symmetry_breaking_constraint(model, variables, (dep, doctors))
 
 
 # model.addConstr(variables.sum("r_gine_1", "*", "*") <= 4, "r_gine_1_3_shifts")
@@ -126,11 +138,20 @@ model.setObjective(max_work_vars.sum("*") - min_work_vars.sum("*"), GRB.MINIMIZE
 model.optimize()
 
 if model.status == GRB.OPTIMAL:
-    for var in variables:
-        to_print = f"{var[0]}"
-        if variables[var].x:
-            to_print += f" is working on {ID_TO_WEEKDAY_NAME[idx_dow[var[1]]]} | {year}-{month}-{var[1] + 1} | {SHIFT_NAMES[var[2]]}"
-        else:
-            to_print += f" is not working on {ID_TO_WEEKDAY_NAME[idx_dow[var[1]]]} | {year}-{month}-{var[1] + 1} | {SHIFT_NAMES[var[2]]}"
-
-        print(to_print)
+    values = model.getAttr("X", variables)
+    roster = Roster.from_assignment(
+        [slot for slot, value in values.items() if value > 0.5],
+        doctor_names,
+        num_days,
+        len(SHIFT_NAMES),
+        start=datetime.date(year, month, 1),
+        shift_names=SHIFT_NAMES,
+    )
+    # Only the worked shifts, one CSV row each
+    roster.to_csv(sys.stdout)
+elif model.status in (GRB.INFEASIBLE, GRB.INF_OR_UNBD):
+    model.computeIIS()
+    print("The roster is infeasible, conflicting constraints:")
+    for constr in model.getConstrs():
+        if constr.IISConstr:
+            print(constr.ConstrName)
@@ -0,0 +1,481 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from calendar_rules import department_forbidden_slots
+from instance import CalendarRule, RosterInstance
+
+
+class ConstraintBlock(NamedTuple):
+    """A block of rows A @ x (sense) rhs over the columns of a RosterIndex"""
+
+    name: str
+    A: sp.csr_matrix
+    sense: str  # "<", ">" or "="
+    rhs: np.ndarray
+
+
+class RosterIndex:
+    """Integer axes of the roster and the column layout of the matrix model.
+
+    Columns are the binary assignments (doctor, day, shift) in C order, followed by
+    one max_work and one min_work continuous column per department. With
+    eliminate_forbidden the slots forbidden by the department of a doctor (or by
+    the rest carried over from before the horizon) get no column at all, so they
+    never reach the solver.
+    """
+
+    def __init__(
+        self, instance: RosterInstance, eliminate_forbidden: bool = False
+    ) -> None:
+        self.doctor_names = instance.doctor_names
+        self.department_names = list(dict.fromkeys(instance.doctors.values()))
+        department_position = {
+            department: idx for idx, department in enumerate(self.department_names)
+        }
+        self.doctor_department = np.array(
+            [department_position[instance.doctors[d]] for d in self.doctor_names],
+            dtype=np.int64,
+        )
+        self.num_doctors = len(self.doctor_names)
+        self.num_departments = len(self.department_names)
+        self.num_days = instance.num_days
+        self.num_shifts = instance.num_shifts
+        self.prior_workload = np.array(
+            [instance.prior_workload.get(d, 0) for d in self.doctor_names],
+            dtype=np.float64,
+        )
+        self.allowed = np.ones(self.shape, dtype=bool)
+        if eliminate_forbidden:
+            self.allowed &= ~roster_forbidden_mask(self, instance)
+        self.num_assignments = int(np.count_nonzero(self.allowed))
+        self._assignment_columns = np.full(self.shape, -1, dtype=np.int64)
+        self._assignment_columns[self.allowed] = np.arange(
+            self.num_assignments, dtype=np.int64
+        )
+        self.max_work_offset = self.num_assignments
+        self.min_work_offset = self.num_assignments + self.num_departments
+        self.num_vars = self.num_assignments + 2 * self.num_departments
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.num_doctors, self.num_days, self.num_shifts
+
+    def assignment_columns(self) -> np.ndarray:
+        """Column of every (doctor, day, shift) as a (doctors, days, shifts) array, -1 if eliminated"""
+        return self._assignment_columns
+
+    def assignment_values(self, values: np.ndarray) -> np.ndarray:
+        """Scatter a solution vector into a (doctors, days, shifts) boolean array"""
+        assigned = np.zeros(self.shape, dtype=bool)
+        assigned[self.allowed] = values[: self.num_assignments] > 0.5
+        return assigned
+
+    def department_doctors(self, department: str) -> np.ndarray:
+        if department not in self.department_names:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(
+            self.doctor_department == self.department_names.index(department)
+        )
+
+
+def _build_block(
+    index: RosterIndex,
+    name: str,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    vals: np.ndarray,
+    num_rows: int,
+    sense: str,
+    rhs: np.ndarray,
+) -> ConstraintBlock:
+    # Eliminated slots have no column, their terms are dropped
+    kept = cols >= 0
+    A = sp.csr_matrix(
+        (vals[kept], (rows[kept], cols[kept])),
+        shape=(num_rows, index.num_vars),
+        dtype=np.float64,
+    )
+    return ConstraintBlock(name, A, sense, np.asarray(rhs, dtype=np.float64))
+
+
+def _workload_rows(index: RosterIndex) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows and columns of the doctors workload sum(doctor, "*", "*")"""
+    slots = index.num_days * index.num_shifts
+    rows = np.repeat(np.arange(index.num_doctors, dtype=np.int64), slots)
+    return rows, index.assignment_columns().reshape(-1)
+
+
+def consecutive_window_index(num_slots: int, consecutive_limit: int) -> np.ndarray:
+    """Slot positions of every window of consecutive_limit + 1 consecutive shifts
+
+    Args:
+        num_slots (int): number of (day, shift) slots of a doctor
+        consecutive_limit (int): number of shifts after a worked one that must be free
+
+    Returns:
+        np.ndarray: (num_windows, consecutive_limit + 1) array, row i is i, i + 1, ..., i + consecutive_limit
+    """
+    num_windows = max(num_slots - consecutive_limit, 0)
+    return (
+        np.arange(num_windows, dtype=np.int64)[:, None]
+        + np.arange(consecutive_limit + 1, dtype=np.int64)[None, :]
+    )
+
+
+def build_consecutive_shift_block(
+    index: RosterIndex, consecutive_limit: int = 1
+) -> ConstraintBlock:
+    """At most one worked shift in every window of consecutive_limit + 1 shifts of each doctor
+
+    Args:
+        index (RosterIndex): roster axes
+        consecutive_limit (int): number of shifts after a worked one that must be free
+    """
+    slots = index.num_days * index.num_shifts
+    windows = consecutive_window_index(slots, consecutive_limit)
+    doctor_slots = index.assignment_columns().reshape(index.num_doctors, slots)
+    cols = doctor_slots[:, windows].reshape(-1, windows.shape[1])
+    # A window with at most one variable left can never be violated
+    cols = cols[np.count_nonzero(cols >= 0, axis=1) > 1].reshape(-1)
+    num_rows = cols.size // windows.shape[1]
+    rows = np.repeat(np.arange(num_rows, dtype=np.int64), windows.shape[1])
+    return _build_block(
+        index,
+        f"no_consecutive_{consecutive_limit}",
+        rows,
+        cols,
+        np.ones(cols.size),
+        num_rows,
+        "<",
+        np.ones(num_rows),
+    )
+
+
+def build_doctors_per_shift_blocks(
+    index: RosterIndex,
+    min_doctors_per_shift: int = 1,
+    max_doctors_per_shift: int = 1,
+    coverage: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> List[ConstraintBlock]:
+    """Between min_doctors_per_shift and max_doctors_per_shift doctors on every (day, shift)
+
+    Args:
+        index (RosterIndex): roster axes
+        min_doctors_per_shift (int): Minimum number of doctors per shift
+        max_doctors_per_shift (int): Maximum number of doctors per shift
+        coverage (Tuple[np.ndarray, np.ndarray], optional): (days, shifts) minimum and maximum of every slot (from calendar_rules.coverage_bounds), instead of the two above
+    """
+    num_rows = index.num_days * index.num_shifts
+    cols = index.assignment_columns().transpose(1, 2, 0).reshape(-1)
+    rows = np.repeat(np.arange(num_rows, dtype=np.int64), index.num_doctors)
+    vals = np.ones(cols.size)
+    if coverage is None:
+        lower = np.full(num_rows, min_doctors_per_shift)
+        upper = np.full(num_rows, max_doctors_per_shift)
+    else:
+        lower, upper = coverage[0].reshape(-1), coverage[1].reshape(-1)
+    return [
+        _build_block(
+            index,
+            f"min_{min_doctors_per_shift}_per_shift",
+            rows,
+            cols,
+            vals,
+            num_rows,
+            ">",
+            lower,
+        ),
+        _build_block(
+            index,
+            f"max_{max_doctors_per_shift}_per_shift",
+            rows,
+            cols,
+            vals,
+            num_rows,
+            "<",
+            upper,
+        ),
+    ]
+
+
+def build_shifts_range_blocks(
+    index: RosterIndex, relaxation: int = 0
+) -> List[ConstraintBlock]:
+    """Each doctor works at least floor(N/K) and at most floor(N/K) + 1 + relaxation shifts
+
+    Args:
+        index (RosterIndex): roster axes
+        relaxation (int): extra shifts allowed above the fair share
+    """
+    min_shifts = int(index.num_days / index.num_doctors)
+    max_shifts = min_shifts + 1 + relaxation
+    rows, cols = _workload_rows(index)
+    vals = np.ones(cols.size)
+    return [
+        _build_block(
+            index,
+            f"min_shifts_{min_shifts}",
+            rows,
+            cols,
+            vals,
+            index.num_doctors,
+            ">",
+            np.full(index.num_doctors, min_shifts),
+        ),
+        _build_block(
+            index,
+            f"max_shifts_{max_shifts}",
+            rows,
+            cols,
+            vals,
+            index.num_doctors,
+            "<",
+            np.full(index.num_doctors, max_shifts),
+        ),
+    ]
+
+
+def build_max_shifts_block(index: RosterIndex, max_shifts: int) -> ConstraintBlock:
+    """Hard cap on the shifts of each doctor"""
+    rows, cols = _workload_rows(index)
+    return _build_block(
+        index,
+        "max_shifts",
+        rows,
+        cols,
+        np.ones(cols.size),
+        index.num_doctors,
+        "<",
+        np.full(index.num_doctors, max_shifts),
+    )
+
+
+def department_forbidden_mask(
+    index: RosterIndex,
+    day_of_week: List[int],
+    departments_constraint: Dict[str, List[Tuple[int, int]]],
+    holidays: Sequence[int] = (),
+    rules: Sequence[CalendarRule] = (),
+) -> np.ndarray:
+    """(doctors, days, shifts) mask of the slots forbidden by the department of each doctor
+
+    Args:
+        index (RosterIndex): roster axes
+        day_of_week (List[int]): day of the week of every day of the horizon
+        departments_constraint (Dict[str, List[Tuple[int, int]]]): department -> forbidden (day_of_week, shift)
+        holidays (Sequence[int]): public holidays of the horizon
+        rules (Sequence[CalendarRule]): calendar rules, the forbidden ones are applied
+    """
+    forbidden_slots = department_forbidden_slots(
+        index.department_names,
+        index.num_shifts,
+        day_of_week,
+        departments_constraint,
+        holidays,
+        rules,
+    )
+    return forbidden_slots[index.doctor_department]
+
+
+def carried_rest_mask(
+    index: RosterIndex, last_worked: Dict[str, int], consecutive_limit: int
+) -> np.ndarray:
+    """(doctors, days, shifts) mask of the first slots still in the rest of a shift worked before the horizon
+
+    Args:
+        index (RosterIndex): roster axes
+        last_worked (Dict[str, int]): doctor_name -> free slots between the last shift worked before the horizon and its start
+        consecutive_limit (int): number of shifts after a worked one that must be free
+    """
+    mask = np.zeros(index.shape, dtype=bool)
+    doctor_slots = mask.reshape(index.num_doctors, -1)
+    for doctor, name in enumerate(index.doctor_names):
+        if name in last_worked:
+            doctor_slots[doctor, : max(consecutive_limit - last_worked[name], 0)] = True
+    return mask
+
+
+def roster_forbidden_mask(index: RosterIndex, instance: RosterInstance) -> np.ndarray:
+    """Slots nobody can work: forbidden by the department or in the carried over rest"""
+    return department_forbidden_mask(
+        index,
+        instance.day_of_week,
+        instance.departments_constraint,
+        instance.holidays,
+        instance.calendar_rules,
+    ) | carried_rest_mask(index, instance.last_worked, instance.consecutive_limit)
+
+
+def _zero_block(index: RosterIndex, name: str, mask: np.ndarray) -> ConstraintBlock:
+    """Fix to zero the slots of a (doctors, days, shifts) mask that have a column"""
+    cols = index.assignment_columns()[mask]
+    cols = cols[cols >= 0]
+    return _build_block(
+        index,
+        name,
+        np.arange(cols.size, dtype=np.int64),
+        cols,
+        np.ones(cols.size),
+        cols.size,
+        "=",
+        np.zeros(cols.size),
+    )
+
+
+def build_department_block(
+    index: RosterIndex,
+    day_of_week: List[int],
+    departments_constraint: Dict[str, List[Tuple[int, int]]],
+    holidays: Sequence[int] = (),
+    rules: Sequence[CalendarRule] = (),
+) -> ConstraintBlock:
+    """Fix to zero the (day_of_week, shift) slots forbidden by the department of each doctor
+
+    Args:
+        index (RosterIndex): roster axes
+        day_of_week (List[int]): day of the week of every day of the horizon
+        departments_constraint (Dict[str, List[Tuple[int, int]]]): department -> forbidden (day_of_week, shift)
+        holidays (Sequence[int]): public holidays of the horizon
+        rules (Sequence[CalendarRule]): calendar rules, the forbidden ones are applied
+    """
+    return _zero_block(
+        index,
+        "department_constraint",
+        department_forbidden_mask(
+            index, day_of_week, departments_constraint, holidays, rules
+        ),
+    )
+
+
+def build_carried_rest_block(
+    index: RosterIndex, last_worked: Dict[str, int], consecutive_limit: int
+) -> ConstraintBlock:
+    """Fix to zero the first slots of the doctors still resting from a shift worked before the horizon"""
+    return _zero_block(
+        index,
+        f"carried_rest_{consecutive_limit}",
+        carried_rest_mask(index, last_worked, consecutive_limit),
+    )
+
+
+def build_cross_department_block(
+    index: RosterIndex,
+    low_working_departments: List[str],
+    high_working_departments: List[str],
+) -> ConstraintBlock:
+    """For every (low, high) pair the low department must work less than the high one
+
+    sum(low) <= sum(high) * |low| / |high| - |low| / |high|, the sums include the
+    prior workload of the doctors. Pairs with an empty department are skipped.
+    """
+    rows, cols, vals, rhs = [], [], [], []
+    num_rows = 0
+    doctor_slots = index.assignment_columns().reshape(index.num_doctors, -1)
+    for low_department in low_working_departments:
+        low_doctors = index.department_doctors(low_department)
+        for high_department in high_working_departments:
+            high_doctors = index.department_doctors(high_department)
+            if low_doctors.size == 0 or high_doctors.size == 0:
+                continue
+            ratio = low_doctors.size / high_doctors.size
+            low_cols = doctor_slots[low_doctors].reshape(-1)
+            high_cols = doctor_slots[high_doctors].reshape(-1)
+            cols.extend([low_cols, high_cols])
+            vals.extend([np.ones(low_cols.size), np.full(high_cols.size, -ratio)])
+            rows.append(np.full(low_cols.size + high_cols.size, num_rows))
+            rhs.append(
+                -ratio
+                - index.prior_workload[low_doctors].sum()
+                + ratio * index.prior_workload[high_doctors].sum()
+            )
+            num_rows += 1
+    empty = np.zeros(0, dtype=np.int64)
+    return _build_block(
+        index,
+        "cross_department_constraint",
+        np.concatenate(rows) if rows else empty,
+        np.concatenate(cols) if cols else empty,
+        np.concatenate(vals) if vals else np.zeros(0),
+        num_rows,
+        "<",
+        np.array(rhs),
+    )
+
+
+def interchangeable_doctor_groups(index: RosterIndex) -> List[np.ndarray]:
+    """Groups of doctors of the same department with the same allowed slots and prior workload
+
+    The doctors of a group have identical rows in every block, so any permutation
+    inside a group maps a roster to another one with the same objective.
+    """
+    groups = {}
+    for doctor in range(index.num_doctors):
+        key = (
+            index.doctor_department[doctor],
+            index.prior_workload[doctor],
+            index.allowed[doctor].tobytes(),
+        )
+        groups.setdefault(key, []).append(doctor)
+    return [np.array(group) for group in groups.values() if len(group) > 1]
+
+
+def build_symmetry_block(index: RosterIndex) -> ConstraintBlock:
+    """Order the workloads of interchangeable doctors, workload[d1] >= workload[d2] >= ...
+
+    Only one roster per permutation of each group stays feasible, which prunes the
+    symmetric branches the solver would otherwise explore.
+    """
+    doctor_slots = index.assignment_columns().reshape(index.num_doctors, -1)
+    groups = interchangeable_doctor_groups(index)
+    first = np.concatenate([group[:-1] for group in groups] or [[]]).astype(np.int64)
+    second = np.concatenate([group[1:] for group in groups] or [[]]).astype(np.int64)
+    num_rows = first.size
+    rows = np.repeat(np.arange(num_rows, dtype=np.int64), doctor_slots.shape[1])
+    cols = np.concatenate(
+        [doctor_slots[first].reshape(-1), doctor_slots[second].reshape(-1)]
+    )
+    return _build_block(
+        index,
+        "symmetry_breaking",
+        np.concatenate([rows, rows]),
+        cols,
+        np.concatenate([np.ones(rows.size), -np.ones(rows.size)]),
+        num_rows,
+        ">",
+        np.zeros(num_rows),
+    )
+
+
+def build_luck_worker_block(
+    index: RosterIndex, mode: str = "luckiest"
+) -> ConstraintBlock:
+    """Bound the department helping variable by the workload of each of its doctors
+
+    The workload includes the prior workload of the doctor, so fairness spans the
+    periods already planned.
+
+    Args:
+        index (RosterIndex): roster axes
+        mode (str): "luckiest" min_work[department] <= workload, "unluckiest" max_work[department] >= workload
+    """
+    rows, cols = _workload_rows(index)
+    if mode == "luckiest":
+        helping_cols = index.min_work_offset + index.doctor_department
+        sense = "<"
+    elif mode == "unluckiest":
+        helping_cols = index.max_work_offset + index.doctor_department
+        sense = ">"
+    else:
+        raise ValueError(f"Invalid mode {mode}")
+    doctors = np.arange(index.num_doctors, dtype=np.int64)
+    return _build_block(
+        index,
+        f"{mode}_worker",
+        np.concatenate([rows, doctors]),
+        np.concatenate([cols, helping_cols]),
+        np.concatenate([-np.ones(cols.size), np.ones(index.num_doctors)]),
+        index.num_doctors,
+        sense,
+        index.prior_workload,
+    )
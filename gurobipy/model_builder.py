@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from calendar_rules import coverage_bounds
+from instance import RosterInstance
+from matrix_constraints import (
+    ConstraintBlock,
+    RosterIndex,
+    build_consecutive_shift_block,
+    build_cross_department_block,
+    build_department_block,
+    build_doctors_per_shift_blocks,
+    build_luck_worker_block,
+    build_max_shifts_block,
+    build_shifts_range_blocks,
+    build_symmetry_block,
+    build_carried_rest_block,
+    roster_forbidden_mask,
+)
+
+# Only build_gurobi_model needs Gurobi, the sparse blocks feed the open source
+# backends without it installed
+if TYPE_CHECKING:
+    from gurobipy import Env, MVar, Model
+
+# Gurobi Lazy level of the lazy consecutive windows: pulled into the LP when a
+# node relaxation violates them. Level 1 (only when an incumbent violates them,
+# as a MIPSOL callback would) leaves the bound so weak that the solve is an
+# order of magnitude slower
+LAZY_CONSECUTIVE = 2
+
+
+def build_roster_blocks(
+    instance: RosterInstance,
+    index: Optional[RosterIndex] = None,
+    include_department: bool = True,
+) -> List[ConstraintBlock]:
+    """Build all the constraint blocks of the roster model (same rules as main.py)
+
+    Args:
+        instance (RosterInstance): roster data
+        index (RosterIndex, optional): roster axes, built from the instance if missing
+        include_department (bool): add the rows fixing the department forbidden and carried rest slots to zero
+
+    Returns:
+        List[ConstraintBlock]: sparse constraint blocks over the index columns
+    """
+    index = index or RosterIndex(instance)
+    blocks = [
+        build_consecutive_shift_block(index, instance.consecutive_limit),
+        *build_doctors_per_shift_blocks(
+            index,
+            instance.min_doctors_per_shift,
+            instance.max_doctors_per_shift,
+            coverage_bounds(instance),
+        ),
+        *build_shifts_range_blocks(index, instance.relaxation),
+        build_cross_department_block(
+            index, instance.low_working_departments, instance.high_working_departments
+        ),
+        build_max_shifts_block(index, instance.max_shifts),
+        build_luck_worker_block(index, mode="unluckiest"),
+        build_luck_worker_block(index, mode="luckiest"),
+    ]
+    if instance.symmetry_breaking:
+        blocks.append(build_symmetry_block(index))
+    if include_department:
+        blocks.append(
+            build_department_block(
+                index,
+                instance.day_of_week,
+                instance.departments_constraint,
+                instance.holidays,
+                instance.calendar_rules,
+            )
+        )
+        blocks.append(
+            build_carried_rest_block(
+                index, instance.last_worked, instance.consecutive_limit
+            )
+        )
+    return [block for block in blocks if block.A.shape[0] > 0]
+
+
+def stack_roster_blocks(
+    blocks: List[ConstraintBlock],
+) -> Tuple[sp.csr_matrix, np.ndarray, np.ndarray]:
+    """Stack the blocks into a single lower <= A @ x <= upper system
+
+    Returns:
+        Tuple[sp.csr_matrix, np.ndarray, np.ndarray]: A, lower and upper bounds of the rows (+-inf when open)
+    """
+    A = sp.vstack([block.A for block in blocks], format="csr")
+    rhs = np.concatenate([block.rhs for block in blocks])
+    senses = np.concatenate(
+        [np.full(block.A.shape[0], block.sense) for block in blocks]
+    )
+    lower = np.where(senses == "<", -np.inf, rhs)
+    upper = np.where(senses == ">", np.inf, rhs)
+    return A, lower, upper
+
+
+def roster_objective(index: RosterIndex) -> np.ndarray:
+    """Objective vector of max_work_vars.sum() - min_work_vars.sum() (to minimize)"""
+    objective = np.zeros(index.num_vars)
+    objective[index.max_work_offset : index.min_work_offset] = 1.0
+    objective[index.min_work_offset :] = -1.0
+    return objective
+
+
+def build_gurobi_model(
+    instance: RosterInstance,
+    name: str = "Shifts-Manager",
+    env: Optional[Env] = None,
+    forbidden_as_bounds: bool = False,
+    lazy_consecutive: bool = False,
+) -> Tuple[Model, MVar, RosterIndex]:
+    """Build the roster model with the Gurobi matrix API
+
+    The department forbidden slots get no variable unless forbidden_as_bounds keeps
+    them as variables (a live model needs them to allow the slots again). The
+    constraints of each block are stored in model._constraints by block name.
+    With lazy_consecutive the consecutive windows are lazy constraints, out of
+    the LP until a relaxation or a solution violates them: a smaller LP when
+    few windows bind, a much longer search when most do (bench_lazy.py).
+
+    Args:
+        instance (RosterInstance): roster data
+        name (str): name of the Gurobi model
+        env (Env, optional): Gurobi environment, the default one if missing
+        forbidden_as_bounds (bool): set the upper bound of the department forbidden slots to zero instead of adding rows
+        lazy_consecutive (bool): keep the consecutive windows out of the LP until they are violated
+
+    Returns:
+        Tuple[Model, MVar, RosterIndex]: model, variables over the index columns and the index
+    """
+    from gurobipy import GRB, Model
+
+    index = RosterIndex(instance, eliminate_forbidden=not forbidden_as_bounds)
+    model = Model(name, env=env)
+    vtype = np.full(index.num_vars, GRB.CONTINUOUS)
+    vtype[: index.num_assignments] = GRB.BINARY
+    upper_bounds = np.full(index.num_vars, GRB.INFINITY)
+    upper_bounds[: index.num_assignments] = 1.0
+    if forbidden_as_bounds:
+        forbidden = roster_forbidden_mask(index, instance)
+        upper_bounds[: index.num_assignments][forbidden.reshape(-1)] = 0.0
+    variables = model.addMVar(index.num_vars, ub=upper_bounds, vtype=vtype, name="x")
+    model._constraints = {}
+    for block in build_roster_blocks(
+        instance, index, include_department=not forbidden_as_bounds
+    ):
+        model._constraints[block.name] = model.addMConstr(
+            block.A, variables, block.sense, block.rhs, name=block.name
+        )
+    consecutive = model._constraints.get(f"no_consecutive_{instance.consecutive_limit}")
+    if lazy_consecutive and consecutive is not None:
+        consecutive.Lazy = LAZY_CONSECUTIVE
+    model.setObjective(roster_objective(index) @ variables, GRB.MINIMIZE)
+    return model, variables, index
+
+
+if __name__ == "__main__":
+    import time
+
+    departments = list(
+        RosterInstance(doctors={}, day_of_week=[]).departments_constraint
+    )
+    doctors = {
+        f"doctor_{idx}": departments[idx % len(departments)] for idx in range(300)
+    }
+    # Three months as a single horizon
+    instance = RosterInstance(
+        doctors=doctors,
+        day_of_week=[day % 7 for day in range(91)],
+        low_working_departments=["reparto_ostetricia", "reparto_ginecologia"],
+        high_working_departments=["ambulatorio_ostetricia", "sala_operatoria"],
+    )
+    start = time.perf_counter()
+    model, variables, index = build_gurobi_model(instance)
+    model.update()
+    print(
+        f"Built {model.NumVars} vars, {model.NumConstrs} constraints, "
+        f"{model.NumNZs} nonzeros in {time.perf_counter() - start:.3f}s"
+    )
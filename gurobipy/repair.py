@@ -0,0 +1,294 @@
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB, Env
+from instance import RosterInstance
+from live_model import LiveRosterModel
+from matrix_constraints import RosterIndex
+from model_builder import build_roster_blocks, stack_roster_blocks
+from roster import Roster
+from solve_result import RosterResult, SolveMonitor
+from warm_start import warm_start_values
+
+# Blocks of the objective, not rules a repaired roster must satisfy
+OBJECTIVE_BLOCKS = ("luckiest_worker", "unluckiest_worker", "symmetry_breaking")
+# Columns of each kind kept as candidates of the paired moves
+PAIR_CANDIDATES = 160
+# Iterations a flipped column cannot be flipped back
+TABU_TENURE = 3
+# Cost of a cell changed from the roster to repair, small against a unit of violation
+CHANGE_COST = 0.1
+
+
+def roster_objective_value(index: RosterIndex, worked: np.ndarray) -> float:
+    """max_work - min_work summed over the departments, with the prior workload"""
+    workload = worked.sum(axis=(1, 2)) + index.prior_workload
+    return float(
+        sum(
+            np.ptp(workload[index.doctor_department == department])
+            for department in range(index.num_departments)
+        )
+    )
+
+
+class RosterState:
+    """0/1 assignment columns and the activity of every roster row, updated move by move
+
+    The rows are the hard rules of build_roster_blocks over the assignment
+    columns (consecutive windows, coverage, workload range, cross department,
+    max shifts), the department and carried rest slots have no column. A flip
+    only touches the rows of its column, so its effect on the violation is
+    computed from those rows alone.
+    """
+
+    def __init__(
+        self,
+        A: sp.csc_matrix,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        x: np.ndarray,
+        row_names: Optional[np.ndarray] = None,
+    ) -> None:
+        self.A = A
+        self.lower = lower
+        self.upper = upper
+        self.row_names = row_names
+        self.x = x.astype(bool)
+        self.activity = A @ self.x.astype(np.float64)
+        # Weight of every row in the search, raised on the rows that stay violated
+        self.weights = np.ones(A.shape[0])
+        # Column of every nonzero, to sum the per nonzero deltas by column
+        self._nonzero_column = np.repeat(np.arange(A.shape[1]), np.diff(A.indptr))
+
+    @classmethod
+    def from_instance(
+        cls, instance: RosterInstance, index: RosterIndex, x: np.ndarray
+    ) -> "RosterState":
+        """State of the hard rules of the instance over the assignment columns x"""
+        blocks = [
+            block
+            for block in build_roster_blocks(instance, index, include_department=False)
+            if block.name not in OBJECTIVE_BLOCKS
+        ]
+        A, lower, upper = stack_roster_blocks(blocks)
+        row_names = np.concatenate(
+            [np.full(block.A.shape[0], block.name, dtype=object) for block in blocks]
+        )
+        return cls(A[:, : index.num_assignments].tocsc(), lower, upper, x, row_names)
+
+    def _penalty(self, activity: np.ndarray, rows) -> np.ndarray:
+        return np.maximum(self.lower[rows] - activity, 0) + np.maximum(
+            activity - self.upper[rows], 0
+        )
+
+    def violation(self) -> float:
+        return float(self._penalty(self.activity, slice(None)).sum())
+
+    def violated_rows(self) -> np.ndarray:
+        return np.flatnonzero(self._penalty(self.activity, slice(None)) > 1e-9)
+
+    def violated_rules(self) -> List[str]:
+        """Names of the blocks with a violated row"""
+        return sorted(set(self.row_names[self.violated_rows()]))
+
+    def flip_deltas(self) -> np.ndarray:
+        """Change of the weighted violation if each column alone was flipped"""
+        rows = self.A.indices
+        sign = np.where(self.x, -1.0, 1.0)[self._nonzero_column]
+        before = self.activity[rows]
+        delta = self.weights[rows] * (
+            self._penalty(before + sign * self.A.data, rows)
+            - self._penalty(before, rows)
+        )
+        return np.bincount(
+            self._nonzero_column, weights=delta, minlength=self.A.shape[1]
+        )
+
+    def pair_deltas(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Change of the weighted violation if first[i] and second[i] were flipped together"""
+        sign = np.where(self.x, -1.0, 1.0)
+        change = (
+            self.A[:, first] @ sp.diags(sign[first])
+            + self.A[:, second] @ sp.diags(sign[second])
+        ).tocsc()
+        rows = change.indices
+        before = self.activity[rows]
+        delta = self.weights[rows] * (
+            self._penalty(before + change.data, rows) - self._penalty(before, rows)
+        )
+        pair = np.repeat(np.arange(first.size), np.diff(change.indptr))
+        return np.bincount(pair, weights=delta, minlength=first.size)
+
+    def flip(self, columns: List[int]) -> None:
+        for column in columns:
+            sign = -1.0 if self.x[column] else 1.0
+            start, end = self.A.indptr[column], self.A.indptr[column + 1]
+            self.activity[self.A.indices[start:end]] += sign * self.A.data[start:end]
+            self.x[column] = not self.x[column]
+
+
+def _paired_moves(
+    doctors: np.ndarray,
+    slots: np.ndarray,
+    x: np.ndarray,
+    scores: np.ndarray,
+    movable: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Columns turned on and columns turned off of the move and swap neighborhoods
+
+    A move gives a shift of a doctor to another doctor (same slot), a shift
+    move keeps the doctor and changes the slot. Both keep the number of worked
+    shifts, so they repair the rows a single flip cannot fix without breaking
+    another one. Only the most promising columns of each kind are paired.
+    """
+    on = np.flatnonzero(movable & ~x)
+    off = np.flatnonzero(movable & x)
+    on = on[np.argsort(scores[on], kind="stable")[:PAIR_CANDIDATES]]
+    off = off[np.argsort(scores[off], kind="stable")[:PAIR_CANDIDATES]]
+    paired = (doctors[on][:, None] == doctors[off][None, :]) | (
+        slots[on][:, None] == slots[off][None, :]
+    )
+    turn_on, turn_off = np.nonzero(paired)
+    return on[turn_on], off[turn_off]
+
+
+def local_search(
+    index: RosterIndex,
+    state: RosterState,
+    frozen: np.ndarray,
+    time_limit: float = 5.0,
+    max_iterations: int = 20000,
+    seed: int = 0,
+) -> int:
+    """Weighted tabu search on single flips and paired moves until no rule is violated
+
+    Every iteration applies the best improving single flip or paired move that
+    is not tabu. At a local minimum the rows still violated weigh more instead,
+    so the search leaves it without a restart. A small cost on every cell that
+    differs from the starting roster keeps the repair close to it.
+
+    Args:
+        index (RosterIndex): roster axes
+        state (RosterState): roster to repair, modified in place
+        frozen (np.ndarray): columns that must stay 0 (the new unavailabilities)
+        time_limit (float): seconds
+        max_iterations (int): iterations
+        seed (int): seed of the tie breaking
+
+    Returns:
+        int: iterations done
+    """
+    rng = np.random.default_rng(seed)
+    begin = time.perf_counter()
+    doctors, days, shifts = np.nonzero(index.allowed)
+    slots = days * index.num_shifts + shifts
+    original = state.x.copy()
+    tabu_until = np.zeros(state.x.size, dtype=np.int64)
+    iteration = 0
+    while (
+        state.violation() > 1e-9
+        and iteration < max_iterations
+        and time.perf_counter() - begin < time_limit
+    ):
+        iteration += 1
+        movable = ~frozen & (tabu_until < iteration)
+        # Flipping a column back to the starting roster is cheaper than away from it
+        changes = np.where(state.x == original, CHANGE_COST, -CHANGE_COST)
+        # Random tie breaking among equal moves
+        scores = state.flip_deltas() + changes + rng.random(state.x.size) * 1e-6
+        single = np.where(movable, scores, np.inf)
+        best_single = int(np.argmin(single))
+        score, columns = single[best_single], [best_single]
+        turn_on, turn_off = _paired_moves(doctors, slots, state.x, scores, movable)
+        if turn_on.size:
+            pair_scores = (
+                state.pair_deltas(turn_on, turn_off)
+                + changes[turn_on]
+                + changes[turn_off]
+            )
+            best_pair = int(np.argmin(pair_scores))
+            if pair_scores[best_pair] < score:
+                score = pair_scores[best_pair]
+                columns = [turn_on[best_pair], turn_off[best_pair]]
+        if not np.isfinite(score):
+            break
+        if score > -1e-9:
+            # Local minimum, the rows still violated weigh more from now on
+            state.weights[state.violated_rows()] += 1
+            continue
+        state.flip(columns)
+        tabu_until[columns] = iteration + TABU_TENURE
+    return iteration
+
+
+def repair_roster(
+    instance: RosterInstance,
+    roster: Roster,
+    unavailable: List[Tuple[str, int, int]],
+    time_limit: float = 5.0,
+    max_iterations: int = 20000,
+    fallback_time_limit: Optional[float] = None,
+    threads: Optional[int] = None,
+    env: Optional[Env] = None,
+    monitor: Optional[SolveMonitor] = None,
+) -> RosterResult:
+    """Adjust a roster to new unavailabilities with the fewest changes
+
+    The shifts of the unavailable doctors are dropped, then a local search
+    moves and swaps shifts until every rule of the roster holds again. Only if
+    it fails the roster is re-optimized by the MILP (a live Gurobi model with
+    the unavailabilities and the partly repaired roster as MIP start).
+
+    Args:
+        instance (RosterInstance): instance the roster was solved for
+        roster (Roster): roster to repair
+        unavailable (List[Tuple[str, int, int]]): (doctor_name, day, shift) the doctors cannot work anymore
+        time_limit (float): seconds of local search
+        max_iterations (int): iterations of local search
+        fallback_time_limit (float, optional): time limit of the MILP fallback
+        threads (int, optional): threads of the MILP fallback, all the cores if missing
+        env (Env, optional): Gurobi environment of the fallback
+        monitor (SolveMonitor, optional): incumbent and stop hooks of the fallback
+
+    Returns:
+        RosterResult: status "repaired" if the local search succeeded, else the status of the MILP
+    """
+    begin = time.perf_counter()
+    index = RosterIndex(instance, eliminate_forbidden=True)
+    frozen = warm_start_values(index, unavailable) > 0.5
+    x = (warm_start_values(index, roster.assignment) > 0.5) & ~frozen
+    state = RosterState.from_instance(instance, index, x)
+    local_search(index, state, frozen, time_limit, max_iterations)
+
+    if state.violation() <= 1e-9:
+        worked = index.assignment_values(state.x.astype(np.float64))
+        runtime = time.perf_counter() - begin
+        return RosterResult(
+            status="repaired",
+            objective=roster_objective_value(index, worked),
+            runtime=runtime,
+            first_feasible_time=runtime,
+            roster=Roster(index.doctor_names, worked),
+        )
+
+    live_model = LiveRosterModel(instance, env=env)
+    for doctor, day, shift in unavailable:
+        live_model.add_unavailability(doctor, day, shift)
+    live_model.model.Params.TimeLimit = (
+        fallback_time_limit if fallback_time_limit is not None else float("inf")
+    )
+    if threads is not None:
+        live_model.model.Params.Threads = threads
+    start = np.full(live_model.index.num_vars, GRB.UNDEFINED)
+    start[: live_model.index.num_assignments] = warm_start_values(
+        live_model.index,
+        Roster(
+            index.doctor_names, index.assignment_values(state.x.astype(float))
+        ).assignment,
+    )
+    live_model.variables.Start = start
+    result = live_model.optimize(monitor)
+    result.runtime = time.perf_counter() - begin
+    return result
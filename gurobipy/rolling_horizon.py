@@ -0,0 +1,184 @@
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from backends import get_backend
+from instance import RosterInstance
+from solve_result import RosterResult
+
+AVERAGE_MONTH_DAYS = 365.25 / 12
+
+
+@dataclass
+class RollingWindow:
+    """One solved window of the rolling horizon
+
+    Attributes:
+        start (str): first day of the window 'YYYY-MM-DD'
+        num_days (int): length of the window
+        committed_days (int): days of the window kept in the final roster
+        result (RosterResult): solver output of the window, days relative to start
+    """
+
+    start: str
+    num_days: int
+    committed_days: int
+    result: RosterResult
+
+
+@dataclass
+class RollingHorizonResult:
+    """Roster of the whole horizon built window by window
+
+    Attributes:
+        status (str): "optimal" if every window was solved to optimality, else the first non optimal status
+        runtime (float): wall time of the whole horizon in seconds
+        assignment (List[Tuple[str, int, int]]): (doctor_name, day, shift) with days relative to the horizon start
+        windows (List[RollingWindow]): the solved windows in order
+    """
+
+    status: str
+    runtime: float
+    assignment: List[Tuple[str, int, int]] = field(default_factory=list)
+    windows: List[RollingWindow] = field(default_factory=list)
+
+
+def solve_rolling_horizon(
+    start: str,
+    num_days: int,
+    doctors: Dict[str, str],
+    window_days: int = 42,
+    commit_days: int = 28,
+    backend: str = "gurobi",
+    time_limit: Optional[float] = None,
+    threads: Optional[int] = None,
+    max_shifts: int = 6,
+    relaxation: int = 3,
+    **instance_kwargs,
+) -> RollingHorizonResult:
+    """Plan a long horizon with overlapping windows, committing the first days of each
+
+    Each window is a RosterInstance of window_days days whose first commit_days
+    days are kept. The next window starts after them and carries over the rest
+    still owed by every doctor (last_worked) and the shifts worked so far
+    (prior_workload), so the consecutive rule and the fairness do not reset at
+    window boundaries. The uncommitted tail of a window is the warm start of the
+    next one. Only one window model is alive at a time, so memory is bounded by
+    the window size and time grows linearly with the horizon.
+
+    Args:
+        start (str): first day in the format 'YYYY-MM-DD'
+        num_days (int): length of the horizon
+        doctors (Dict[str, str]): doctor_name -> department
+        window_days (int): length of each solved window
+        commit_days (int): days committed per window, at most window_days
+        backend (str): solver backend name (see backends.get_backend)
+        time_limit (float, optional): time limit of each window
+        threads (int, optional): solver threads
+        max_shifts (int): cap on the shifts of each doctor per month, scaled to the length of each window
+        relaxation (int): extra shifts above the fair share per month, scaled to the length of each window
+        **instance_kwargs: other RosterInstance fields (e.g. consecutive_limit, symmetry_breaking)
+
+    Raises:
+        ValueError: if commit_days is not in [1, window_days]
+    """
+    if not 0 < commit_days <= window_days:
+        raise ValueError("commit_days must be between 1 and window_days")
+    solver = get_backend(backend)
+    first_day = datetime.strptime(start, "%Y-%m-%d").date()
+    consecutive_limit = instance_kwargs.get("consecutive_limit", 10)
+    last_worked: Dict[str, int] = {}
+    prior_workload = {doctor: 0 for doctor in doctors}
+    warm_start = None
+    result = RollingHorizonResult(status="optimal", runtime=0.0)
+    begin = time.perf_counter()
+
+    offset = 0
+    while offset < num_days:
+        length = min(window_days, num_days - offset)
+        committed = length if offset + length == num_days else commit_days
+        window_start = (first_day + timedelta(days=offset)).isoformat()
+        instance = RosterInstance.from_dates(
+            window_start,
+            length,
+            doctors,
+            last_worked=dict(last_worked),
+            prior_workload=dict(prior_workload),
+            max_shifts=math.ceil(max_shifts * length / AVERAGE_MONTH_DAYS),
+            relaxation=math.ceil(relaxation * length / AVERAGE_MONTH_DAYS),
+            **instance_kwargs,
+        )
+        window = solver.solve(
+            instance, time_limit=time_limit, threads=threads, warm_start=warm_start
+        )
+        result.windows.append(RollingWindow(window_start, length, committed, window))
+        if window.status != "optimal" and result.status == "optimal":
+            result.status = window.status
+        if not window.assignment:
+            break
+
+        num_shifts = instance.num_shifts
+        committed_slots = committed * num_shifts
+        for doctor in last_worked:
+            last_worked[doctor] = min(
+                last_worked[doctor] + committed_slots, consecutive_limit
+            )
+        for doctor, day, shift in sorted(window.assignment):
+            if day >= committed:
+                continue
+            result.assignment.append((doctor, offset + day, shift))
+            prior_workload[doctor] += 1
+            last_worked[doctor] = committed_slots - 1 - (day * num_shifts + shift)
+        warm_start = [
+            (doctor, day - committed, shift)
+            for doctor, day, shift in window.assignment
+            if day >= committed
+        ]
+        offset += committed
+
+    result.runtime = time.perf_counter() - begin
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from departments_data import (
+        HIGH_WORKING_DEPARTMENTS,
+        LOW_WORKING_DEPARTMENTS,
+        doctors,
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Plan a long horizon with overlapping windows"
+    )
+    parser.add_argument("--start", default="2025-01-01", help="YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--window-days", type=int, default=42)
+    parser.add_argument("--commit-days", type=int, default=28)
+    parser.add_argument("--backend", default="gurobi")
+    parser.add_argument("--time-limit", type=float, default=60)
+    args = parser.parse_args()
+
+    horizon = solve_rolling_horizon(
+        args.start,
+        args.days,
+        doctors,
+        window_days=args.window_days,
+        commit_days=args.commit_days,
+        backend=args.backend,
+        time_limit=args.time_limit,
+        low_working_departments=LOW_WORKING_DEPARTMENTS,
+        high_working_departments=HIGH_WORKING_DEPARTMENTS,
+    )
+    for window in horizon.windows:
+        print(
+            f"{window.start} {window.num_days:>3} days, commit {window.committed_days:>3}: "
+            f"{window.result.status:>12} {window.result.runtime:.2f}s"
+        )
+    workload = {doctor: 0 for doctor in doctors}
+    for doctor, _, _ in horizon.assignment:
+        workload[doctor] += 1
+    print(f"{horizon.status} in {horizon.runtime:.2f}s, shifts per doctor {workload}")
@@ -0,0 +1,226 @@
+import csv
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+ICAL_DATE_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def default_shift_hours(num_shifts: int) -> Dict[int, Tuple[float, float]]:
+    """Shifts splitting the day evenly from 8:00, shift -> (start hour, duration in hours)"""
+    duration = 24 / num_shifts
+    return {shift: (8 + shift * duration, duration) for shift in range(num_shifts)}
+
+
+@dataclass
+class Roster:
+    """Worked shifts as a (doctors, days, shifts) boolean array
+
+    Extracting the worked shifts only touches the nonzeros, and the exports are
+    built from the nonzero indices, so a roster is cheap to ship between
+    processes and to serialize whatever its size.
+
+    Attributes:
+        doctor_names (List[str]): doctor of every row of worked
+        worked (np.ndarray): worked[doctor, day, shift] is True if the doctor works the shift
+        start (date, optional): date of the first day, days are exported as indices if missing
+        shift_names (List[str], optional): name of every shift, shifts are exported as indices if missing
+    """
+
+    doctor_names: List[str]
+    worked: np.ndarray
+    start: Optional[date] = None
+    shift_names: Optional[List[str]] = None
+
+    @classmethod
+    def from_assignment(
+        cls,
+        assignment: List[Tuple[str, int, int]],
+        doctor_names: List[str],
+        num_days: int,
+        num_shifts: int,
+        **kwargs,
+    ) -> "Roster":
+        """Build the roster of a list of (doctor_name, day, shift)"""
+        worked = np.zeros((len(doctor_names), num_days, num_shifts), dtype=bool)
+        if assignment:
+            position = {doctor: idx for idx, doctor in enumerate(doctor_names)}
+            doctors, days, shifts = zip(*assignment)
+            worked[[position[doctor] for doctor in doctors], days, shifts] = True
+        return cls(doctor_names, worked, **kwargs)
+
+    @classmethod
+    def from_json(cls, text: str) -> "Roster":
+        """Inverse of to_json"""
+        data = json.loads(text)
+        worked = np.zeros(
+            (len(data["doctor_names"]), data["num_days"], data["num_shifts"]),
+            dtype=bool,
+        )
+        worked[data["doctor"], data["day"], data["shift"]] = True
+        start = data.get("start")
+        return cls(
+            data["doctor_names"],
+            worked,
+            start=datetime.strptime(start, "%Y-%m-%d").date() if start else None,
+            shift_names=data.get("shift_names"),
+        )
+
+    @property
+    def num_days(self) -> int:
+        return self.worked.shape[1]
+
+    @property
+    def num_shifts(self) -> int:
+        return self.worked.shape[2]
+
+    def nonzero(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Doctor, day and shift indices of the worked shifts, sorted by doctor then day"""
+        return np.nonzero(self.worked)
+
+    @property
+    def assignment(self) -> List[Tuple[str, int, int]]:
+        """(doctor_name, day, shift) of every worked shift"""
+        doctors, days, shifts = self.nonzero()
+        return [
+            (self.doctor_names[doctor], day, shift)
+            for doctor, day, shift in zip(
+                doctors.tolist(), days.tolist(), shifts.tolist()
+            )
+        ]
+
+    def workload(self) -> Dict[str, int]:
+        """doctor_name -> number of worked shifts"""
+        return dict(zip(self.doctor_names, self.worked.sum(axis=(1, 2)).tolist()))
+
+    def dates(self) -> List[str]:
+        """'YYYY-MM-DD' of every day, the day index if start is missing"""
+        if self.start is None:
+            return [str(day) for day in range(self.num_days)]
+        return [
+            (self.start + timedelta(days=day)).isoformat()
+            for day in range(self.num_days)
+        ]
+
+    def _shift_labels(self) -> List[str]:
+        if self.shift_names is None:
+            return [str(shift) for shift in range(self.num_shifts)]
+        return list(self.shift_names)
+
+    def to_records(self) -> List[Dict[str, str]]:
+        """One {"doctor", "date", "shift"} dict per worked shift"""
+        dates, shift_labels = self.dates(), self._shift_labels()
+        doctors, days, shifts = self.nonzero()
+        return [
+            {
+                "doctor": self.doctor_names[doctor],
+                "date": dates[day],
+                "shift": shift_labels[shift],
+            }
+            for doctor, day, shift in zip(
+                doctors.tolist(), days.tolist(), shifts.tolist()
+            )
+        ]
+
+    def to_json(self) -> str:
+        """Columnar JSON: the axes once, then the doctor, day and shift index of every worked shift"""
+        doctors, days, shifts = self.nonzero()
+        return json.dumps(
+            {
+                "doctor_names": self.doctor_names,
+                "num_days": self.num_days,
+                "num_shifts": self.num_shifts,
+                "start": self.start.isoformat() if self.start else None,
+                "shift_names": self.shift_names,
+                "doctor": doctors.tolist(),
+                "day": days.tolist(),
+                "shift": shifts.tolist(),
+            }
+        )
+
+    def to_csv(self, file: TextIO) -> None:
+        """Write a doctor,date,shift header and one row per worked shift"""
+        writer = csv.writer(file)
+        writer.writerow(["doctor", "date", "shift"])
+        writer.writerows(record.values() for record in self.to_records())
+
+    def to_arrow(self):
+        """pyarrow Table with one row per worked shift
+
+        The doctor, date and shift columns are dictionary encoded, the indices
+        are the nonzero arrays themselves and the dictionaries are the axes.
+
+        Raises:
+            ImportError: if pyarrow is not installed
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Roster.to_arrow needs pyarrow installed") from e
+
+        doctors, days, shifts = self.nonzero()
+        return pa.table(
+            {
+                "doctor": pa.DictionaryArray.from_arrays(
+                    pa.array(doctors), pa.array(self.doctor_names)
+                ),
+                "date": pa.DictionaryArray.from_arrays(
+                    pa.array(days), pa.array(self.dates())
+                ),
+                "shift": pa.DictionaryArray.from_arrays(
+                    pa.array(shifts), pa.array(self._shift_labels())
+                ),
+            }
+        )
+
+    def to_ical(
+        self,
+        shift_hours: Optional[Dict[int, Tuple[float, float]]] = None,
+        doctor: Optional[str] = None,
+    ) -> str:
+        """iCalendar with one event per worked shift
+
+        Args:
+            shift_hours (Dict[int, Tuple[float, float]], optional): shift -> (start hour, duration in hours), default_shift_hours if missing
+            doctor (str, optional): only export the shifts of this doctor
+
+        Raises:
+            ValueError: if start is missing
+        """
+        if self.start is None:
+            raise ValueError("The roster needs a start date to be exported to iCal")
+        if shift_hours is None:
+            shift_hours = default_shift_hours(self.num_shifts)
+        shift_labels = self._shift_labels()
+        stamp = datetime.now(timezone.utc).strftime(ICAL_DATE_FORMAT) + "Z"
+        lines = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//med-rostering//roster//EN",
+        ]
+        doctors, days, shifts = self.nonzero()
+        if doctor is not None:
+            keep = doctors == self.doctor_names.index(doctor)
+            doctors, days, shifts = doctors[keep], days[keep], shifts[keep]
+        first_day = datetime.combine(self.start, datetime.min.time())
+        for doctor_idx, day, shift in zip(
+            doctors.tolist(), days.tolist(), shifts.tolist()
+        ):
+            start_hour, duration = shift_hours[shift]
+            begin = first_day + timedelta(days=day, hours=start_hour)
+            end = begin + timedelta(hours=duration)
+            name = self.doctor_names[doctor_idx]
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:{name}-{begin.strftime(ICAL_DATE_FORMAT)}@med-rostering",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART:{begin.strftime(ICAL_DATE_FORMAT)}",
+                f"DTEND:{end.strftime(ICAL_DATE_FORMAT)}",
+                f"SUMMARY:{name} {shift_labels[shift]} shift",
+                "END:VEVENT",
+            ]
+        lines.append("END:VCALENDAR")
+        return "\r\n".join(lines) + "\r\n"
@@ -0,0 +1,129 @@
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+from instance import RosterInstance
+from solve_result import RosterResult
+
+# Statuses that do not depend on the time limit, the only ones worth caching
+CACHEABLE_STATUSES = ("optimal", "infeasible")
+
+
+def canonical_instance(instance: RosterInstance) -> dict:
+    """JSON ready form of the instance where equivalent instances are equal
+
+    Doctors, departments and department lists are sorted, so the insertion
+    order of the dicts coming from the database does not change the key. The
+    days keep their order (the day_of_week list is the calendar).
+    """
+    data = dataclasses.asdict(instance)
+    data["doctors"] = sorted(instance.doctors.items())
+    data["departments_constraint"] = sorted(
+        (department, sorted(map(list, slots)))
+        for department, slots in instance.departments_constraint.items()
+    )
+    data["low_working_departments"] = sorted(instance.low_working_departments)
+    data["high_working_departments"] = sorted(instance.high_working_departments)
+    data["last_worked"] = sorted(instance.last_worked.items())
+    data["prior_workload"] = sorted(instance.prior_workload.items())
+    return data
+
+
+def instance_key(instance: RosterInstance, **solve_params) -> str:
+    """sha256 of the canonical instance and of the solve parameters changing the result
+
+    Args:
+        instance (RosterInstance): roster data
+        **solve_params: e.g. mip_gap, pool_size, None values are left out
+    """
+    payload = {
+        "instance": canonical_instance(instance),
+        "params": {
+            key: value for key, value in solve_params.items() if value is not None
+        },
+    }
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class SolveCache:
+    """Solve results by instance_key, least recently used evicted beyond capacity.
+
+    With a directory every result is also pickled to <directory>/<key>.pkl, so
+    the cache survives restarts. Hits refresh the file modification time, which
+    restores the LRU order when the cache is reopened.
+    """
+
+    def __init__(
+        self, capacity: int = 256, directory: Optional[Union[str, Path]] = None
+    ) -> None:
+        self.capacity = capacity
+        self.directory = Path(directory) if directory is not None else None
+        self._results: "OrderedDict[str, Optional[RosterResult]]" = OrderedDict()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Results on disk are loaded lazily, None marks a result not read yet
+            for path in sorted(
+                self.directory.glob("*.pkl"), key=lambda path: path.stat().st_mtime
+            ):
+                self._results[path.stem] = None
+            self.evict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._results
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[RosterResult]:
+        if key not in self._results:
+            return None
+        result = self._results[key]
+        if result is None:
+            try:
+                result = pickle.loads(self._path(key).read_bytes())
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self.discard(key)
+                return None
+            self._results[key] = result
+        self._results.move_to_end(key)
+        if self.directory is not None:
+            os.utime(self._path(key))
+        return result
+
+    def put(self, key: str, result: RosterResult) -> None:
+        """Store a result, ignored unless its status is in CACHEABLE_STATUSES"""
+        if result.status not in CACHEABLE_STATUSES:
+            return
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if self.directory is not None:
+            # Write then rename, a crash never leaves a truncated result behind
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, suffix=".tmp", delete=False
+            ) as file:
+                pickle.dump(result, file)
+            os.replace(file.name, self._path(key))
+        self.evict()
+
+    def discard(self, key: str) -> None:
+        self._results.pop(key, None)
+        if self.directory is not None:
+            self._path(key).unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        while len(self._results) > self.capacity:
+            self.discard(next(iter(self._results)))
+
+    def clear(self) -> None:
+        for key in list(self._results):
+            self.discard(key)
@@ -0,0 +1,105 @@
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from roster import Roster
+
+# Seconds between two calls of SolveMonitor.should_stop, it may cross processes
+STOP_POLL_INTERVAL = 0.2
+# Bound reported before one is proven (GRB.INFINITY), the open source solvers report inf
+NO_BOUND = 1e100
+
+
+@dataclass
+class Incumbent:
+    """An improved roster found while solving
+
+    Attributes:
+        objective (float): objective of the roster
+        bound (float): best proven bound at that time, None if there is none yet
+        gap (float): relative gap between objective and bound, None without a bound
+        elapsed (float): seconds since the solve started
+    """
+
+    objective: float
+    bound: Optional[float]
+    gap: Optional[float]
+    elapsed: float
+
+
+@dataclass
+class SolveMonitor:
+    """Hooks of an anytime solve, called from the solver thread
+
+    Attributes:
+        on_incumbent (Callable[[Incumbent], None], optional): called with every improved roster
+        should_stop (Callable[[], bool], optional): polled while solving, the solve ends with the best roster so far once it returns True
+    """
+
+    on_incumbent: Optional[Callable[[Incumbent], None]] = None
+    should_stop: Optional[Callable[[], bool]] = None
+
+    def incumbent(self, objective: float, bound: float, elapsed: float) -> None:
+        if self.on_incumbent is not None:
+            if abs(bound) < NO_BOUND:
+                gap = abs(objective - bound) / max(abs(objective), 1e-10)
+            else:
+                # No bound proven yet
+                bound, gap = None, None
+            self.on_incumbent(
+                Incumbent(
+                    float(objective),
+                    None if bound is None else float(bound),
+                    None if gap is None else float(gap),
+                    float(elapsed),
+                )
+            )
+
+    def stop_requested(self) -> bool:
+        return self.should_stop is not None and self.should_stop()
+
+
+@dataclass
+class PooledRoster:
+    """A roster of the solution pool
+
+    Attributes:
+        objective (float): objective of the roster
+        roster (Roster): worked shifts
+    """
+
+    objective: float
+    roster: Roster
+
+    @property
+    def assignment(self) -> List[Tuple[str, int, int]]:
+        return self.roster.assignment
+
+
+@dataclass
+class RosterResult:
+    """Outcome of a roster solve
+
+    Attributes:
+        status (str): optimal, infeasible, time_limit, ...
+        objective (float): objective of the best roster found, None if there is no roster
+        gap (float): relative MIP gap of the best roster found
+        runtime (float): solver time in seconds
+        first_feasible_time (float): seconds until the first feasible roster, None if there is none
+        roster (Roster): worked shifts of the best roster found, None if there is no roster
+        pool (List[PooledRoster]): distinct rosters found by the same solve, best first, empty unless a pool was asked
+        conflicts (List[str]): why the roster is infeasible (capacity pre-check or IIS), empty if unknown
+    """
+
+    status: str
+    objective: Optional[float] = None
+    gap: Optional[float] = None
+    runtime: float = 0.0
+    first_feasible_time: Optional[float] = None
+    roster: Optional[Roster] = None
+    pool: List[PooledRoster] = field(default_factory=list)
+    conflicts: List[str] = field(default_factory=list)
+
+    @property
+    def assignment(self) -> List[Tuple[str, int, int]]:
+        """(doctor_name, day, shift) of every worked shift of the best roster"""
+        return self.roster.assignment if self.roster is not None else []
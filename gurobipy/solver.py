@@ -0,0 +1,188 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from feasibility import explain_infeasibility
+from gurobipy import GRB, Env, MVar, Model
+from instance import RosterInstance
+from matrix_constraints import RosterIndex
+from model_builder import build_gurobi_model
+from roster import Roster
+from solve_result import (
+    STOP_POLL_INTERVAL,
+    PooledRoster,
+    RosterResult,
+    SolveMonitor,
+)
+from warm_start import apply_warm_start
+
+STATUS_NAMES = {
+    GRB.OPTIMAL: "optimal",
+    GRB.INFEASIBLE: "infeasible",
+    GRB.INF_OR_UNBD: "infeasible",
+    GRB.UNBOUNDED: "unbounded",
+    GRB.TIME_LIMIT: "time_limit",
+    GRB.INTERRUPTED: "interrupted",
+    GRB.SOLUTION_LIMIT: "solution_limit",
+}
+# Pool solutions asked to Gurobi per roster returned when they must be diverse,
+# most of the pool is made of near copies of the best rosters
+POOL_CANDIDATES_PER_ROSTER = 10
+
+
+def roster_distance(first: Roster, second: Roster) -> int:
+    """Hamming distance of two rosters, the shifts worked in only one of them"""
+    return int(np.count_nonzero(first.worked != second.worked))
+
+
+def select_diverse_rosters(
+    candidates: List[PooledRoster], pool_size: int, min_distance: int = 1
+) -> List[PooledRoster]:
+    """Keep the best candidates at distance at least min_distance from every roster already kept
+
+    Args:
+        candidates (List[PooledRoster]): rosters sorted from the best
+        pool_size (int): maximum number of rosters kept
+        min_distance (int): minimum Hamming distance between two kept rosters
+    """
+    selected: List[PooledRoster] = []
+    for candidate in candidates:
+        if len(selected) == pool_size:
+            break
+        if all(
+            roster_distance(candidate.roster, pooled.roster) >= min_distance
+            for pooled in selected
+        ):
+            selected.append(candidate)
+    return selected
+
+
+def pool_params(
+    pool_size: int = 1, pool_min_distance: int = 1, pool_gap: Optional[float] = None
+) -> Dict[str, float]:
+    """Gurobi parameters searching the pool_size best rosters in the same solve"""
+    if pool_size <= 1:
+        return {}
+    candidates = pool_size
+    if pool_min_distance > 1:
+        candidates *= POOL_CANDIDATES_PER_ROSTER
+    params = {"PoolSearchMode": 2, "PoolSolutions": candidates}
+    if pool_gap is not None:
+        params["PoolGap"] = pool_gap
+    return params
+
+
+def solve_roster(
+    instance: RosterInstance,
+    time_limit: Optional[float] = None,
+    mip_gap: Optional[float] = None,
+    threads: Optional[int] = None,
+    warm_start: Optional[List[Tuple[str, int, int]]] = None,
+    pool_size: int = 1,
+    pool_min_distance: int = 1,
+    pool_gap: Optional[float] = None,
+    explain_infeasible: bool = True,
+    monitor: Optional[SolveMonitor] = None,
+    lazy_consecutive: bool = False,
+) -> RosterResult:
+    """Build and solve the roster model, it is self contained so it can run in a worker process
+
+    Args:
+        instance (RosterInstance): roster data
+        time_limit (float, optional): solver time limit in seconds
+        mip_gap (float, optional): relative MIP gap at which the solver stops
+        threads (int, optional): number of solver threads, all the cores if missing
+        warm_start (List[Tuple[str, int, int]], optional): prior (doctor_name, day, shift) fed as MIP start
+        pool_size (int): number of distinct rosters to return in the pool, no pool if 1
+        pool_min_distance (int): minimum Hamming distance between two rosters of the pool
+        pool_gap (float, optional): relative objective gap to the best roster allowed in the pool
+        explain_infeasible (bool): compute an IIS into RosterResult.conflicts if the model is infeasible
+        monitor (SolveMonitor, optional): incumbent and stop hooks of an anytime solve
+        lazy_consecutive (bool): keep the consecutive windows out of the LP until they are violated
+    """
+    params = {"OutputFlag": 0, **pool_params(pool_size, pool_min_distance, pool_gap)}
+    if time_limit is not None:
+        params["TimeLimit"] = time_limit
+    if mip_gap is not None:
+        params["MIPGap"] = mip_gap
+    if threads is not None:
+        params["Threads"] = threads
+
+    with Env(params=params) as env:
+        model, variables, index = build_gurobi_model(
+            instance, env=env, lazy_consecutive=lazy_consecutive
+        )
+        with model:
+            if warm_start:
+                apply_warm_start(variables, index, warm_start, hints=True)
+            result = optimize_model(
+                model, variables, index, pool_size, pool_min_distance, monitor
+            )
+            if result.status == "infeasible" and explain_infeasible:
+                result.conflicts = explain_infeasibility(model, variables, index)
+            return result
+
+
+def optimize_model(
+    model: Model,
+    variables: MVar,
+    index: RosterIndex,
+    pool_size: int = 1,
+    pool_min_distance: int = 1,
+    monitor: Optional[SolveMonitor] = None,
+) -> RosterResult:
+    """Optimize a built roster model and collect the result
+
+    Args:
+        model (Model): Gurobi model, with the pool parameters set if a pool is asked
+        variables (MVar): variables over the index columns
+        index (RosterIndex): roster axes
+        pool_size (int): number of distinct rosters to collect from the solution pool, no pool if 1
+        pool_min_distance (int): minimum Hamming distance between two rosters of the pool
+        monitor (SolveMonitor, optional): incumbent and stop hooks, a stop ends the solve as "interrupted"
+    """
+    first_feasible = []
+    best = [np.inf]
+    last_poll = [-np.inf]
+
+    def callback(cb_model, where):
+        if where == GRB.Callback.MIPSOL:
+            runtime = cb_model.cbGet(GRB.Callback.RUNTIME)
+            if not first_feasible:
+                first_feasible.append(runtime)
+            objective = cb_model.cbGet(GRB.Callback.MIPSOL_OBJ)
+            if monitor is not None and objective < best[0]:
+                best[0] = objective
+                bound = cb_model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+                monitor.incumbent(objective, bound, runtime)
+        elif where == GRB.Callback.MIP and monitor is not None:
+            runtime = cb_model.cbGet(GRB.Callback.RUNTIME)
+            if runtime - last_poll[0] >= STOP_POLL_INTERVAL:
+                last_poll[0] = runtime
+                if monitor.stop_requested():
+                    cb_model.terminate()
+
+    model.optimize(callback)
+    result = RosterResult(
+        status=STATUS_NAMES.get(model.Status, str(model.Status)),
+        runtime=model.Runtime,
+        first_feasible_time=first_feasible[0] if first_feasible else None,
+    )
+    if model.SolCount > 0:
+        if result.first_feasible_time is None:
+            # Solved by presolve, no MIPSOL callback was fired
+            result.first_feasible_time = model.Runtime
+        result.objective = model.ObjVal
+        result.gap = model.MIPGap
+        result.roster = Roster(index.doctor_names, index.assignment_values(variables.X))
+        if pool_size > 1:
+            candidates = []
+            for number in range(model.SolCount):
+                model.Params.SolutionNumber = number
+                roster = Roster(
+                    index.doctor_names, index.assignment_values(variables.Xn)
+                )
+                candidates.append(PooledRoster(model.PoolObjVal, roster))
+            result.pool = select_diverse_rosters(
+                candidates, pool_size, pool_min_distance
+            )
+    return result
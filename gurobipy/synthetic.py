@@ -0,0 +1,63 @@
+from typing import Optional
+
+import numpy as np
+from instance import RosterInstance
+
+
+def generate_instance(
+    num_doctors: int,
+    num_departments: int,
+    num_days: int = 31,
+    consecutive_limit: int = 10,
+    forbidden_density: float = 0.2,
+    num_shifts: int = 2,
+    max_shifts: Optional[int] = None,
+    first_day_of_week: int = 0,
+    seed: int = 0,
+) -> RosterInstance:
+    """Random roster instance with the same shape as departments_data
+
+    Doctors are spread round robin over the departments, every department forbids
+    a random share of its weekly (day_of_week, shift) slots, the first department
+    is a low working one and the second a high working one.
+
+    Args:
+        num_doctors (int): number of doctors
+        num_departments (int): number of departments
+        num_days (int): length of the horizon in days
+        consecutive_limit (int): number of shifts after a worked one that must be free
+        forbidden_density (float): share of the weekly slots forbidden to each department
+        num_shifts (int): number of shifts per day
+        max_shifts (int, optional): cap on the shifts of each doctor, the fair share plus 2 if missing
+        first_day_of_week (int): day of the week (0-6) of the first day
+        seed (int): random seed
+    """
+    rng = np.random.default_rng(seed)
+    departments = [f"department_{idx}" for idx in range(num_departments)]
+    doctors = {
+        f"doctor_{idx}": departments[idx % num_departments]
+        for idx in range(num_doctors)
+    }
+    weekly_slots = [(dow, shift) for dow in range(7) for shift in range(num_shifts)]
+    num_forbidden = int(round(forbidden_density * len(weekly_slots)))
+    departments_constraint = {
+        department: [
+            weekly_slots[slot]
+            for slot in sorted(
+                rng.choice(len(weekly_slots), num_forbidden, replace=False)
+            )
+        ]
+        for department in departments
+    }
+    if max_shifts is None:
+        max_shifts = -(-num_days * num_shifts // num_doctors) + 2
+    return RosterInstance(
+        doctors=doctors,
+        day_of_week=[(first_day_of_week + day) % 7 for day in range(num_days)],
+        departments_constraint=departments_constraint,
+        low_working_departments=departments[:1] if num_departments > 1 else [],
+        high_working_departments=departments[1:2],
+        num_shifts=num_shifts,
+        consecutive_limit=consecutive_limit,
+        max_shifts=max_shifts,
+    )
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules of gurobipy are imported by bare name, as main.py does, and
+# get_monthly_data sits at the root of the repository
+GUROBIPY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+sys.path[:0] = [GUROBIPY_DIR, os.path.dirname(GUROBIPY_DIR)]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from calendar_rules import HOLIDAY, coverage_bounds
+from departments_data import doctors
+from instance import CalendarRule, RosterInstance
+
+
+def test_coverage_bounds_apply_the_rules():
+    instance = RosterInstance.from_month(
+        "2025-12-01",
+        doctors,
+        max_doctors_per_shift=2,
+        calendar_rules=[
+            CalendarRule(days_of_week=[HOLIDAY], shifts=[1], min_doctors=2),
+            CalendarRule(days=[0, 7], max_doctors=3),
+            # The last matching rule wins
+            CalendarRule(days=[0], shifts=[0], max_doctors=1),
+            CalendarRule(days=[1], forbidden=True),
+        ],
+    )
+    lower, upper = coverage_bounds(instance)
+
+    expected_lower = np.ones((31, 2), dtype=np.int64)
+    expected_lower[[7, 24, 25], 1] = 2
+    expected_upper = np.full((31, 2), 2, dtype=np.int64)
+    expected_upper[[0, 7]] = 3
+    expected_upper[0, 0] = 1
+    np.testing.assert_array_equal(lower, expected_lower)
+    np.testing.assert_array_equal(upper, expected_upper)
+
+
+def test_coverage_bounds_reject_department_rules():
+    department = next(iter(doctors.values()))
+    instance = RosterInstance.from_month(
+        "2025-12-01",
+        doctors,
+        calendar_rules=[CalendarRule(department=department, min_doctors=2)],
+    )
+    with pytest.raises(ValueError):
+        coverage_bounds(instance)
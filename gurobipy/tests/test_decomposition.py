@@ -0,0 +1,50 @@
+import pytest
+from decomposition import solve_decomposed
+from gurobipy import GRB, Env
+from model_builder import build_gurobi_model
+from solver import solve_roster
+from synthetic import generate_instance
+from warm_start import warm_start_values
+
+# Several departments each, the first two coupled by the cross department rows
+INSTANCES = {
+    "three_departments": generate_instance(
+        9, 3, num_days=11, forbidden_density=0.1, consecutive_limit=2, seed=2
+    ),
+    "four_departments": generate_instance(
+        12, 4, num_days=14, forbidden_density=0.2, consecutive_limit=2, seed=1
+    ),
+    "balanced": generate_instance(
+        16, 4, num_days=14, forbidden_density=0.3, consecutive_limit=3, seed=5
+    ),
+    "too_few_shifts": generate_instance(
+        8, 2, num_days=14, forbidden_density=0.0, consecutive_limit=2, max_shifts=2
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(INSTANCES))
+def test_same_objective_as_the_monolithic_model(name):
+    instance = INSTANCES[name]
+    monolithic = solve_roster(instance, threads=1)
+    decomposed = solve_decomposed(instance, time_limit=60, workers=1)
+
+    assert decomposed.status == monolithic.status
+    if monolithic.status == "optimal":
+        assert decomposed.objective == pytest.approx(monolithic.objective)
+
+
+@pytest.mark.parametrize("name", ["three_departments", "four_departments"])
+def test_decomposed_roster_is_feasible(name):
+    instance = INSTANCES[name]
+    decomposed = solve_decomposed(instance, time_limit=60, workers=1)
+
+    # The roster fixed in the monolithic model has the objective of the decomposition
+    with Env(params={"OutputFlag": 0, "Threads": 1}) as env:
+        model, variables, index = build_gurobi_model(instance, env=env)
+        values = warm_start_values(index, decomposed.roster.assignment)
+        variables[: index.num_assignments].LB = values
+        variables[: index.num_assignments].UB = values
+        model.optimize()
+        assert model.Status == GRB.OPTIMAL
+        assert model.ObjVal == pytest.approx(decomposed.objective)
@@ -0,0 +1,33 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from get_monthly_data import easter, month_calendar
+
+
+@pytest.mark.parametrize(
+    "year, expected",
+    [
+        (2008, date(2008, 3, 23)),
+        (2019, date(2019, 4, 21)),
+        (2024, date(2024, 3, 31)),
+        (2025, date(2025, 4, 20)),
+        (2038, date(2038, 4, 25)),
+    ],
+)
+def test_easter(year, expected):
+    assert easter(year) == expected
+
+
+@pytest.mark.parametrize(
+    "year, month, expected",
+    [
+        (2025, 4, [20, 24]),  # Pasquetta, Liberazione
+        (2024, 4, [0, 24]),  # Pasquetta on April 1st
+        (2016, 3, [27]),  # Pasquetta in March
+        (2025, 3, []),
+        (2025, 12, [7, 24, 25]),
+    ],
+)
+def test_month_holidays(year, month, expected):
+    assert np.flatnonzero(month_calendar(year, month).holidays).tolist() == expected
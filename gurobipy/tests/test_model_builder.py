@@ -0,0 +1,184 @@
+from collections import defaultdict
+
+import numpy as np
+import pytest
+from calendar_rules import HOLIDAY, coverage_bounds, department_forbidden_slots
+from constraints import (
+    build_assignment_vars,
+    build_consecutive_shift_constraint,
+    build_cross_department_constraint,
+    build_doctors_per_shift_constraint,
+    build_luck_worker_constraint,
+    build_shifts_range_contraints,
+    workload_expressions,
+)
+from departments_data import (
+    HIGH_WORKING_DEPARTMENTS,
+    LOW_WORKING_DEPARTMENTS,
+    doctors,
+)
+from gurobipy import GRB, Env, Model
+from instance import CalendarRule, RosterInstance
+from model_builder import build_gurobi_model
+from synthetic import generate_instance
+
+
+def build_tupledict_model(instance, env):
+    """The model of main.py, built with the tupledict builders of constraints.py"""
+    departments_doctors = defaultdict(list)
+    for doctor, department in instance.doctors.items():
+        departments_doctors[department].append(doctor)
+    department_names = list(departments_doctors)
+    model = Model(env=env)
+    forbidden = department_forbidden_slots(
+        department_names,
+        instance.num_shifts,
+        instance.day_of_week,
+        instance.departments_constraint,
+        instance.holidays,
+        instance.calendar_rules,
+    )
+    variables = build_assignment_vars(
+        model, instance.doctors, department_names, forbidden
+    )
+    max_work_vars = model.addVars(department_names, vtype=GRB.CONTINUOUS)
+    min_work_vars = model.addVars(department_names, vtype=GRB.CONTINUOUS)
+    workload = workload_expressions(model, variables)
+    build_consecutive_shift_constraint(
+        model,
+        variables,
+        instance.doctor_names,
+        instance.num_days,
+        num_shifts=instance.num_shifts,
+        consecutive_limit=instance.consecutive_limit,
+    )
+    build_doctors_per_shift_constraint(model, variables, *coverage_bounds(instance))
+    build_shifts_range_contraints(
+        model,
+        variables,
+        instance.doctor_names,
+        instance.num_days,
+        relaxation=instance.relaxation,
+    )
+    for low in instance.low_working_departments:
+        for high in instance.high_working_departments:
+            build_cross_department_constraint(
+                model,
+                variables,
+                (low, departments_doctors[low]),
+                (high, departments_doctors[high]),
+            )
+    for doctor in instance.doctors:
+        model.addConstr(workload[doctor] <= instance.max_shifts)
+    for department, department_doctors in departments_doctors.items():
+        build_luck_worker_constraint(
+            model,
+            variables,
+            max_work_vars,
+            (department, department_doctors),
+            mode="unluckiest",
+        )
+        build_luck_worker_constraint(
+            model,
+            variables,
+            min_work_vars,
+            (department, department_doctors),
+            mode="luckiest",
+        )
+    model.setObjective(max_work_vars.sum() - min_work_vars.sum(), GRB.MINIMIZE)
+    return model, variables
+
+
+INSTANCES = {
+    "march": RosterInstance.from_month(
+        "2025-03-01",
+        doctors,
+        low_working_departments=LOW_WORKING_DEPARTMENTS,
+        high_working_departments=HIGH_WORKING_DEPARTMENTS,
+    ),
+    "december_with_rules": RosterInstance.from_month(
+        "2025-12-01",
+        doctors,
+        low_working_departments=LOW_WORKING_DEPARTMENTS,
+        high_working_departments=HIGH_WORKING_DEPARTMENTS,
+        calendar_rules=[
+            CalendarRule(
+                department=LOW_WORKING_DEPARTMENTS[0],
+                days_of_week=[HOLIDAY],
+                forbidden=True,
+            ),
+            CalendarRule(days=[30], shifts=[1], min_doctors=2, max_doctors=2),
+        ],
+    ),
+    # Unequal workloads are unavoidable, the optimum is not 0
+    "synthetic": generate_instance(
+        9, 3, num_days=11, forbidden_density=0.1, consecutive_limit=2, seed=2
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def env():
+    with Env(params={"OutputFlag": 0, "Threads": 1}) as env:
+        yield env
+
+
+def fix_roster(variables, worked):
+    """Fix every assignment variable of the tupledict model to the roster"""
+    for (doctor, day, shift), var in variables.items():
+        var.LB = var.UB = float(worked.get((doctor, day, shift), 0))
+
+
+@pytest.mark.parametrize("name", list(INSTANCES))
+def test_same_optimum_as_the_tupledict_model(env, name):
+    instance = INSTANCES[name]
+    matrix_model, matrix_variables, index = build_gurobi_model(instance, env=env)
+    tupledict_model, tupledict_variables = build_tupledict_model(instance, env)
+    matrix_model.optimize()
+    tupledict_model.optimize()
+
+    # The same slots become variables
+    assert set(tupledict_variables) == {
+        (index.doctor_names[doctor], day, shift)
+        for doctor, day, shift in np.argwhere(index.allowed).tolist()
+    }
+    assert matrix_model.Status == tupledict_model.Status == GRB.OPTIMAL
+    assert matrix_model.ObjVal == pytest.approx(tupledict_model.ObjVal)
+    if name == "synthetic":
+        assert matrix_model.ObjVal == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("name", list(INSTANCES))
+def test_same_rosters_are_feasible(env, name):
+    instance = INSTANCES[name]
+    matrix_model, matrix_variables, index = build_gurobi_model(instance, env=env)
+    matrix_model.optimize()
+    worked = index.assignment_values(matrix_variables.X)
+    cells = [tuple(cell) for cell in np.argwhere(index.allowed).tolist()]
+
+    rng = np.random.default_rng(0)
+    rosters = [worked]
+    # The optimal roster with a few cells flipped, mostly infeasible
+    for flips in (1, 2, 4, 8):
+        flipped = worked.copy()
+        for position in rng.choice(len(cells), flips, replace=False):
+            flipped[cells[position]] = not flipped[cells[position]]
+        rosters.append(flipped)
+
+    for roster in rosters:
+        assigned = {
+            (index.doctor_names[doctor], day, shift): 1
+            for doctor, day, shift in np.argwhere(roster).tolist()
+        }
+        tupledict_model, tupledict_variables = build_tupledict_model(instance, env)
+        fix_roster(tupledict_variables, assigned)
+        tupledict_model.optimize()
+        fixed_matrix, fixed_variables, _ = build_gurobi_model(instance, env=env)
+        values = roster[index.allowed].astype(float)
+        fixed_variables[: index.num_assignments].LB = values
+        fixed_variables[: index.num_assignments].UB = values
+        fixed_matrix.optimize()
+
+        assert fixed_matrix.Status == tupledict_model.Status
+        if fixed_matrix.Status == GRB.OPTIMAL:
+            assert fixed_matrix.ObjVal == pytest.approx(tupledict_model.ObjVal)
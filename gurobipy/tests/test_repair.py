@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from departments_data import doctors
+from instance import RosterInstance
+from matrix_constraints import RosterIndex
+from model_builder import build_roster_blocks, stack_roster_blocks
+from repair import OBJECTIVE_BLOCKS, repair_roster
+from solver import solve_roster
+from warm_start import warm_start_values
+
+
+@pytest.fixture(scope="module")
+def solved():
+    instance = RosterInstance.from_month("2025-04-01", doctors)
+    result = solve_roster(instance, time_limit=30, mip_gap=0.1, threads=1)
+    assert result.roster is not None
+    return instance, result.roster
+
+
+def violated_rules(instance, roster):
+    """Hard rules of build_roster_blocks, department slots included, the roster breaks"""
+    index = RosterIndex(instance)
+    blocks = [
+        block
+        for block in build_roster_blocks(instance, index)
+        if block.name not in OBJECTIVE_BLOCKS
+    ]
+    A, lower, upper = stack_roster_blocks(blocks)
+    activity = A[:, : index.num_assignments] @ warm_start_values(
+        index, roster.assignment
+    )
+    row_names = np.concatenate([[block.name] * block.A.shape[0] for block in blocks])
+    violated = (activity < lower - 1e-9) | (activity > upper + 1e-9)
+    return sorted(set(row_names[violated]))
+
+
+def sick_call(instance, roster):
+    """A doctor working on the first day calls in sick for the first three days"""
+    sick = next(doctor for doctor, day, _ in roster.assignment if day == 0)
+    return [
+        (sick, day, shift) for day in range(3) for shift in range(instance.num_shifts)
+    ]
+
+
+def test_local_search_repairs_the_roster(solved):
+    instance, roster = solved
+    assert violated_rules(instance, roster) == []
+    unavailable = sick_call(instance, roster)
+
+    result = repair_roster(
+        instance, roster, unavailable, time_limit=5, fallback_time_limit=30, threads=1
+    )
+
+    assert result.status == "repaired"
+    assert violated_rules(instance, result.roster) == []
+    assert not set(result.roster.assignment).intersection(unavailable)
+
+
+def test_solver_fallback_repairs_the_roster(solved):
+    instance, roster = solved
+    unavailable = sick_call(instance, roster)
+
+    # Without local search iterations the roster goes straight to the MILP
+    result = repair_roster(
+        instance,
+        roster,
+        unavailable,
+        max_iterations=0,
+        fallback_time_limit=30,
+        threads=1,
+    )
+
+    assert result.status in ("optimal", "time_limit")
+    assert result.roster is not None
+    assert violated_rules(instance, result.roster) == []
+    assert not set(result.roster.assignment).intersection(unavailable)
@@ -0,0 +1,61 @@
+import os
+
+from departments_data import departments_constraint, doctors
+from instance import RosterInstance
+from solve_cache import SolveCache, instance_key
+from solve_result import RosterResult
+
+
+def test_instance_key_ignores_the_order_of_dicts_and_lists():
+    instance = RosterInstance.from_month(
+        "2025-03-01",
+        doctors,
+        low_working_departments=["reparto_ostetricia", "reparto_ginecologia"],
+        last_worked={"a": 1, "b": 2},
+    )
+    shuffled = RosterInstance.from_month(
+        "2025-03-01",
+        dict(reversed(list(doctors.items()))),
+        departments_constraint={
+            department: list(reversed(slots))
+            for department, slots in reversed(list(departments_constraint.items()))
+        },
+        low_working_departments=["reparto_ginecologia", "reparto_ostetricia"],
+        last_worked={"b": 2, "a": 1},
+    )
+    assert instance_key(instance, mip_gap=0.01) == instance_key(shuffled, mip_gap=0.01)
+    assert instance_key(instance, mip_gap=None) == instance_key(instance)
+    assert instance_key(instance, mip_gap=0.01) != instance_key(instance)
+    assert instance_key(instance) != instance_key(
+        RosterInstance.from_month("2025-04-01", doctors)
+    )
+
+
+def test_lru_eviction():
+    cache = SolveCache(capacity=2)
+    cache.put("a", RosterResult(status="optimal", objective=1.0))
+    cache.put("b", RosterResult(status="optimal", objective=2.0))
+    # A hit makes "a" the most recently used, "b" is evicted
+    assert cache.get("a").objective == 1.0
+    cache.put("c", RosterResult(status="infeasible"))
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.get("b") is None
+
+    cache.put("d", RosterResult(status="time_limit", objective=3.0))
+    assert "d" not in cache and len(cache) == 2
+
+
+def test_results_persist_on_disk(tmp_path):
+    cache = SolveCache(capacity=3, directory=tmp_path)
+    for position, key in enumerate(["a", "b", "c"]):
+        cache.put(key, RosterResult(status="optimal", objective=float(position)))
+        os.utime(tmp_path / f"{key}.pkl", (position, position))
+
+    reopened = SolveCache(capacity=3, directory=tmp_path)
+    assert len(reopened) == 3
+    assert reopened.get("b").objective == 1.0
+
+    # Reopened with less room, the least recently used results on disk go first
+    smaller = SolveCache(capacity=1, directory=tmp_path)
+    assert "b" in smaller and len(smaller) == 1
+    assert sorted(path.stem for path in tmp_path.glob("*.pkl")) == ["b"]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+from matrix_constraints import RosterIndex
+
+# Only apply_warm_start feeds a Gurobi model, warm_start_values runs without Gurobi installed
+if TYPE_CHECKING:
+    from gurobipy import MVar
+
+
+def shift_assignment_by_weekday(
+    assignment: List[Tuple[str, int, int]],
+    previous_day_of_week: List[int],
+    day_of_week: List[int],
+) -> List[Tuple[str, int, int]]:
+    """Project a previous month roster on a new month keeping the day of the week
+
+    Each day of the new month copies the shifts of the day of the previous month
+    with the same day of the week in the same week of the month.
+
+    Args:
+        assignment (List[Tuple[str, int, int]]): (doctor_name, day, shift) of the previous month
+        previous_day_of_week (List[int]): day of the week of every day of the previous month
+        day_of_week (List[int]): day of the week of every day of the new month
+
+    Returns:
+        List[Tuple[str, int, int]]: (doctor_name, day, shift) on the new month
+    """
+    if not previous_day_of_week or not day_of_week:
+        return []
+    offset = (day_of_week[0] - previous_day_of_week[0]) % 7
+    previous_days = len(previous_day_of_week)
+    # new day -> previous day with the same day of the week
+    source_day = {}
+    for day in range(len(day_of_week)):
+        previous_day = day + offset
+        while previous_day >= previous_days:
+            previous_day -= 7
+        source_day.setdefault(previous_day, []).append(day)
+
+    return [
+        (doctor, new_day, shift)
+        for doctor, day, shift in assignment
+        for new_day in source_day.get(day, [])
+    ]
+
+
+def warm_start_values(
+    index: RosterIndex, assignment: List[Tuple[str, int, int]]
+) -> np.ndarray:
+    """0/1 value of every assignment column of the index, doctors not in the index are ignored"""
+    doctor_position = {doctor: idx for idx, doctor in enumerate(index.doctor_names)}
+    values = np.zeros(index.shape)
+    for doctor, day, shift in assignment:
+        if (
+            doctor in doctor_position
+            and day < index.num_days
+            and shift < index.num_shifts
+        ):
+            values[doctor_position[doctor], day, shift] = 1.0
+    return values[index.allowed]
+
+
+def apply_warm_start(
+    variables: MVar,
+    index: RosterIndex,
+    assignment: List[Tuple[str, int, int]],
+    hints: bool = False,
+) -> None:
+    """Feed a prior roster to Gurobi as MIP start, Gurobi repairs it if it became infeasible
+
+    Args:
+        variables (MVar): variables over the index columns
+        index (RosterIndex): roster axes
+        assignment (List[Tuple[str, int, int]]): (doctor_name, day, shift) of the prior roster
+        hints (bool): also set the prior roster as variable hints for the branching
+    """
+    from gurobipy import GRB
+
+    values = warm_start_values(index, assignment)
+    start = np.full(index.num_vars, GRB.UNDEFINED)
+    start[: index.num_assignments] = values
+    variables.Start = start
+    if hints:
+        variables[: index.num_assignments].VarHintVal = values